@@ -0,0 +1,412 @@
+ #**************************************************************************
+ # bnb.py
+ #
+ # Map a graph optimally using a branch-and-bound search, to measure how
+ # far the heuristic methods are from the optimal response time. The
+ # model is the same as the simulator: identical threads, non-preemptive
+ # execution, and data dependencies. Each node of the search starts one
+ # ready task on the thread which is idle first, as soon as possible, so
+ # each order of the tasks gives one schedule and the optimal schedule is
+ # among them. The nodes are pruned by the critical path and work lower
+ # bounds, the interchangeable ready tasks are branched once, and the
+ # partial schedules dominated by an explored one (the same tasks, but
+ # later idle times of the threads or ready times of the tasks) are not
+ # explored again. The search is split into subproblems which are solved
+ # in parallel, and it stops after a time budget with the best schedule
+ # found and the proven gap to the optimal response time.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import sys
+import math
+import time
+import multiprocessing
+import func
+import engine
+import bounds
+import simulator
+
+# Global variables of the worker processes #
+worker_search = None # The search of the worker
+
+# Define the search class #
+# The state of a branch-and-bound search of a graph (one search per process) #
+# best_t: The response time of the best known schedule (only better schedules are searched for) #
+# lower: A lower bound of the response time (the search stops if the best schedule reaches it) #
+# end_time: The time at which the search is stopped (time.time) #
+# shared: The response time of the best schedule of all the processes (multiprocessing.Value; None: one process) #
+# max_states: The maximum number of stored partial schedules (they are removed if there are more) #
+class search:
+	def __init__(self, num_tasks, num_threads, task_list, best_t, lower, end_time, shared = None, max_states = 1 << 20):
+		self.num_tasks = num_tasks
+		self.num_threads = num_threads
+		self.et = list(task_list.et)
+		self.succ = [tuple(sorted(set(task_list.succ(i)))) for i in range(num_tasks)]
+		self.rank = func.upward_rank(num_tasks, task_list)
+		self.num_pred = [0] * num_tasks # The number of predecessors of each task
+		for i in range(num_tasks):
+			for j in self.succ[i]:
+				self.num_pred[j] += 1
+
+		self.best_t = best_t
+		self.best = None # The (thread, start time) of each task of the best schedule found by the search
+		self.lower = lower
+		self.end_time = end_time
+		self.shared = shared
+		self.max_states = max_states
+		self.states = {} # The explored partial schedules (the set of started tasks -> (idle times, ready times))
+		self.num_states = 0
+		self.nodes = 0 # The number of explored nodes
+		self.stopped = False # The time budget is over
+
+		self.reset()
+
+	# Start the search from the empty schedule #
+	def reset(self):
+		self.left_pred = self.num_pred[:] # The number of predecessors of each task which are not started
+		self.ready_time = [0] * self.num_tasks # The latest finish time of the started predecessors of each task
+		self.ready = [i for i in range(self.num_tasks) if self.num_pred[i] == 0] # The tasks whose predecessors are started
+		self.free = [0] * self.num_threads # The time at which each thread is idle
+		self.thread = [None] * self.num_tasks
+		self.s_time = [None] * self.num_tasks
+		self.mask = 0 # The set of started tasks (bit mask)
+		self.num_started = 0
+		self.rem_work = sum(self.et) # The execution time of the tasks which are not started
+
+	# Start a task on the thread which is idle first, as soon as possible #
+	# Return the information to undo it #
+	def start(self, t_id):
+		free = self.free
+		thr = free.index(min(free))
+		s_time = max(free[thr], self.ready_time[t_id])
+		f_time = s_time + self.et[t_id]
+
+		old_free = free[thr]
+		free[thr] = f_time
+		self.thread[t_id] = thr
+		self.s_time[t_id] = s_time
+		self.ready.remove(t_id)
+		self.mask |= 1 << t_id
+		self.num_started += 1
+		self.rem_work -= self.et[t_id]
+
+		old_times = []
+		for k in self.succ[t_id]:
+			old_times.append(self.ready_time[k])
+			if f_time > self.ready_time[k]:
+				self.ready_time[k] = f_time
+			self.left_pred[k] -= 1
+			if self.left_pred[k] == 0:
+				self.ready.append(k)
+
+		return thr, old_free, old_times
+
+	# Undo the start of a task #
+	def undo(self, t_id, info):
+		thr, old_free, old_times = info
+
+		for k, old_time in zip(self.succ[t_id], old_times):
+			if self.left_pred[k] == 0:
+				self.ready.remove(k)
+			self.left_pred[k] += 1
+			self.ready_time[k] = old_time
+
+		self.free[thr] = old_free
+		self.thread[t_id] = None
+		self.s_time[t_id] = None
+		self.ready.append(t_id)
+		self.mask &= ~(1 << t_id)
+		self.num_started -= 1
+		self.rem_work += self.et[t_id]
+
+	# Calculate a lower bound of the response time of the schedules which complete the partial schedule #
+	def lower_bound(self):
+		free = self.free
+		low = min(free)
+
+		# The latest idle time of the threads and the work which is not started #
+		bound = max(max(free), -(-(sum(free) + self.rem_work) // self.num_threads))
+
+		# The longest path from each ready task (each task which is not started follows a ready task) #
+		for j in self.ready:
+			path = max(low, self.ready_time[j]) + self.rank[j]
+			if path > bound:
+				bound = path
+
+		return bound
+
+	# Return the ready tasks to be branched, in the order of exploration #
+	# The interchangeable tasks (the same execution time, earliest start time, and successors) are branched once #
+	# The tasks which can start at once are explored first, with the highest upward rank first #
+	def children(self):
+		low = min(self.free)
+		seen = set()
+		items = []
+
+		for j in self.ready:
+			est = max(low, self.ready_time[j])
+			key = (self.et[j], est, self.succ[j])
+			if key not in seen:
+				seen.add(key)
+				items.append((est > low, -self.rank[j], j))
+
+		items.sort()
+		return [item[2] for item in items]
+
+	# Check if the partial schedule is dominated by an explored one, and store it otherwise #
+	# A partial schedule with the same started tasks, whose threads are idle and ready tasks are ready no later, #
+	# can complete the schedule in the same order of the tasks with no later start times #
+	def dominated(self):
+		free = sorted(self.free)
+		low = free[0]
+		ready_time = self.ready_time
+		thread = self.thread
+		times = tuple(max(low, ready_time[k]) for k in range(self.num_tasks) if thread[k] == None and self.left_pred[k] < self.num_pred[k])
+
+		entries = self.states.get(self.mask)
+		if entries == None:
+			if self.num_states >= self.max_states:
+				self.states = {}
+				self.num_states = 0
+			entries = self.states[self.mask] = []
+		else:
+			for other_free, other_times in entries:
+				if all(a <= b for a, b in zip(other_free, free)) and all(a <= b for a, b in zip(other_times, times)):
+					return True
+
+		# Only a few partial schedules are stored for each set of tasks #
+		if len(entries) < 4:
+			entries.append((free, times))
+			self.num_states += 1
+
+		return False
+
+	# Exchange the response time of the best schedule with the other processes and check the time budget #
+	def sync(self):
+		if self.shared != None:
+			with self.shared.get_lock():
+				if self.best_t < self.shared.value:
+					self.shared.value = self.best_t
+				elif self.shared.value < self.best_t:
+					self.best_t = self.shared.value
+
+		if time.time() >= self.end_time:
+			self.stopped = True
+
+	# Explore the partial schedule (depth first) #
+	# Return the lowest lower bound of the nodes which are not explored when the time budget is over #
+	# (math.inf, if the partial schedule is explored completely) #
+	def explore(self):
+		self.nodes += 1
+		if self.nodes & 1023 == 0:
+			self.sync()
+		if self.best_t <= self.lower:
+			return math.inf
+		if self.stopped:
+			return self.lower_bound()
+
+		# A complete schedule #
+		if self.num_started == self.num_tasks:
+			t = max(self.free)
+			if t < self.best_t:
+				self.best_t = t
+				self.best = (self.thread[:], self.s_time[:])
+				self.sync()
+			return math.inf
+
+		bound = self.lower_bound()
+		if bound >= self.best_t or self.dominated():
+			return math.inf
+
+		open_bound = math.inf
+		for j in self.children():
+			info = self.start(j)
+			open_bound = min(open_bound, self.explore())
+			self.undo(j, info)
+
+			# The children which are not explored are bounded by the partial schedule (the search returns at once) #
+			if self.stopped:
+				return min(open_bound, bound)
+
+		return open_bound
+
+	# Solve a subproblem (the tasks started first, in the order of starting) #
+	# Return the lowest lower bound of the nodes which are not explored within the time budget #
+	# (math.inf, if the subproblem is solved completely) #
+	def solve(self, prefix):
+		self.reset()
+		for t_id in prefix:
+			self.start(t_id)
+
+		sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * self.num_tasks + 100))
+		self.sync()
+
+		return self.explore()
+
+	# Split the search into at least num_parts subproblems (fewer, if the search is smaller or the time budget is over) #
+	# Return the subproblems as (prefix, lower bound), sorted by the lower bound #
+	def split(self, num_parts):
+		parts = [((), self.lower)]
+
+		while len(parts) < num_parts:
+			next_parts = []
+			expanded = False
+
+			for k, (prefix, bound) in enumerate(parts):
+				# The subproblems which are not split when the time budget is over are kept #
+				if time.time() >= self.end_time:
+					next_parts.extend(parts[k:])
+					self.stopped = True
+					break
+
+				self.reset()
+				for t_id in prefix:
+					self.start(t_id)
+
+				if self.num_started == self.num_tasks:
+					next_parts.append((prefix, bound))
+					continue
+
+				expanded = True
+				for j in self.children():
+					info = self.start(j)
+					bound = self.lower_bound()
+					if bound < self.best_t:
+						next_parts.append((prefix + (j,), bound))
+					self.undo(j, info)
+
+			parts = next_parts
+			if not expanded or self.stopped:
+				break
+
+		parts.sort(key = lambda part: part[1])
+		return parts
+
+# Define the solution class #
+# The best schedule found by the search and the proven lower bound of the response time #
+class solution:
+	def __init__(self, result, lower, nodes, elapsed):
+		self.result = result # The schedule (see simulator.run)
+		self.lower = lower # The proven lower bound of the response time
+		self.gap = (result.t - lower) / lower if lower > 0 else 0.0 # The proven gap to the optimal response time
+		self.optimal = result.t <= lower # The schedule is optimal
+		self.nodes = nodes # The number of explored nodes
+		self.elapsed = elapsed # The wall time of the search (s)
+
+# Initialize a worker process #
+# pool_time: The time at which the pool of the workers is started (time.time) #
+def init_worker(num_tasks, num_threads, task_list, best_t, lower, end_time, shared, pool_time):
+	global worker_search
+
+	# The budget of the worker is shortened by the start of the pool, so the results are collected in time #
+	end_time -= time.time() - pool_time
+
+	worker_search = search(num_tasks, num_threads, task_list, best_t, lower, end_time, shared)
+
+# Solve a subproblem in a worker process #
+# Return the lower bound of the nodes which are not explored (see search.solve), the best schedule found (None, if #
+# none is better), and the number of explored nodes #
+def run_worker(prefix):
+	s = worker_search
+
+	nodes = s.nodes
+	open_bound = s.solve(prefix)
+	best = s.best
+	s.best = None
+
+	return open_bound, best, s.nodes - nodes
+
+# Build the schedule of the start times and threads of the tasks #
+def build_schedule(num_tasks, num_threads, task_list, deadline, thread, s_time):
+	result = engine.schedule(num_tasks, num_threads)
+
+	for t_id in sorted(range(num_tasks), key = lambda t_id: (s_time[t_id], thread[t_id])):
+		result.thread[t_id] = thread[t_id]
+		result.s_time[t_id] = s_time[t_id]
+		result.f_time[t_id] = s_time[t_id] + task_list.et[t_id]
+		result.queue[thread[t_id]].append(t_id)
+
+	result.t = max(result.f_time) if num_tasks > 0 else 0
+
+	# Calculate the results (as simulator.run) #
+	result.idle_time = sum(func.idle_time(num_threads, result, result.t))
+	result.miss_deadline = func.miss_deadline(deadline, result.t)
+
+	return result
+
+# Map the graph optimally, or as well as possible within the time budget #
+# The search starts from the best schedule of the work-conserving methods (see bounds.py) #
+# time_limit: The time budget (s) #
+# num_workers: Number of worker processes (0: Number of cores, 1: No parallel execution) #
+# rank: The upward rank of each task (see func.upward_rank; None: calculated here), shared by the methods and the bounds #
+# Return the solution (the schedule, the proven lower bound, and the proven gap) #
+def solve(num_tasks, num_threads, task_list, deadline, time_limit = 60, num_workers = 0, rank = None):
+	start_time = time.time()
+	end_time = start_time + time_limit
+
+	if num_workers == 0:
+		num_workers = multiprocessing.cpu_count()
+
+	# The best schedule of the work-conserving methods and the lower bound of the graph #
+	if rank == None:
+		rank = func.upward_rank(num_tasks, task_list)
+	best = None
+	for alg_name in bounds.work_conserving:
+		result = simulator.run(num_tasks, num_threads, task_list, deadline, alg_name, '', '', None, rank)
+		if best == None or result.t < best.t:
+			best = result
+	limits = bounds.bounds(num_tasks, num_threads, task_list, rank)
+
+	s = search(num_tasks, num_threads, task_list, best.t, limits.lower, end_time)
+	if best.t <= limits.lower:
+		return solution(best, limits.lower, 0, time.time() - start_time)
+
+	# Split the search into subproblems (several per worker, so the workers are balanced) #
+	# The heuristics and the split are counted in the time budget #
+	parts = s.split(num_workers * 8 if num_workers > 1 else 1)
+	prefixes = [prefix for prefix, bound in parts]
+
+	if s.stopped:
+		# The time budget is over: the subproblems are not explored #
+		outputs = [(bound, None, 0) for prefix, bound in parts]
+	elif num_workers <= 1:
+		outputs = []
+		for prefix in prefixes:
+			s.nodes = 0
+			outputs.append((s.solve(prefix), s.best, s.nodes))
+			s.best = None
+	elif bool(prefixes):
+		shared = multiprocessing.Value('q', best.t)
+		with multiprocessing.Pool(min(num_workers, len(prefixes)), init_worker,
+			(num_tasks, num_threads, task_list, best.t, limits.lower, end_time, shared, time.time())) as pool:
+			outputs = pool.map(run_worker, prefixes, chunksize = 1)
+	else:
+		outputs = []
+
+	# The best schedule of all the subproblems #
+	nodes = 0
+	lower = best.t
+	for open_bound, found, part_nodes in outputs:
+		nodes += part_nodes
+		if found != None:
+			result = build_schedule(num_tasks, num_threads, task_list, deadline, found[0], found[1])
+			if result.t < best.t:
+				best = result
+
+		# The optimal response time is at least the lowest bound of the nodes which are not explored #
+		lower = min(lower, open_bound)
+	lower = max(limits.lower, min(lower, best.t))
+
+	return solution(best, lower, nodes, time.time() - start_time)
@@ -0,0 +1,76 @@
+ #**************************************************************************
+ # bounds.py
+ #
+ # Calculate the bounds of the response time (makespan) of a graph from
+ # its data dependencies and the execution times of the tasks, in
+ # O(V + E) time. The lower bounds (the critical path and the total work
+ # divided by the number of threads) hold for all the methods, and the
+ # upper bound of Graham holds for the work-conserving methods (which
+ # never leave a thread idle while a task is ready). If a bound already
+ # decides the missed deadline status, the mapping process is not needed.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import func
+
+# The work-conserving methods (the ready tasks are dispatched as long as there are idle threads) #
+# BFS may leave the last finished thread idle, and NEW keeps the tasks in the allocation queues of the threads #
+work_conserving = ['lpt', 'spt', 'lnsnl', 'rank']
+
+# Calculate the length of the critical path (the longest path of the graph, including the execution times) #
+# rank: The upward rank of each task (see func.upward_rank; None: calculated here) #
+def critical_path(num_tasks, task_list, rank = None):
+	if num_tasks == 0:
+		return 0
+	if rank == None:
+		rank = func.upward_rank(num_tasks, task_list)
+
+	return max(rank)
+
+# Calculate the total work (the sum of the execution times of the tasks) #
+def total_work(task_list):
+	return sum(task_list.et)
+
+# Define the bounds class #
+# The bounds of the response time of a graph on a number of threads (calculated once and shared by the methods) #
+# rank: The upward rank of each task (see func.upward_rank; None: calculated here) #
+class bounds:
+	def __init__(self, num_tasks, num_threads, task_list, rank = None):
+		self.critical_path = critical_path(num_tasks, task_list, rank) # The length of the critical path
+		self.work = total_work(task_list) # The total work
+
+		# The lower bound: no method finishes before the critical path or before all the threads are busy with the work #
+		# (the execution times are integers, so the response time is an integer) #
+		self.lower = max(self.critical_path, -(-self.work // num_threads))
+
+		# The upper bound of Graham for the work-conserving methods: t <= work / m + (1 - 1 / m) * critical path #
+		self.upper = (self.work + (num_threads - 1) * self.critical_path) // num_threads
+
+	# Decide the missed deadline status of a method from the bounds (None, if the bounds do not decide it) #
+	def decide(self, deadline, alg_name):
+		if self.lower > deadline:
+			return 1
+		if self.upper <= deadline and alg_name in work_conserving:
+			return 0
+
+		return None
+
+	# Calculate the optimality gap of a response time (relative to the lower bound) #
+	# (the response time is at most this far above the optimal response time) #
+	def gap(self, t):
+		if self.lower == 0:
+			return 0.0
+
+		return (t - self.lower) / self.lower
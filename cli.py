@@ -0,0 +1,297 @@
+ #**************************************************************************
+ # cli.py
+ #
+ # The non-interactive entry point of the simulator. The simulation
+ # parameters are taken from the command line and/or a config file, so
+ # the simulator can run unattended (e.g., in batch pipelines).
+ #
+ # Usage: python cli.py [--config FILE] [options]
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import sys
+import random
+import argparse
+import configparser
+import gen
+import reader
+import func
+import gantt
+import prof
+import runner
+import memo
+import store
+import bounds
+import bnb
+
+# The options without a value (they are enabled by yes/true/1 in the config file) #
+flags = ['graphic', 'no_export', 'profile', 'cache', 'miss_only', 'random_et']
+
+# Create the parser of the command line #
+def create_parser():
+	parser = argparse.ArgumentParser(description = 'Map a task graph using the BFS, LPT, SPT, LNSNL, RANK, and NEW algorithms.')
+	parser.add_argument('-c', '--config', help = 'config file (the [simulator] section includes the options below, e.g., num_threads = 4); the command line overrides it')
+
+	group = parser.add_argument_group('graph')
+	group.add_argument('--graph', choices = ['bench', 'rand'] + gen.families, default = 'bench', help = 'benchmark, random graph, or a family of generated graphs (default: bench)')
+	group.add_argument('--bench-name', default = 'heat', help = 'name of the benchmark (default: heat)')
+	group.add_argument('--dot', help = 'DOT file of the benchmark (default: benchmark/<bench_name>_tdg.dot)')
+	group.add_argument('--json', help = 'JSON file of the execution times (default: benchmark/<bench_name>_json (<num_threads> threads).json, benchmark/<bench_name>_json.json, or the file of the closest number of threads)')
+	group.add_argument('--tdg-num', type = int, default = 0, help = 'task graph (cluster) of the DOT file (default: 0)')
+	group.add_argument('--num-tasks', type = int, default = 50, help = 'number of tasks [random case and families] (default: 50)')
+	group.add_argument('--dep-pro', type = float, default = 0.6, help = 'probability of selecting the sibling tasks [random case] (default: 0.6)')
+	group.add_argument('--num-dep-level', type = int, default = 2, help = 'maximum number of dependencies at each level [random case and layered] or radius [stencil] (default: 2)')
+	group.add_argument('--width', type = int, default = 10, help = 'width of the layers, stages, steps, or rows [families] (default: 10)')
+	group.add_argument('--edge-pro', type = float, default = 0.5, help = 'probability of a data dependency [erdos_renyi] or a parallel composition [series_parallel] (default: 0.5)')
+	group.add_argument('--seed', type = int, help = 'seed of the random number generator (default: not seeded)')
+
+	group = parser.add_argument_group('execution time and deadline')
+	group.add_argument('--et-type', choices = ['min', 'avg', 'max'], default = 'max', help = 'type of execution time generation (default: max)')
+	group.add_argument('--et-min', type = int, default = 5, help = 'minimum execution time [random case] (default: 5)')
+	group.add_argument('--et-max', type = int, default = 10, help = 'maximum execution time [random case] (default: 10)')
+	group.add_argument('--itr', type = int, default = 10, help = 'number of iterations for execution time generation [random case] (default: 10)')
+	group.add_argument('--random-et', action = 'store_true', help = 'use random execution times [benchmark] instead of the measured ones (a benchmark without measured execution times is an error otherwise)')
+	group.add_argument('--dl-min-prob', type = float, default = 0.5, help = 'minimum probability for determining the deadline (default: 0.5)')
+	group.add_argument('--dl-max-prob', type = float, default = 1, help = 'maximum probability for determining the deadline (default: 1)')
+
+	group = parser.add_argument_group('mapping')
+	group.add_argument('--num-threads', type = int, default = 8, help = 'number of threads (default: 8)')
+	group.add_argument('--methods', default = 'all', help = 'comma-separated methods: bfs, lpt, spt, lnsnl, rank, new_<alloc>_<disp> (e.g., new_MTRT_MCD), new (all the NEW configurations), or all (default: all)')
+	group.add_argument('--cache', action = 'store_true', help = 'reuse the schedules of the same graph, execution times, and methods (stored in cache/schedules)')
+	group.add_argument('--cache-size', type = int, default = 512, help = 'maximum size of the stored schedules in MB (default: 512)')
+	group.add_argument('--miss-only', action = 'store_true', help = 'only determine the missed deadline status of each method, using the bounds of the response time or stopping the mapping at the deadline (nothing is exported)')
+	group.add_argument('--exact-time', type = float, default = 0, help = 'time budget in seconds of the exact branch-and-bound mapping (bnb.py); the gaps of the methods are relative to its proven lower bound (default: 0, not run)')
+	group.add_argument('--num-workers', type = int, default = 0, help = 'number of worker processes; 0: number of cores, 1: no parallel execution (default: 0)')
+
+	group = parser.add_argument_group('output')
+	group.add_argument('--output-level', choices = ['quiet', 'summary', 'full'], default = 'summary', help = 'quiet: nothing, summary: a table of the results, full: the data dependencies and the results of each method (default: summary)')
+	group.add_argument('--output-dir', default = 'output', help = 'folder of the output files (default: output)')
+	group.add_argument('--no-export', action = 'store_true', help = 'do not export the scheduling of the threads')
+	group.add_argument('--graphic', action = 'store_true', help = 'draw the graphical output (requires PIL)')
+	group.add_argument('--gantt', choices = ['svg', 'png'], help = 'draw the Gantt chart of each method (<method>_gantt.svg or .png); the PNG output requires PIL')
+	group.add_argument('--gantt-width', type = int, default = 2000, help = 'width of the time axis of the Gantt charts in pixels (default: 2000)')
+	group.add_argument('--store', help = 'folder of a results store (store.py); the schedule and the results of each method are appended to it')
+	group.add_argument('--profile', action = 'store_true', help = 'profile the phases of each method (the methods run one after another) and write the breakdown to __profile.dat')
+
+	return parser
+
+# Read the options of a config file as command-line arguments #
+def read_config(parser, path):
+	config = configparser.ConfigParser()
+	if not bool(config.read(path)):
+		parser.error('cannot read the config file: ' + path)
+	if not config.has_section('simulator'):
+		parser.error('the config file does not include the [simulator] section: ' + path)
+
+	argv = []
+	for key, value in config.items('simulator'):
+		name = key.replace('-', '_')
+
+		if name in flags:
+			if config.getboolean('simulator', key):
+				argv.append('--' + name.replace('_', '-'))
+		else:
+			argv += ['--' + name.replace('_', '-'), value]
+
+	return argv
+
+# Parse the command line (and the config file) #
+def parse_args(argv = None):
+	parser = create_parser()
+	if argv == None:
+		argv = sys.argv[1:]
+
+	# The options of the config file come first, so the command line overrides them #
+	args = parser.parse_args(argv)
+	if args.config != None:
+		args = parser.parse_args(read_config(parser, args.config) + argv)
+
+	try:
+		args.configs = parse_methods(args.methods)
+	except ValueError as e:
+		parser.error(str(e))
+
+	return args
+
+# Find the algorithm configurations of a comma-separated list of methods #
+def parse_methods(methods):
+	config_list = []
+
+	for name in methods.split(','):
+		name = name.strip()
+
+		if name == 'all':
+			matches = runner.configs(True)
+		elif name == 'new':
+			matches = [config for config in runner.configs(True) if config[0] == 'new']
+		else:
+			matches = [config for config in runner.configs(True) if runner.config_name(config) == name]
+
+		if len(matches) == 0:
+			raise ValueError('unknown method: ' + name)
+
+		for config in matches:
+			if config not in config_list:
+				config_list.append(config)
+
+	return config_list
+
+# Return the title of an algorithm configuration #
+def config_title(config):
+	if config[0] == 'new':
+		return 'NEW (' + config[1] + ', ' + config[2] + ')'
+	return config[0].upper()
+
+# Run the simulation #
+def main(argv = None):
+	args = parse_args(argv)
+	full = args.output_level == 'full'
+
+	# The random number generator (seeded, if a seed is given) #
+	rng = random.Random(args.seed) if args.seed != None else random
+
+	# Generate the graph #
+	if args.graph == 'bench':
+		json_path = args.json if args.json != None else reader.bench_json_path(args.bench_name, args.num_threads)
+		num_tasks, task_list = gen.graph_predef(args.bench_name, args.tdg_num, args.dot, json_path)
+		measured = task_list.sample_ptr != None and task_list.sample_ptr[num_tasks] > 0
+
+		# The benchmarks without measured execution times (e.g., sparseLU) only use random ones if they are asked for #
+		if args.random_et:
+			graph_type = 'n'
+			print('warning: the benchmark ' + args.bench_name + ' uses random execution times' + ('' if measured else ' (no measured execution times in ' + json_path + ')'), file = sys.stderr)
+		elif not measured:
+			print('cli.py: error: the benchmark ' + args.bench_name + ' has no measured execution times in ' + json_path + ' (use --json, or --random-et for random execution times)', file = sys.stderr)
+			return 2
+		else:
+			graph_type = 'y'
+	elif args.graph == 'rand':
+		graph_type = 'n'
+		num_tasks = args.num_tasks
+		task_list = gen.graph_rand(num_tasks, args.dep_pro, args.num_dep_level, rng)
+	else:
+		graph_type = 'n'
+		num_tasks = args.num_tasks
+		try:
+			task_list = gen.graph_family(args.graph, num_tasks, args.width, args.num_dep_level, args.edge_pro, rng)
+		except ValueError as error:
+			print('cli.py: error: ' + str(error), file = sys.stderr)
+			return 2
+
+	if full:
+		print('The data dependencies:')
+		func.print_dependencies(num_tasks, task_list)
+
+	# Determine execution time of tasks and deadline of the system #
+	task_list, deadline = gen.specify_et(graph_type, num_tasks, task_list, args.bench_name, args.et_min, args.et_max, args.et_type, args.itr, args.dl_min_prob, args.dl_max_prob, rng)
+
+	os.makedirs(args.output_dir, exist_ok = True)
+
+	if args.cache:
+		memo.enable(max_bytes = args.cache_size << 20)
+
+	# Only determine the missed deadline status of the methods #
+	if args.miss_only:
+		checks = runner.check_deadlines(num_tasks, args.num_threads, task_list, deadline, args.configs, args.num_workers)
+
+		if args.output_level != 'quiet':
+			print('%-16s %16s %16s' % ('Method', 'Missed deadline', 'Decided by'))
+			for config, (status, decided_by) in zip(args.configs, checks):
+				print('%-16s %16s %16s' % (runner.config_name(config), status, decided_by))
+
+		return 0
+
+	# The upward rank of the tasks and the bounds of the response time (for the optimality gaps of the methods) #
+	# are calculated once and shared by the methods #
+	rank = func.upward_rank(num_tasks, task_list)
+	limits = bounds.bounds(num_tasks, args.num_threads, task_list, rank)
+
+	# The exact mapping (within the time budget) proves a higher lower bound #
+	exact = None
+	if args.exact_time > 0:
+		exact = bnb.solve(num_tasks, args.num_threads, task_list, deadline, args.exact_time, args.num_workers, rank)
+		limits.lower = max(limits.lower, exact.lower)
+
+	# Export the scheduling of the threads and the graphical output of a method #
+	def export(config, result):
+		if not args.no_export:
+			func.export_scheduling(args.num_threads, result, config[0], config[1], config[2], args.output_dir)
+		if args.gantt != None:
+			title = config_title(config) + ', ' + str(args.num_threads) + ' threads, response time ' + str(result.t)
+			gantt.render_result(os.path.join(args.output_dir, runner.config_name(config) + '_gantt.' + args.gantt), args.num_threads, result,
+				width = args.gantt_width, title = title)
+		if args.graphic:
+			func.graphic_result(args.num_threads, result, result.t, config[0], config[1], config[2], args.output_dir)
+
+	# Map the graph using the methods #
+	if args.profile:
+		# Profile the mapping and the export of each method separately #
+		results = []
+		reports = []
+		for config in args.configs:
+			with prof.profiler() as p:
+				results.append(runner.run_schedules(num_tasks, args.num_threads, task_list, deadline, [config], 1, rank)[0])
+				export(config, results[-1])
+			reports.append(p.report(runner.config_name(config) + ' (' + str(num_tasks) + ' tasks, ' + str(args.num_threads) + ' threads)'))
+
+		with open(os.path.join(args.output_dir, "__profile.dat"), "w") as file:
+			file.write('\n\n'.join(reports) + '\n')
+	else:
+		results = runner.run_schedules(num_tasks, args.num_threads, task_list, deadline, args.configs, args.num_workers, rank)
+		for config, result in zip(args.configs, results):
+			export(config, result)
+
+	# Show the results #
+	for config, result in zip(args.configs, results):
+		if full:
+			print('\n' + config_title(config) + ' \n***********************************')
+			print('Response time: ' + str(result.t))
+			print('Idle time: ' + str(result.idle_time))
+			print('Missed deadline: ' + str(result.miss_deadline))
+			print('Optimality gap: ' + '%.2f%%' % (limits.gap(result.t) * 100))
+
+	if args.output_level == 'summary':
+		print('Lower bound: ' + str(limits.lower) + ' (critical path: ' + str(limits.critical_path) + ', work: ' + str(limits.work) + ')')
+		if exact != None:
+			print('Exact: ' + str(exact.result.t) + (' (optimal)' if exact.optimal else ' (gap ' + '%.2f%%' % (exact.gap * 100) + ')') + ', ' + str(exact.nodes) + ' nodes in ' + '%.1f' % exact.elapsed + ' s')
+		print('%-16s %16s %16s %16s %16s' % ('Method', 'Response time', 'Idle time', 'Missed deadline', 'Gap'))
+		for config, result in zip(args.configs, results):
+			print('%-16s %16s %16s %16s %16s' % (runner.config_name(config), result.t, result.idle_time, result.miss_deadline, '%.2f%%' % (limits.gap(result.t) * 100)))
+
+	if args.profile and args.output_level != 'quiet':
+		print('\n' + '\n\n'.join(reports))
+
+	# Append the runs to the results store #
+	if args.store != None:
+		results_store = store.store(args.store)
+		graph = {'graph': args.graph, 'seed': args.seed, 'et_type': args.et_type, 'dl_min_prob': args.dl_min_prob, 'dl_max_prob': args.dl_max_prob}
+		if args.graph == 'bench':
+			graph.update(bench_name = args.bench_name, tdg_num = args.tdg_num, dot = args.dot, json = json_path, random_et = args.random_et)
+		else:
+			graph.update(num_tasks = args.num_tasks, dep_pro = args.dep_pro, num_dep_level = args.num_dep_level, width = args.width, edge_pro = args.edge_pro,
+				et_min = args.et_min, et_max = args.et_max, itr = args.itr)
+
+		for config, result in zip(args.configs, results):
+			results_store.append(runner.config_name(config), num_tasks, args.num_threads, deadline, result, graph)
+
+	# Write the results to the file (as main.py) #
+	with open(os.path.join(args.output_dir, "__results.dat"), "w") as file:
+		file.write('\t'.join(str(result.t) + '\t' + str(result.idle_time) + '\t' + str(result.miss_deadline) for result in results))
+
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,194 @@
+ #**************************************************************************
+ # compiled.py
+ #
+ # Keep the compiled benchmark graphs (the data dependencies and the
+ # execution times measured for each task) in binary files, which are
+ # mapped into memory instead of parsing the DOT and JSON files again.
+ # Each file is named after a content hash of its source files, so it
+ # is rebuilt automatically when a source file is changed. The content
+ # hashes are kept in an index by the size and the modification time of
+ # the files, so a source file is only read again when it is changed.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import time
+import mmap
+import struct
+import hashlib
+import threading
+
+cache_dir = "cache" # The folder of the compiled graphs
+version = 1 # The version of the file format (a new version invalidates the existing files)
+index_name = "sources.idx" # The index of the content hashes of the source files (in the folder of the compiled graphs)
+max_index = 256 # The maximum number of entries of the index
+stat_keys = None # The content hashes of the source files by their stat key (read from the index once)
+index_lock = threading.Lock() # The lock of the index (the graphs can be loaded by several threads)
+
+# The arrays stored in a compiled file and their type codes (see gen.graph) #
+fields = [('pred_ptr', 'q'), ('pred_idx', 'i'), ('succ_ptr', 'q'), ('succ_idx', 'i'), ('sample_ptr', 'q'), ('sample_data', 'q')]
+
+# The header of a compiled file: magic, version, number of tasks, and the length of each array #
+header = struct.Struct('<4sIq' + 'q' * len(fields))
+magic = b'TDGC'
+
+# Calculate the content hash of the source files (a missing file is hashed as such) #
+def content_key(paths):
+	h = hashlib.sha256(b'%d' % version)
+
+	for path in paths:
+		if os.path.exists(path):
+			h.update(b'\x01')
+			with open(path, 'rb') as file:
+				for chunk in iter(lambda: file.read(1 << 20), b''):
+					h.update(chunk)
+		else:
+			h.update(b'\x00')
+
+	return h.hexdigest()[:32]
+
+# Calculate the stat key of the source files (their paths, sizes, and modification times) #
+# Return the key, and whether a file has been changed too recently to be keyed by its modification time #
+def stat_key(paths):
+	h = hashlib.sha256(b'%d' % version)
+	recent = False
+	now = time.time_ns()
+
+	for path in paths:
+		h.update(os.path.abspath(path).encode() + b'\x00')
+		try:
+			st = os.stat(path)
+		except OSError:
+			h.update(b'\x00')
+			continue
+
+		h.update(b'\x01%d|%d|' % (st.st_size, st.st_mtime_ns))
+
+		# The file may be changed again with the same size and modification time (within the resolution of the time) #
+		if st.st_mtime_ns >= now - 2 * 10 ** 9:
+			recent = True
+
+	return h.hexdigest()[:32], recent
+
+# Read the index of the content hashes (an empty index, if it does not exist or is not readable) #
+def read_index():
+	keys = {}
+
+	try:
+		with open(os.path.join(cache_dir, index_name), 'r') as file:
+			for line in file:
+				fields = line.split()
+				if len(fields) == 2:
+					keys[fields[0]] = fields[1]
+	except OSError:
+		pass
+
+	return keys
+
+# Write the index of the content hashes (the latest entries, up to max_index) #
+# The index is written under a temporary name first; it is not stored if the folder is not writable #
+def write_index(keys):
+	path = os.path.join(cache_dir, index_name)
+	tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+
+	try:
+		os.makedirs(cache_dir, exist_ok = True)
+		with open(tmp_path, 'w') as file:
+			for key, value in list(keys.items())[-max_index:]:
+				file.write(key + ' ' + value + '\n')
+		os.replace(tmp_path, path)
+	except OSError:
+		pass
+
+# Return the content hash of the source files #
+# The hash is taken from the index if the sizes and modification times of the files have not been changed, #
+# and the files are only read (and the index updated) otherwise #
+def source_key(paths):
+	global stat_keys
+
+	key, recent = stat_key(paths)
+	with index_lock:
+		if stat_keys == None:
+			stat_keys = read_index()
+		content = stat_keys.get(key)
+	if content != None:
+		return content
+
+	content = content_key(paths)
+	if not recent:
+		with index_lock:
+			stat_keys[key] = content
+			write_index(stat_keys)
+
+	return content
+
+# Return the path of the compiled file of a benchmark based on its source files #
+# The name includes a short hash of the paths, so the files compiled from different sources of a benchmark #
+# (e.g., JSON files of different numbers of threads) are kept side by side #
+def bench_file(bench_name, paths):
+	path_key = hashlib.sha256('\n'.join(os.path.abspath(path) for path in paths).encode()).hexdigest()[:8]
+
+	return os.path.join(cache_dir, bench_name + '_' + path_key + '_' + source_key(paths) + '.tdg')
+
+# Write the arrays of a graph to a compiled file #
+# The file is written under a temporary name first, so a partial file is never mapped #
+def write(path, num_tasks, arrays):
+	os.makedirs(os.path.dirname(path), exist_ok = True)
+
+	tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+	with open(tmp_path, 'wb') as file:
+		file.write(header.pack(magic, version, num_tasks, *[len(arrays[name]) for name, code in fields]))
+
+		for name, code in fields:
+			data = arrays[name].tobytes()
+			file.write(data)
+
+			# Keep each array aligned to 8 bytes #
+			file.write(b'\x00' * (-len(data) % 8))
+
+	os.replace(tmp_path, path)
+
+	# Remove the files of the older versions of the sources (<name>_<hash>.tdg) #
+	folder, name = os.path.split(path)
+	prefix = name[:name.rindex('_') + 1]
+	for old in os.listdir(folder):
+		if old != name and old.startswith(prefix) and old.endswith('.tdg') and len(old) == len(name):
+			try:
+				os.remove(os.path.join(folder, old))
+			except OSError:
+				pass
+
+# Map a compiled file into memory #
+# Return the number of tasks and the arrays (read-only memory views of the file) #
+def load(path):
+	with open(path, 'rb') as file:
+		mem = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+	items = header.unpack_from(mem, 0)
+	if items[0] != magic or items[1] != version:
+		raise ValueError('Invalid compiled graph: ' + path)
+
+	num_tasks = items[2]
+	arrays = {}
+	view = memoryview(mem)
+	offset = header.size
+
+	for k in range(len(fields)):
+		name, code = fields[k]
+		size = items[3 + k] * struct.calcsize(code)
+		arrays[name] = view[offset:offset + size].cast(code)
+		offset += size + (-size % 8)
+
+	return num_tasks, arrays
@@ -0,0 +1,150 @@
+ #**************************************************************************
+ # engine.py
+ #
+ # This file includes the discrete-event simulation core that drives the
+ # mapping process of all the methods. Instead of stepping the time with
+ # a fixed interval, the simulation jumps directly to the next finish time
+ # of the executing tasks.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import copy
+import heapq
+
+# Define the schedule class #
+# A schedule keeps the results of a mapping process in arrays indexed by the task ID, #
+# so the tasks of the graph are not modified and a graph can be mapped by several schedulers at once #
+class schedule:
+	def __init__(self, num_tasks, num_threads):
+		self.thread = [None] * num_tasks # The thread number of each task
+		self.s_time = [None] * num_tasks # Start time of the execution of each task
+		self.f_time = [None] * num_tasks # Finish time of the execution of each task
+		self.queue = [[] for i in range(num_threads)] # The task IDs executed by each thread (in the order of execution)
+		self.t = 0 # Response time
+		self.idle_time = None # Idle time of the system (calculated by simulator.run)
+		self.miss_deadline = None # The missed deadline status of the system (calculated by simulator.run)
+		self.stopped = False # The mapping process was stopped at the time limit (see simulate)
+
+# Define the readiness tracker class #
+# The tracker keeps the number of unfinished predecessors of each task, so a task becomes ready #
+# when the counter reaches zero and only the successors of a finished task need to be checked #
+# (the successors are stored in the graph, see gen.graph) #
+# The ready tasks are kept in a priority queue ordered by prio(task) and then by the task ID, #
+# so a method can choose its next task in O(log N) #
+# The priority of a task is calculated when it becomes ready, so the attributes of a task (e.g., its execution #
+# time) are not read before that (see incremental.py) #
+class ready_tracker:
+	def __init__(self, num_tasks, task_list, prio = None):
+		self.task_list = task_list # The graph of the tasks
+		self.num_pred = [0] * num_tasks # The number of unfinished predecessors of each task
+		self.prio = prio # The priority function of the tasks (lower values are selected first; None: the order of the task IDs)
+		self.ready = [] # The ready tasks which are not dispatched yet (min-heap of (priority, task ID))
+
+		# Count the predecessors of each task using the successor index #
+		for i in range(num_tasks):
+			for j in task_list.succ(i):
+				self.num_pred[j] += 1
+
+		# The tasks without any data dependencies are ready at the beginning #
+		for i in range(num_tasks):
+			if self.num_pred[i] == 0:
+				self.ready.append((self.priority(i), i))
+
+		heapq.heapify(self.ready)
+
+	# Copy the tracker (for the snapshots of incremental.py) #
+	# The lists only contain numbers and tuples of numbers, so they are copied at once instead of item by item #
+	def __deepcopy__(self, memo):
+		other = ready_tracker.__new__(ready_tracker)
+		other.task_list = copy.deepcopy(self.task_list, memo)
+		other.num_pred = self.num_pred[:]
+		other.prio = self.prio
+		other.ready = self.ready[:]
+
+		return other
+
+	# Return the priority of a task #
+	def priority(self, t_id):
+		if self.prio == None:
+			return 0
+		return self.prio(self.task_list[t_id])
+
+	# Update the counters of the successors of a finished task and add the new ready tasks #
+	def complete(self, t_id):
+		for i in self.task_list.succ(t_id):
+			self.num_pred[i] -= 1
+			if self.num_pred[i] == 0:
+				heapq.heappush(self.ready, (self.priority(i), i))
+
+	# Remove the ready task with the highest priority from the ready tasks and return its ID #
+	def pop(self):
+		return heapq.heappop(self.ready)[1]
+
+# Run the event-driven mapping process and return the schedule #
+# The scheduler of a method provides the following functions: #
+# sched.dispatch(t): Return the list of (thread number, task ID) pairs to be started at time t #
+# sched.finish(thr_num, t_id, t): Process a task which has been finished by a thread at time t #
+# Each iteration of the main loop (dispatching at time t and finishing the tasks of the next finish time) is a step #
+# state: The (schedule, time, completion events, number of completed tasks, step) to resume from (see incremental.py) #
+# on_step: A function called at the beginning of each step with the current state #
+# until: The time limit (None: no limit); the mapping process is stopped once the time passes the limit, where the #
+# schedule only includes the started tasks and t is the first finish time after the limit #
+def simulate(num_tasks, num_threads, task_list, sched, state = None, on_step = None, until = None):
+	if state == None:
+		result = schedule(num_tasks, num_threads) # The schedule of the tasks
+		t = 0 # Response time
+		events = [] # The completion events (finish time, thread number, task ID)
+		comp_tasks_cnt = 0 # The number of completed tasks
+		step = 0 # The number of steps
+	else:
+		result, t, events, comp_tasks_cnt, step = state
+
+	# Continue the mapping process until all the tasks are finished #
+	while comp_tasks_cnt < num_tasks:
+		if on_step != None:
+			on_step(result, t, events, comp_tasks_cnt, step)
+		step += 1
+
+		# Start the tasks selected by the method at the current time #
+		for thr_num, t_id in sched.dispatch(t):
+			result.thread[t_id] = thr_num
+			result.s_time[t_id] = t
+			result.f_time[t_id] = t + task_list.et[t_id]
+			result.queue[thr_num].append(t_id)
+
+			heapq.heappush(events, (result.f_time[t_id], thr_num, t_id))
+
+		# There are not any executing tasks, so the remaining tasks can never be started #
+		if not bool(events):
+			raise RuntimeError('The remaining tasks cannot be started (cyclic data dependencies)')
+
+		# Jump to the next finish time #
+		t = events[0][0]
+
+		# Stop the mapping process after the time limit #
+		if until != None and t > until:
+			result.stopped = True
+			break
+
+		# Finish all the tasks whose execution ends at this time (in the order of the threads) #
+		while bool(events) and events[0][0] == t:
+			f_time, thr_num, t_id = heapq.heappop(events)
+			comp_tasks_cnt += 1
+
+			sched.finish(thr_num, t_id, t)
+
+	result.t = t
+
+	return result
@@ -17,64 +17,29 @@
  # See the License for the specific language governing permissions and
  # limitations under the License.
  #**************************************************************************
-from PIL import Image, ImageDraw, ImageFont
-
-# Clear the detailed contents of the tasks #
-def clear(num_tasks, task_list):
-	for i in range(num_tasks):
-		task_list[i].status = None
-		task_list[i].s_time = None
-		task_list[i].f_time = None
-
-	return task_list
-
-# Check for existing empty threads #
-def check_empty_thr(num_threads, thread_queue):
-	flag_empty = False
-
-	for i in range(num_threads):
-		if not bool(thread_queue[i]):
-			flag_empty = True
-		else:
-			if thread_queue[i][len(thread_queue[i]) - 1].status == 'f':
-				flag_empty = True
-
-	return flag_empty
-
-# Check meeting the dependencies #
-def check_dep(task_list, dep_list):
-	flag_finished = True
-
-	for i in range(len(dep_list)):
-		for j in range(len(task_list)):
-			if dep_list[i] == task_list[j] and task_list[j].status != 'f':
-				flag_finished = False
-
-	return flag_finished
-
 # Calculate the idle times of the threads #
-def idle_time(num_threads, queue, t):
+def idle_time(num_threads, result, t):
 	idle_time_thr = [] # Idle time of each thread
 
 	# Determine the idle time of each thread #
 	for i in range(num_threads):
 		idle_time_thr.append([])
+		queue = result.queue[i] # The tasks executed by the thread
 
 		# Check the queue of the thread #
 		# The queue is empty #
-		if len(queue[i]) == 0:
+		if len(queue) == 0:
 			idle_time_thr[i] = t
 		# The queue is not empty #
 		else:
-			for j in range(len(queue[i])):
+			for j in range(len(queue)):
 				if j == 0:
-					idle_time_thr[i] = queue[i][j].s_time - 1
+					idle_time_thr[i] = result.s_time[queue[j]]
 				else:
-					if queue[i][j].s_time != queue[i][j - 1].f_time:
-						idle_time_thr[i] += queue[i][j].s_time - queue[i][j - 1].f_time - 1
+					idle_time_thr[i] += result.s_time[queue[j]] - result.f_time[queue[j - 1]]
 
-				if j == len(queue[i]) - 1:
-					idle_time_thr[i] += t - queue[i][j].f_time
+				if j == len(queue) - 1:
+					idle_time_thr[i] += t - result.f_time[queue[j]]
 
 	return idle_time_thr
 
@@ -85,35 +50,99 @@ def miss_deadline(deadline, t):
 	else:
 		return 1
 
+# Return the task IDs in a topological order (each task follows all its predecessors) #
+def topological_order(num_tasks, task_list):
+	num_pred = [0] * num_tasks # The number of predecessors of each task which are not in the order yet
+	for i in range(num_tasks):
+		for j in task_list.succ(i):
+			num_pred[j] += 1
+
+	order = [i for i in range(num_tasks) if num_pred[i] == 0]
+	k = 0
+	while k < len(order):
+		for j in task_list.succ(order[k]):
+			num_pred[j] -= 1
+			if num_pred[j] == 0:
+				order.append(j)
+		k += 1
+
+	if len(order) != num_tasks:
+		raise RuntimeError('The graph includes cyclic data dependencies')
+
+	return order
+
+# Calculate the upward rank (bottom level) of each task: the length of the longest path from the task #
+# to an exit task, including the execution time of the task #
+# The ranks are calculated in a single pass over the tasks in the reverse topological order #
+def upward_rank(num_tasks, task_list):
+	rank = [0] * num_tasks
+
+	for i in reversed(topological_order(num_tasks, task_list)):
+		longest = 0
+		for j in task_list.succ(i):
+			if rank[j] > longest:
+				longest = rank[j]
+		rank[i] = task_list.et[i] + longest
+
+	return rank
+
+# Show the data dependencies of the tasks #
+def print_dependencies(num_tasks, task_list):
+	for i in range(num_tasks):
+		pred = task_list.pred(i)
+
+		if len(pred) == 0:
+			print('T' + str(i))
+		else:
+			dep_list = 'T' + str(i) + ' --> T' + str(pred[0])
+
+			for j in range(len(pred))[1::]:
+				dep_list += ', T' + str(pred[j])
+
+			print(dep_list)
+
 # Export the scheduling of the threads to the files #
-def export_scheduling(num_threads, queue, alg_name, par1, par2):
+# out_dir: The folder of the output files #
+def export_scheduling(num_threads, result, alg_name, par1, par2, out_dir = "output"):
 	# Create the output file #
 	if alg_name == 'bfs':
-		file = open("output/bfs_scheduling.dat", "w")
+		file = open(out_dir + "/bfs_scheduling.dat", "w")
 	elif alg_name == 'lpt':
-		file = open("output/lpt_scheduling.dat", "w")
+		file = open(out_dir + "/lpt_scheduling.dat", "w")
 	elif alg_name == 'spt':
-		file = open("output/spt_scheduling.dat", "w")
+		file = open(out_dir + "/spt_scheduling.dat", "w")
 	elif alg_name == 'lnsnl':
-		file = open("output/lnsnl_scheduling.dat", "w")
+		file = open(out_dir + "/lnsnl_scheduling.dat", "w")
+	elif alg_name == 'rank':
+		file = open(out_dir + "/rank_scheduling.dat", "w")
 	elif alg_name == 'new':
-		file = open("output/new_" + par1 + "_" + par2 + "_scheduling.dat", "w")
+		file = open(out_dir + "/new_" + par1 + "_" + par2 + "_scheduling.dat", "w")
 
 	for i in range(num_threads):
 		# Write the name of the thread #
 		file.write('Thr' + str(i) + ':\n')
 
 		# Write the name of each task executed by the thread #
-		for j in range(len(queue[i])):
-			file.write('T' + str(queue[i][j].t_id) + "\n")
+		for j in range(len(result.queue[i])):
+			file.write('T' + str(result.queue[i][j]) + "\n")
 
 		if i != num_threads - 1:
 			file.write("\n")
 
 	file.close()
 
+# Load the Arial font (the default font of PIL is used if it is not installed) #
+def load_font(ImageFont, size):
+	try:
+		return ImageFont.truetype('arial.ttf', size)
+	except OSError:
+		return ImageFont.load_default()
+
 # Draw the graphical result #
-def graphic_result(num_threads, queue, t, alg_name, par1, par2):
+def graphic_result(num_threads, result, t, alg_name, par1, par2, out_dir = "output"):
+	# The PIL module is only needed for the graphical output #
+	from PIL import Image, ImageDraw, ImageFont
+
 	# Specify the width of the window, the height of the queues, and the height of the window #
 	win_width = num_threads * 100 + (num_threads - 1) * 10 + 100 # The width of the window
 	queue_height = t # The height of the queues
@@ -125,8 +154,8 @@ def graphic_result(num_threads, queue, t, alg_name, par1, par2):
 
 	# Draw the name and contents of each thread #
 	l_point = 50
-	font_thr_id = ImageFont.truetype(r'C:\Users\System-Pc\Desktop\arial.ttf', 20) 
-	font_task_id = ImageFont.truetype(r'C:\Users\System-Pc\Desktop\arial.ttf', 15)
+	font_thr_id = load_font(ImageFont, 20)
+	font_task_id = load_font(ImageFont, 15)
 
 	for i in range(num_threads):
 		# Draw the name of the thread #
@@ -136,23 +165,28 @@ def graphic_result(num_threads, queue, t, alg_name, par1, par2):
 		# Draw the main box of the thread #
 		draw.rectangle((l_point, 50, l_point + 100, queue_height * 10 + 60), fill = (255, 255, 255), outline = (0, 0, 0), width = 2)
 
-		for j in range(len(queue[i])):
+		for t_id in result.queue[i]:
+			s_time = result.s_time[t_id]
+			f_time = result.f_time[t_id]
+
 			# Draw the box related to the execution of each task #
-			draw.rectangle((l_point, queue[i][j].s_time * 10 + 50, l_point + 100, queue[i][j].f_time * 10 + 50), fill = (0, 255, 0), outline = (0, 0, 0), width = 1)
+			draw.rectangle((l_point, s_time * 10 + 50, l_point + 100, f_time * 10 + 50), fill = (0, 255, 0), outline = (0, 0, 0), width = 1)
 			# Draw the name of the task #
-			task_id = 'T' + str(queue[i][j].t_id)
-			draw.text((l_point + 40, (queue[i][j].s_time + (queue[i][j].f_time - queue[i][j].s_time) // 2) * 10 + 45), task_id, fill = "black", font = font_task_id, align = "center")
+			task_id = 'T' + str(t_id)
+			draw.text((l_point + 40, (s_time + (f_time - s_time) // 2) * 10 + 45), task_id, fill = "black", font = font_task_id, align = "center")
 
 		l_point += 110
 
 	# Create the output file #
 	if alg_name == 'bfs':
-		im.save('output/bfs.jpg', quality = 300)
+		im.save(out_dir + '/bfs.jpg', quality = 300)
 	elif alg_name == 'lpt':
-		im.save('output/lpt.jpg', quality = 300)
+		im.save(out_dir + '/lpt.jpg', quality = 300)
 	elif alg_name == 'spt':
-		im.save('output/spt.jpg', quality = 300)
+		im.save(out_dir + '/spt.jpg', quality = 300)
 	elif alg_name == 'lnsnl':
-		im.save('output/lnsnl.jpg', quality = 300)
+		im.save(out_dir + '/lnsnl.jpg', quality = 300)
+	elif alg_name == 'rank':
+		im.save(out_dir + '/rank.jpg', quality = 300)
 	elif alg_name == 'new':
-		im.save('output/new_' + par1 + '_' + par2 + '.jpg', quality = 300)
+		im.save(out_dir + '/new_' + par1 + '_' + par2 + '.jpg', quality = 300)
@@ -0,0 +1,258 @@
+ #**************************************************************************
+ # gantt.py
+ #
+ # Draw the scheduling of the threads as a Gantt chart that fits in a
+ # fixed pixel budget, regardless of the number of tasks and the time
+ # scale (e.g., the benchmarks with execution times of 10^9 cycles).
+ # The time is mapped onto the width of the chart; the tasks that are
+ # narrower than a few pixels are aggregated into the busy fraction of
+ # each pixel, so the size of the output and the drawing time only
+ # depend on the pixel budget. The chart is written as an SVG file or
+ # as tiled PNG files (one tile is drawn at a time).
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import math
+from array import array
+from xml.sax.saxutils import escape
+
+# The margins of the chart (the names of the threads, the title, and the time axis) #
+margin_left = 60
+margin_top = 30
+margin_bottom = 30
+margin_right = 20
+
+levels = 8 # The number of shades of the aggregated tasks
+
+# Return the fill color of a busy fraction (white: idle, green: busy, as the boxes of func.graphic_result) #
+def shade(busy):
+	return (int(255 * (1 - busy)), 255 - int(100 * busy), int(255 * (1 - busy)))
+
+# Return the ticks of the time axis (about num_ticks multiples of 1, 2, or 5 times a power of 10) #
+def ticks(t, num_ticks = 10):
+	if t <= 0:
+		return [0]
+
+	step = 10 ** math.floor(math.log10(t / num_ticks))
+	for factor in [1, 2, 5, 10]:
+		if t / (step * factor) <= num_ticks:
+			step *= factor
+			break
+
+	return [k * step for k in range(int(t // step) + 1)]
+
+# Compute the elements of the chart #
+# The elements are (x0, x1, task ID, busy fraction), where x0 and x1 are in pixels from the start of the time #
+# axis; a task of at least min_width pixels is an element with its ID, while the narrower tasks are aggregated into #
+# elements without an ID (None), whose busy fraction is quantized to the levels #
+# Return the elements of each thread #
+def elements(num_threads, thread, s_time, f_time, t, width, min_width = 3):
+	scale = width / t if t > 0 else 0 # Pixels per time unit
+	coverage = array('d', [0]) * (num_threads * width) # The busy time of each pixel (in pixels)
+	tasks = [[] for i in range(num_threads)] # The elements of the wide tasks
+
+	for t_id in range(len(thread)):
+		thr = thread[t_id]
+		if thr == None or s_time[t_id] == None or f_time[t_id] == None: # Not mapped (e.g., a partial result)
+			continue
+
+		x0 = s_time[t_id] * scale
+		x1 = f_time[t_id] * scale
+
+		if x1 - x0 >= min_width:
+			tasks[thr].append((x0, x1, t_id, 1))
+		else:
+			# Add the busy time of the task to the pixels it overlaps #
+			base = thr * width
+			for px in range(int(x0), min(int(x1), width - 1) + 1):
+				overlap = min(x1, px + 1) - max(x0, px)
+				if overlap > 0:
+					coverage[base + px] += overlap
+
+	# Merge the consecutive pixels of the same level #
+	result = []
+	for thr in range(num_threads):
+		items = []
+		base = thr * width
+		start = 0
+		prev = 0
+		for px in range(width + 1):
+			level = min(levels, math.ceil(coverage[base + px] * levels - 1e-9)) if px < width else 0
+			if level != prev:
+				if prev > 0:
+					items.append((start, px, None, prev / levels))
+				start = px
+				prev = level
+
+		result.append(items + sorted(tasks[thr], key = lambda item: item[0]))
+
+	return result
+
+# Return the drawing primitives of a thread: ('rect', x0, y0, x1, y1, fill, outline) and ('text', x, y, text) #
+def thread_shapes(items, thr, width, row_height, label_width):
+	y0 = margin_top + thr * row_height
+	y1 = y0 + row_height
+
+	shapes = [('rect', margin_left, y0, margin_left + width, y1, (255, 255, 255), (0, 0, 0))]
+	if row_height >= 10:
+		shapes.append(('text', 5, y0 + (row_height - 10) // 2, 'Thr' + str(thr)))
+
+	for x0, x1, t_id, busy in items:
+		if t_id == None:
+			shapes.append(('rect', margin_left + x0, y0 + 1, margin_left + x1, y1 - 1, shade(busy), None))
+		else:
+			shapes.append(('rect', margin_left + x0, y0 + 1, margin_left + x1, y1 - 1, shade(busy), (0, 0, 0)))
+
+			# The name of the task (if it fits in the box) #
+			label = 'T' + str(t_id)
+			if x1 - x0 >= label_width * len(label) and row_height >= 10:
+				shapes.append(('text', margin_left + (x0 + x1) / 2 - label_width * len(label) / 2, y0 + (row_height - 10) // 2, label))
+
+	return shapes
+
+# Return the drawing primitives of the title and the time axis #
+def frame_shapes(num_threads, t, width, row_height, title):
+	shapes = []
+	if title != '':
+		shapes.append(('text', margin_left, 8, title))
+
+	y = margin_top + num_threads * row_height
+	for tick in ticks(t, max(1, width // 100)):
+		x = margin_left + (tick * width / t if t > 0 else 0)
+		shapes.append(('rect', x, y, x, y + 5, None, (0, 0, 0)))
+		shapes.append(('text', x + 2, y + 8, format(tick, 'g')))
+
+	return shapes
+
+# Write the chart as an SVG file (the threads are written one by one) #
+def write_svg(path, num_threads, rows, t, width, row_height, title, label_width):
+	total_width = margin_left + width + margin_right
+	total_height = margin_top + num_threads * row_height + margin_bottom
+
+	def color(value):
+		return 'none' if value == None else 'rgb(%d,%d,%d)' % value
+
+	with open(path, 'w') as file:
+		file.write('<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d" font-family="sans-serif" font-size="10">\n' % (total_width, total_height))
+		file.write('<rect width="100%" height="100%" fill="white"/>\n')
+
+		for thr in range(num_threads + 1):
+			if thr < num_threads:
+				shapes = thread_shapes(rows[thr], thr, width, row_height, label_width)
+			else:
+				shapes = frame_shapes(num_threads, t, width, row_height, title)
+
+			for shape in shapes:
+				if shape[0] == 'rect':
+					kind, x0, y0, x1, y1, fill, outline = shape
+					file.write('<rect x="%.2f" y="%d" width="%.2f" height="%d" fill="%s" stroke="%s" stroke-width="%s"/>\n' % (x0, y0, x1 - x0, y1 - y0,
+						color(fill), color(outline), '0.5' if outline != None else '0'))
+				else:
+					kind, x, y, text = shape
+					file.write('<text x="%.2f" y="%d" dominant-baseline="hanging">%s</text>\n' % (x, y, escape(text)))
+
+		file.write('</svg>\n')
+
+	return [path]
+
+# Write the chart as PNG tiles of tile_size pixels (path_<row>_<column>.png, or path if the chart fits in a tile) #
+def write_png(path, num_threads, rows, t, width, row_height, title, label_width, tile_size):
+	# The PIL module is only needed for the PNG output #
+	from PIL import Image, ImageDraw, ImageFont
+
+	font = ImageFont.load_default()
+	total_width = margin_left + width + margin_right
+	total_height = margin_top + num_threads * row_height + margin_bottom
+	num_cols = (total_width + tile_size - 1) // tile_size
+	num_rows = (total_height + tile_size - 1) // tile_size
+	frame = frame_shapes(num_threads, t, width, row_height, title)
+
+	paths = []
+	for r in range(num_rows):
+		top = r * tile_size
+		bottom = min(top + tile_size, total_height)
+
+		# The shapes of the threads in the row of tiles #
+		first = max(0, (top - margin_top) // row_height)
+		last = min(num_threads, (bottom - margin_top) // row_height + 1)
+		shapes = frame[:]
+		for thr in range(first, last):
+			shapes += thread_shapes(rows[thr], thr, width, row_height, label_width)
+
+		for c in range(num_cols):
+			left = c * tile_size
+			right = min(left + tile_size, total_width)
+
+			im = Image.new('RGB', (right - left, bottom - top), (255, 255, 255))
+			draw = ImageDraw.Draw(im)
+
+			for shape in shapes:
+				if shape[0] == 'rect':
+					kind, x0, y0, x1, y1, fill, outline = shape
+					if x1 < left or x0 > right or y1 < top or y0 > bottom:
+						continue
+					draw.rectangle((round(x0) - left, y0 - top, max(round(x0), round(x1) - 1) - left, y1 - 1 - top), fill = fill, outline = outline)
+				else:
+					kind, x, y, text = shape
+					if x > right or y > bottom or y + 12 < top:
+						continue
+					draw.text((x - left, y - top), text, fill = "black", font = font)
+
+			if num_rows == 1 and num_cols == 1:
+				tile_path = path
+			else:
+				tile_path = os.path.splitext(path)[0] + '_' + str(r) + '_' + str(c) + '.png'
+			im.save(tile_path)
+			paths.append(tile_path)
+
+	return paths
+
+# Draw the Gantt chart of a schedule #
+# thread, s_time, f_time: The thread, start time, and finish time of each task (e.g., of engine.schedule or store.schedule) #
+# width: The width of the time axis (pixels); row_height: The height of each thread (pixels) #
+# min_width: The tasks narrower than min_width pixels are aggregated #
+# The format is taken from the extension of the path (.svg or .png) #
+# t: The length of the time axis; by default, the latest finish time of the mapped tasks (an empty result is drawn as #
+# an empty chart) #
+# Return the paths of the written files #
+def render(path, num_threads, thread, s_time, f_time, t = None, width = 2000, row_height = 20, min_width = 3, title = '', tile_size = 4096):
+	label_width = 6 # The width of a character of the names of the tasks (pixels)
+
+	if t == None:
+		t = max((f_time[t_id] for t_id in range(len(thread)) if thread[t_id] != None and f_time[t_id] != None), default = 0)
+	elif t < 0:
+		raise ValueError('The length of the time axis of the Gantt chart is negative: ' + str(t))
+
+	rows = elements(num_threads, thread, s_time, f_time, t, width, min_width)
+
+	if path.endswith('.svg'):
+		return write_svg(path, num_threads, rows, t, width, row_height, title, label_width)
+	elif path.endswith('.png'):
+		return write_png(path, num_threads, rows, t, width, row_height, title, label_width, tile_size)
+
+	raise ValueError('Unknown format of the Gantt chart: ' + path)
+
+# Draw the Gantt chart of the result of a method (see simulator.run) #
+def render_result(path, num_threads, result, **options):
+	return render(path, num_threads, result.thread, result.s_time, result.f_time, result.t, **options)
+
+# Draw the Gantt chart of a run of a results store (see store.py) #
+def render_run(path, results_store, run_id, **options):
+	runs = results_store.load('runs')
+	thread, s_time, f_time = results_store.schedule(run_id)
+
+	options.setdefault('title', results_store.schema['methods'][runs['method'][run_id]] + ' (run ' + str(run_id) + ')')
+	return render(path, runs['num_threads'][run_id], thread, s_time, f_time, runs['response_time'][run_id], **options)
@@ -19,79 +19,242 @@
  # See the License for the specific language governing permissions and
  # limitations under the License.
  #**************************************************************************
+import os
+import math
 import random
+import reader
+import compiled
+from array import array
 
 # Define the task class #
+# A task is a lightweight view of a task of the graph, which keeps only the graph and the task ID #
+# (the attributes are read from and written to the arrays of the graph) #
 class task:
-	def __init__(self, t_id, et, dep, rt, status, s_time, f_time):
+	__slots__ = ('graph', 't_id')
+
+	def __init__(self, graph, t_id):
+		self.graph = graph # The graph of the task
 		self.t_id = t_id # Task ID
-		self.et = et # Execution time
-		self.dep = dep # The tasks list corresponding to input data dependency
-		self.rt = rt # Response time of the task (only used in the new algorithms)
-		self.status = status # s: Started, f : Finished
-		self.s_time = s_time # Start time of the execution
-		self.f_time = f_time # Finish time of the execution
 
-# Generate the graph based on a predefined structure #
-def graph_predef(bench_name):
-	num_tasks = 0
-	task_list = []
+	# Execution time #
+	@property
+	def et(self):
+		return self.graph.et[self.t_id]
+
+	@et.setter
+	def et(self, value):
+		self.graph.et[self.t_id] = value
+
+	# Response time of the task (only used in the new algorithms) #
+	@property
+	def rt(self):
+		return self.graph.rt[self.t_id]
+
+	@rt.setter
+	def rt(self, value):
+		self.graph.rt[self.t_id] = value
+
+	# The tasks list corresponding to input data dependency #
+	@property
+	def dep(self):
+		return [task(self.graph, i) for i in self.graph.pred(self.t_id)]
+
+	# The IDs of the tasks corresponding to output data dependency #
+	@property
+	def succ(self):
+		return self.graph.succ(self.t_id)
+
+# Define the graph class #
+# The graph is stored in typed arrays: the execution time and response time of each task, and #
+# the data dependencies in the compressed sparse row (CSR) format, where the predecessors of #
+# task i are pred_idx[pred_ptr[i]:pred_ptr[i + 1]] (similarly for the successors) #
+# The graph can be used as the list of tasks (len(graph), graph[i], and iteration), #
+# where each item is a task view #
+class graph:
+	def __init__(self, num_tasks, pred_ptr, pred_idx, succ_ptr, succ_idx, sample_ptr = None, sample_data = None):
+		self.num_tasks = num_tasks # Number of tasks
+		self.et = array('q', [0]) * num_tasks # Execution time of each task
+		self.rt = array('d', [0.0]) * num_tasks # Response time of each task
+		self.pred_ptr = pred_ptr # The offsets of the predecessors of each task
+		self.pred_idx = pred_idx # The task IDs corresponding to input data dependency
+		self.succ_ptr = succ_ptr # The offsets of the successors of each task
+		self.succ_idx = succ_idx # The task IDs corresponding to output data dependency
+		self.sample_ptr = sample_ptr # The offsets of the measured execution times of each task (only for the benchmarks)
+		self.sample_data = sample_data # The measured execution times of the tasks (only for the benchmarks)
+		self.source = None # The compiled file, if the arrays are mapped from it (see compiled.py)
+
+	# Return the IDs of the predecessors of a task #
+	def pred(self, t_id):
+		return self.pred_idx[self.pred_ptr[t_id]:self.pred_ptr[t_id + 1]]
+
+	# Return the IDs of the successors of a task #
+	def succ(self, t_id):
+		return self.succ_idx[self.succ_ptr[t_id]:self.succ_ptr[t_id + 1]]
+
+	# Return the measured execution times of a task #
+	def et_samples(self, t_id):
+		return self.sample_data[self.sample_ptr[t_id]:self.sample_ptr[t_id + 1]]
+
+	def __len__(self):
+		return self.num_tasks
+
+	def __getitem__(self, t_id):
+		if t_id < 0 or t_id >= self.num_tasks:
+			raise IndexError('task ID out of range')
+		return task(self, t_id)
+
+	def __iter__(self):
+		for i in range(self.num_tasks):
+			yield task(self, i)
+
+	# A mapped graph is pickled (e.g., for the worker processes) as the path of its compiled file, #
+	# so the processes share the pages of the file instead of copying the arrays #
+	def __getstate__(self):
+		state = self.__dict__.copy()
+
+		if self.source != None:
+			for name, code in compiled.fields:
+				del state[name]
+
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
 
-	# Open the file and read the contents #
-	file = open("benchmark/" + bench_name + "_tdg_modified.dot", "r")
-	lines = file.readlines()
-	file.close()
+		if self.source != None:
+			num_tasks, arrays = compiled.load(self.source)
+			self.__dict__.update(arrays)
 
-	# Fetch the number of tasks #
-	for line in lines:
-		line_arr = line.strip().split("->")
+# Build the graph from the data dependencies (src[k] -> dst[k]) #
+def graph_edges(num_tasks, src, dst):
+	pred_ptr = array('q', [0]) * (num_tasks + 1)
+	pred_idx = array('i', [0]) * len(src)
+	succ_ptr = array('q', [0]) * (num_tasks + 1)
 
-		for i in range(len(line_arr)):
-			if int(line_arr[i]) > num_tasks:
-				num_tasks = int(line_arr[i])
+	# Place the predecessors of each task in the order of the dependencies #
+	for j in dst:
+		pred_ptr[j + 1] += 1
+	for i in range(num_tasks):
+		pred_ptr[i + 1] += pred_ptr[i]
 
-	num_tasks += 1
+	pos = pred_ptr[:-1] # The next free position of each task
+	for k in range(len(src)):
+		j = dst[k]
+		pred_idx[pos[j]] = src[k]
+		pos[j] += 1
 
-	# Initialize the list of tasks #
+	# Reverse the data dependencies in the order of the task IDs (a repeated dependency is considered once) #
+	succ_cnt = array('q', [0]) * num_tasks # The number of successors of each task
+	last = array('q', [-1]) * num_tasks # The last successor of each task
+	for j in range(num_tasks):
+		for i in pred_idx[pred_ptr[j]:pred_ptr[j + 1]]:
+			if last[i] != j:
+				last[i] = j
+				succ_cnt[i] += 1
 	for i in range(num_tasks):
-		task_list.append(task(i, None, [], None, None, None, None))
+		succ_ptr[i + 1] = succ_ptr[i] + succ_cnt[i]
+
+	succ_idx = array('i', [0]) * succ_ptr[num_tasks]
+	pos = succ_ptr[:-1]
+	last = array('q', [-1]) * num_tasks
+	for j in range(num_tasks):
+		for i in pred_idx[pred_ptr[j]:pred_ptr[j + 1]]:
+			if last[i] == j:
+				# The dependency is already added #
+				continue
+			succ_idx[pos[i]] = j
+			pos[i] += 1
+			last[i] = j
+
+	return graph(num_tasks, pred_ptr, pred_idx, succ_ptr, succ_idx)
+
+# Map the compiled file of a graph into memory #
+def graph_load(path):
+	num_tasks, arrays = compiled.load(path)
+
+	g = graph(num_tasks, arrays['pred_ptr'], arrays['pred_idx'], arrays['succ_ptr'], arrays['succ_idx'], arrays['sample_ptr'], arrays['sample_data'])
+	g.source = os.path.abspath(path)
+
+	return g
+
+# Parse the DOT file and the JSON file of a benchmark #
+# tdg_num: The task graph (cluster) of the DOT file (see reader.read_dot) #
+def parse_bench(dot_path, json_path, tdg_num = 0):
+	# Read the task graphs of the file in a single pass #
+	tdg_list = reader.read_dot(dot_path)
+	if tdg_num >= len(tdg_list):
+		raise ValueError('The task graph ' + str(tdg_num) + ' is not found in ' + dot_path)
+
+	name, ids, src, dst = tdg_list[tdg_num]
+	num_tasks = len(ids)
+	g = graph_edges(num_tasks, src, dst)
+
+	# Store the measured execution times of the tasks (if the json file exists) #
+	g.sample_ptr = array('q', [0]) * (num_tasks + 1)
+	g.sample_data = array('q')
+	if os.path.exists(json_path):
+		samples = reader.read_et_samples(json_path, num_tasks, ids)
+		for i in range(num_tasks):
+			g.sample_data.extend(samples[i])
+			g.sample_ptr[i + 1] = len(g.sample_data)
+
+	return g
 
-	# Specify the data dependencies #
-	for line in lines:
-		line_arr = line.strip().split("->")
+# Generate the graph based on a predefined structure #
+# The DOT file generated by the compiler (bench_tdg.dot) is used, or the simplified one (bench_tdg_modified.dot) #
+# if it does not exist; tdg_num selects one of the task graphs (clusters) of the file #
+# dot_path, json_path: The DOT and JSON files to be used instead of the files of the benchmark folder #
+# (e.g., one of the JSON files measured with a different number of threads) #
+# The compiled graph is used if the DOT and JSON files have not been changed since it was built #
+def graph_predef(bench_name, tdg_num = 0, dot_path = None, json_path = None):
+	if dot_path == None:
+		dot_path = reader.bench_path(bench_name, "_tdg.dot")
+		if not os.path.exists(dot_path):
+			dot_path = reader.bench_path(bench_name, "_tdg_modified.dot")
+	if json_path == None:
+		json_path = reader.bench_path(bench_name, "_json.json")
+	path = compiled.bench_file(bench_name + '_' + str(tdg_num), [dot_path, json_path])
+
+	if os.path.exists(path):
+		g = graph_load(path)
+	else:
+		g = parse_bench(dot_path, json_path, tdg_num)
 
-		if len(line_arr) == 2:
-			task_list[int(line_arr[1])].dep.append(task_list[int(line_arr[0])])
+		# Build the compiled graph (it is not stored if the folder is not writable) #
+		try:
+			compiled.write(path, g.num_tasks, g.__dict__)
+			g = graph_load(path)
+		except OSError:
+			pass
 
-	return num_tasks, task_list
+	return g.num_tasks, g
 
 # Generate the graph randomly #
-def graph_rand(num_tasks, dep_pro, num_dep_level):
-	# Initialize the list of tasks #
-	task_list = []
-	for i in range(num_tasks):
-		task_list.append(task(i, None, [], None, None, None, None))
+# rng: The random number generator (e.g., random.Random(seed) for an independent stream) #
+def graph_rand(num_tasks, dep_pro, num_dep_level, rng = random):
+	src = array('i') # The source task of each data dependency
+	dst = array('i') # The destination task of each data dependency
 
 	# Determine the selected list of tasks #
 	sel_list = []
 	for i in range(num_tasks)[1::]:
-		if random.random() <= dep_pro:
-			sel_list.append(task_list[i])
+		if rng.random() <= dep_pro:
+			sel_list.append(i)
 
 	# Specify data dependencies between the tasks #
+	# The selected tasks without any data dependencies always follow the ones with a dependency, #
+	# so they start from the position first_non_dep in the selected list #
 	index = 0 # The pivot
 	num_curr_dep = 0 # The number of current dependencies
+	first_non_dep = 0 # The position of the first non-dependent task in the selected list
 
 	while num_curr_dep < len(sel_list) - 1:
-		non_dep_list = [] # The non-dependent tasks in the selected list
-		for i in range(len(sel_list))[index + 1::]:
-			if len(sel_list[i].dep) == 0:
-				non_dep_list.append(sel_list[i])
-
 		count = 0
-		for i in range(len(non_dep_list)):
+		for i in range(max(index + 1, first_non_dep), len(sel_list)):
 			if count < num_dep_level:
-				non_dep_list[i].dep.append(sel_list[index])
+				src.append(sel_list[index])
+				dst.append(sel_list[i])
+				first_non_dep = i + 1
 				count += 1
 				num_curr_dep += 1
 			else:
@@ -99,81 +262,225 @@ def graph_rand(num_tasks, dep_pro, num_dep_level):
 
 		index += 1
 
-	return task_list
+	return graph_edges(num_tasks, src, dst)
 
-# Specify execution time of the tasks, as well as calculate the deadline of the system #
-# and response time of the tasks #
-def specify_et(graph_type, num_tasks, task_list, bench_name, et_min, et_max, et_type, itr, dl_min_prob, dl_max_prob):
-	if graph_type == 'y':
-		# Determine an execution time for each task based on the json file #
-		tdg_st_line_num = [] # The starting line number of each task
+# Generate a layered random graph #
+# The tasks are placed in layers of width tasks, and each task (except the ones of the first layer) #
+# depends on 1 to num_dep random tasks of the previous layer #
+def graph_layered(num_tasks, width, num_dep, rng = random):
+	if width <= 0:
+		raise ValueError('The width of the layers must be positive: ' + str(width))
+	if num_dep <= 0 and num_tasks > width:
+		raise ValueError('The maximum number of dependencies of a task must be positive: ' + str(num_dep))
 
-		# Read the json file as lines #
-		with open("benchmark/" + bench_name + "_json.json") as f1:
-			lines_json = f1.readlines() # Content of the file
-			f1.close() # Close the file
+	src = array('i') # The source task of each data dependency
+	dst = array('i') # The destination task of each data dependency
 
-		# Traverse the file to find the starting line number of each task #
-		for i in range(num_tasks):
-			for j in range(len(lines_json)):
-				# Check whether the task number (i) is found in the current line #
-				if (lines_json[j].find('"' + str(i) + '":') != -1):
-					tdg_st_line_num.append(j) # Set the starting line number
+	for j in range(width, num_tasks):
+		layer_start = j - j % width # The first task of the layer
+		num_pred = rng.randint(1, min(num_dep, width))
 
-		# Determine execution time for each task #
-		for i in range(num_tasks):
-			exe_list = [] # The list of execution times
-			st_line_num = tdg_st_line_num[i] # The starting line number of the task
+		for i in sorted(rng.sample(range(layer_start - width, layer_start), num_pred)):
+			src.append(i)
+			dst.append(j)
 
-			# Specify the finishing line number of the task #
-			if i != num_tasks - 1:
-				fn_line_num = tdg_st_line_num[i + 1] - 1
-			else:
-				fn_line_num = len(lines_json) - 1
+	return graph_edges(num_tasks, src, dst)
+
+# Generate a fork-join graph #
+# Each stage includes a fork task, width parallel tasks, and a join task (which is the fork task of the next stage) #
+def graph_fork_join(num_tasks, width):
+	if width < 0:
+		raise ValueError('The width of the stages must not be negative: ' + str(width))
+
+	src = array('i') # The source task of each data dependency
+	dst = array('i') # The destination task of each data dependency
+
+	fork = 0 # The fork task of the current stage
+	while fork < num_tasks - 1:
+		join = min(fork + width + 1, num_tasks - 1) # The join task of the stage
+
+		for i in range(fork + 1, join):
+			src.append(fork)
+			dst.append(i)
+		for i in range(fork + 1, join):
+			src.append(i)
+			dst.append(join)
+
+		# The stage without any parallel tasks #
+		if join == fork + 1:
+			src.append(fork)
+			dst.append(join)
+
+		fork = join
+
+	return graph_edges(num_tasks, src, dst)
+
+# Generate a series-parallel graph #
+# Starting from a data dependency between the source task (0) and the sink task (1), each new task is added #
+# to a random data dependency, either in parallel (with the probability par_pro) or in series #
+def graph_series_parallel(num_tasks, par_pro, rng = random):
+	src = array('i') # The source task of each data dependency
+	dst = array('i') # The destination task of each data dependency
+
+	if num_tasks >= 2:
+		src.append(0)
+		dst.append(1)
+
+	for j in range(2, num_tasks):
+		k = rng.randrange(len(src))
+		v = dst[k]
+
+		if rng.random() < par_pro:
+			# Add a parallel path (src[k] -> j -> v) beside the data dependency #
+			src.append(src[k])
+			dst.append(j)
+		else:
+			# Split the data dependency (src[k] -> j -> v) #
+			dst[k] = j
+		src.append(j)
+		dst.append(v)
+
+	return graph_edges(num_tasks, src, dst)
+
+# Generate a stencil graph #
+# The tasks are placed in steps of width tasks, and each task depends on the tasks of the previous step #
+# within the radius (e.g., a 1D heat equation) #
+def graph_stencil(num_tasks, width, radius = 1):
+	if width <= 0:
+		raise ValueError('The width of the steps must be positive: ' + str(width))
+	if radius < 0:
+		raise ValueError('The radius of the stencil must not be negative: ' + str(radius))
+
+	src = array('i') # The source task of each data dependency
+	dst = array('i') # The destination task of each data dependency
 
-			# Find execution total times in the json and add it to the list #
-			for j in range (st_line_num, fn_line_num):
-				# Check whether execution total time exists in the current line #
-				if (lines_json[j].find('execution_total_time') != -1):
-					sp_line = lines_json[j].split(':') # Split the line
-					et = int(sp_line[1].strip()) # Fetch the execution total time from the line
-					exe_list.append(et) # Add the execution time to the list
+	for j in range(width, num_tasks):
+		col = j % width
+		for i in range(j - width - min(col, radius), j - width + min(width - 1 - col, radius) + 1):
+			src.append(i)
+			dst.append(j)
+
+	return graph_edges(num_tasks, src, dst)
+
+# Generate a wavefront graph #
+# The tasks are placed in rows of width tasks, and each task depends on its upper and left neighbours #
+def graph_wavefront(num_tasks, width):
+	if width <= 0:
+		raise ValueError('The width of the rows must be positive: ' + str(width))
+
+	src = array('i') # The source task of each data dependency
+	dst = array('i') # The destination task of each data dependency
+
+	for j in range(1, num_tasks):
+		if j >= width:
+			src.append(j - width)
+			dst.append(j)
+		if j % width != 0:
+			src.append(j - 1)
+			dst.append(j)
+
+	return graph_edges(num_tasks, src, dst)
+
+# Generate an Erdos-Renyi graph on the order of the task IDs #
+# Each pair of tasks (i < j) has a data dependency (i -> j) with the probability edge_pro; the pairs without #
+# a dependency are skipped at once (with a geometric distribution), so the time is linear in the size of the graph #
+def graph_erdos_renyi(num_tasks, edge_pro, rng = random):
+	src = array('i') # The source task of each data dependency
+	dst = array('i') # The destination task of each data dependency
+
+	if edge_pro >= 1:
+		for j in range(num_tasks):
+			for i in range(j):
+				src.append(i)
+				dst.append(j)
+	elif edge_pro > 0:
+		log_q = math.log(1 - edge_pro)
+		i = -1
+		j = 1
+		while j < num_tasks:
+			i += 1 + int(math.log(1 - rng.random()) / log_q)
+			while i >= j and j < num_tasks:
+				i -= j
+				j += 1
+			if j < num_tasks:
+				src.append(i)
+				dst.append(j)
+
+	return graph_edges(num_tasks, src, dst)
+
+# The families of the generated graphs #
+families = ['layered', 'fork_join', 'series_parallel', 'stencil', 'wavefront', 'erdos_renyi']
+
+# Generate a graph of a family #
+# width: The width of the layers, stages, steps, or rows #
+# num_dep: The maximum number of dependencies of a task (layered) or the radius (stencil) #
+# pro: The probability of a data dependency (erdos_renyi) or a parallel composition (series_parallel) #
+def graph_family(family, num_tasks, width = 10, num_dep = 2, pro = 0.5, rng = random):
+	if family == 'layered':
+		return graph_layered(num_tasks, width, num_dep, rng)
+	elif family == 'fork_join':
+		return graph_fork_join(num_tasks, width)
+	elif family == 'series_parallel':
+		return graph_series_parallel(num_tasks, pro, rng)
+	elif family == 'stencil':
+		return graph_stencil(num_tasks, width, num_dep)
+	elif family == 'wavefront':
+		return graph_wavefront(num_tasks, width)
+	elif family == 'erdos_renyi':
+		return graph_erdos_renyi(num_tasks, pro, rng)
+
+	raise ValueError('Unknown graph family: ' + family)
+
+# Specify execution time of the tasks, as well as calculate the deadline of the system #
+# and response time of the tasks (stored in the arrays of the graph) #
+def specify_et(graph_type, num_tasks, task_list, bench_name, et_min, et_max, et_type, itr, dl_min_prob, dl_max_prob, rng = random):
+	if graph_type == 'y':
+		# Read the execution times of the tasks from the json file in a single pass #
+		# (unless they are already stored in the graph) #
+		if task_list.sample_ptr == None:
+			samples = reader.read_et_samples(reader.bench_path(bench_name, "_json.json"), num_tasks)
+		else:
+			samples = [task_list.et_samples(i) for i in range(num_tasks)]
+
+		# Determine execution time for each task #
+		for i in range(num_tasks):
+			exe_list = samples[i] # The list of execution times
+			if len(exe_list) == 0:
+				raise ValueError('The execution time of task ' + str(i) + ' is not found in the json file')
 
 			# Determine the execution time based on the minimum value #
 			if et_type == 'min':
-				task_list[i].et = min(exe_list)
+				task_list.et[i] = min(exe_list)
 			# Determine the execution time based on the average value #
 			elif et_type == 'avg':
-				task_list[i].et = round(sum(exe_list) / len(exe_list))
+				task_list.et[i] = round(sum(exe_list) / len(exe_list))
 			# Determine the execution time based on the maximum value #
 			elif et_type == 'max':
-				task_list[i].et = max(exe_list)
+				task_list.et[i] = max(exe_list)
 	else:
 		# Specify an execution time for each task based on a random procedure #
 		for i in range(num_tasks):
 			# Generate the random values #
 			ran_list = []
 			for j in range(itr):
-				ran_list.append(random.randint(et_min, et_max))
+				ran_list.append(rng.randint(et_min, et_max))
 
 			# Determine the execution time based on the minimum value #
 			if et_type == 'min':
-				task_list[i].et = min(ran_list)
+				task_list.et[i] = min(ran_list)
 			# Determine the execution time based on the average value #
 			elif et_type == 'avg':
-				task_list[i].et = round(sum(ran_list) / len(ran_list))
+				task_list.et[i] = round(sum(ran_list) / len(ran_list))
 			# Determine the execution time based on the maximum value #
 			elif et_type == 'max':
-				task_list[i].et = max(ran_list)
+				task_list.et[i] = max(ran_list)
 
 	# Determine the deadline of the system #
-	sum_et = 0
-	for i in range(num_tasks):
-		sum_et += task_list[i].et
-	deadline = (random.randint(int(dl_min_prob * 10), int(dl_max_prob * 10)) / 10) * sum_et
+	sum_et = sum(task_list.et)
+	deadline = (rng.randint(int(dl_min_prob * 10), int(dl_max_prob * 10)) / 10) * sum_et
 
 	# Calculate response time of the tasks #
 	for i in range(num_tasks):
-		task_list[i].rt = deadline * task_list[i].et / sum_et
+		task_list.rt[i] = deadline * task_list.et[i] / sum_et
 
 	return task_list, deadline
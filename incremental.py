@@ -0,0 +1,157 @@
+ #**************************************************************************
+ # incremental.py
+ #
+ # Map a graph again after the execution times of some tasks have been
+ # changed (e.g., by new measurements), without simulating the whole
+ # mapping process from the beginning. The first mapping records the
+ # step at which the execution time (or response time) of each task is
+ # read for the first time, as well as snapshots of the mapping state.
+ # As the methods are deterministic, all the steps before the first
+ # read of a changed task are the same, so the mapping is resumed from
+ # the last snapshot before that step.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import copy
+from array import array
+import gen
+import func
+import engine
+import simulator
+
+never = 2 ** 62 # The step of the tasks which have not been read
+
+# Define the tracked values class #
+# The values (execution times or response times) of the tasks, which record the first step at which each value is read #
+class tracked_values:
+	def __init__(self, values, first_read):
+		self.values = values # The values of the tasks
+		self.first_read = first_read # The first step at which each task is read (shared by the execution times and response times)
+		self.step = -1 # The current step (-1: the creation of the scheduler)
+
+	def __len__(self):
+		return len(self.values)
+
+	def __getitem__(self, t_id):
+		if self.first_read[t_id] == never:
+			self.first_read[t_id] = self.step
+		return self.values[t_id]
+
+# Define the incremental mapping class #
+# The graph is not modified: the execution times and response times are copied, and the updates only change the copies #
+# num_snapshots: The number of snapshots of the mapping state (taken at equal numbers of completed tasks); more #
+# snapshots resume the mapping closer to the first changed step, but need more memory #
+class mapping:
+	def __init__(self, num_tasks, num_threads, task_list, deadline, alg_name, alloc_alg = '', disp_alg = '', param = None, num_snapshots = 16):
+		self.num_tasks = num_tasks
+		self.num_threads = num_threads
+		self.deadline = deadline
+		self.method = (alg_name, alloc_alg, disp_alg, param)
+		self.num_snapshots = num_snapshots
+
+		# The graph of the mapping, which shares the data dependencies of the given graph #
+		self.graph = gen.graph(num_tasks, task_list.pred_ptr, task_list.pred_idx, task_list.succ_ptr, task_list.succ_idx)
+		self.first_read = array('q', [never]) * num_tasks # The first step at which each task is read
+		self.graph.et = tracked_values(array('q', task_list.et), self.first_read)
+		self.graph.rt = tracked_values(array('d', task_list.rt), self.first_read)
+		self.snapshots = [] # The snapshots (step, time, completion events, number of completed tasks, queue lengths, scheduler)
+		self.result = None # The current schedule
+
+		self.run(None)
+
+	# Set the current step of the reads #
+	def set_step(self, step):
+		self.graph.et.step = step
+		self.graph.rt.step = step
+
+	# Record the current step and take the snapshots #
+	def on_step(self, result, t, events, comp_tasks_cnt, step):
+		self.set_step(step)
+
+		if comp_tasks_cnt >= len(self.snapshots) * self.num_tasks / self.num_snapshots:
+			# The scheduler is copied without the graph, which is shared by all the snapshots #
+			sched = copy.deepcopy(self.sched, {id(self.graph): self.graph})
+			self.snapshots.append((step, t, list(events), comp_tasks_cnt, [len(queue) for queue in result.queue], sched))
+
+	# Map the graph from a snapshot (or from the beginning) #
+	def run(self, snapshot):
+		if snapshot == None:
+			self.set_step(-1)
+			self.sched = simulator.create_scheduler(self.num_tasks, self.num_threads, self.graph, *self.method)
+			state = None
+		else:
+			step, t, events, comp_tasks_cnt, lengths, sched = snapshot
+			self.sched = copy.deepcopy(sched, {id(self.graph): self.graph})
+
+			# The tasks started after the snapshot are overwritten when they are started again #
+			result = engine.schedule(0, self.num_threads)
+			result.thread = list(self.result.thread)
+			result.s_time = list(self.result.s_time)
+			result.f_time = list(self.result.f_time)
+			result.queue = [self.result.queue[i][:lengths[i]] for i in range(self.num_threads)]
+			state = (result, t, list(events), comp_tasks_cnt, step)
+
+		result = engine.simulate(self.num_tasks, self.num_threads, self.graph, self.sched, state, self.on_step)
+		self.sched = None
+
+		# Calculate the results (as simulator.run) #
+		result.idle_time = sum(func.idle_time(self.num_threads, result, result.t))
+		result.miss_deadline = func.miss_deadline(self.deadline, result.t)
+		self.result = result
+
+		return result
+
+	# Map the graph again with new execution times (and response times) of the tasks #
+	# et, rt: The new values of all the tasks (rt: None, if the response times are not changed) #
+	# deadline: The new deadline of the system (None, if it is not changed) #
+	# Return the new schedule #
+	def update(self, et, rt = None, deadline = None):
+		if deadline != None:
+			self.deadline = deadline
+
+		# Find the first step which reads a changed task #
+		first = never
+		et_values = self.graph.et.values
+		rt_values = self.graph.rt.values
+		for i in range(self.num_tasks):
+			if et[i] != et_values[i] or (rt != None and rt[i] != rt_values[i]):
+				first = min(first, self.first_read[i])
+				et_values[i] = et[i]
+				if rt != None:
+					rt_values[i] = rt[i]
+
+		# The changed tasks are not read (e.g., only the deadline is changed) #
+		if first == never:
+			self.result.miss_deadline = func.miss_deadline(self.deadline, self.result.t)
+			return self.result
+
+		# Resume from the last snapshot before the first changed step (or from the beginning, if a changed task #
+		# is read by the creation of the scheduler) #
+		snapshot = None
+		while bool(self.snapshots) and self.snapshots[-1][0] > first:
+			self.snapshots.pop()
+		if first >= 0 and bool(self.snapshots):
+			snapshot = self.snapshots[-1]
+		else:
+			self.snapshots = []
+
+		# The reads of the resumed steps are recorded again #
+		start = snapshot[0] if snapshot != None else -1
+		first_read = self.first_read
+		for i in range(self.num_tasks):
+			if first_read[i] >= start:
+				first_read[i] = never
+
+		return self.run(snapshot)
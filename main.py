@@ -21,15 +21,13 @@
  #**************************************************************************
 import gen
 import func
-from method import bfs
-from method import lpt
-from method import spt
-from method import lnsnl
-from method import new
+import runner
+import memo
 
 # Global variables #
 num_tasks = 50 # Number of tasks [random case]
 bench_name = 'heat' # The name of the benchmark
+tdg_num = 0 # The task graph (cluster) of the benchmark, if its DOT file includes several ones
 et_min = 5 # Minimum execution time
 et_max = 10 # Maximum execution time
 et_type = 'max' # The type of execution time generation; min: Minimum, avg: Average, max: Maximum
@@ -42,122 +40,59 @@ dep_pro = 0.6 # Probability of selecting the sibling tasks for building the task
 num_dep_level = 2 # Maximum number of dependencies (at each level) in the TDG [random case]
 num_threads = 8 # Number of threads
 graphic_result = 0 # Graphical output; 0: Not show, 1: Show
-
-# Generate the graph #
-print('The simulator uses both benchmark and random graph.')
-graph_type = input("Benchmark (y) or random graph (n)? ")
-
-if graph_type == 'y':
-	# Generate it based on the benchmark #
-	num_tasks, task_list = gen.graph_predef(bench_name)
-else:
-	# Generate it randomly #
-	task_list = gen.graph_rand(num_tasks, dep_pro, num_dep_level)
-
-print('\nThe data dependencies:')
-for i in range(num_tasks):
-	if len(task_list[i].dep) == 0:
-		print('T' + str(task_list[i].t_id))
+num_workers = 0 # Number of worker processes for running the algorithms; 0: Number of cores, 1: No parallel execution
+memo_cache = 0 # Reuse the schedules of the same graph, execution times, and algorithms (stored in the cache folder); 0: No, 1: Yes
+
+# The script is guarded, as the worker processes import this file on some platforms #
+if __name__ == '__main__':
+	# Generate the graph #
+	print('The simulator uses both benchmark and random graph.')
+	graph_type = input("Benchmark (y) or random graph (n)? ")
+
+	if graph_type == 'y':
+		# Generate it based on the benchmark #
+		num_tasks, task_list = gen.graph_predef(bench_name, tdg_num)
 	else:
-		dep_list = 'T' + str(task_list[i].t_id) + ' --> T' + str(task_list[i].dep[0].t_id)
-
-		for j in range(len(task_list[i].dep))[1::]:
-			dep_list += ', T' + str(task_list[i].dep[j].t_id)
-
-		print(dep_list)
-
-# Wait for pressing a key to continue #
-print('\nPress any key to continue...')
-input()
-
-# Show the status of the mapping process #
-print('The mapping is in progress...')
-
-# Reset the file to write the results #
-file = open("output/__results.dat", "w")
-file.close()
-
-# Determine execution time of tasks, deadline of the system, and generate the list of tasks #
-task_list, deadline = gen.specify_et(graph_type, num_tasks, task_list, bench_name, et_min, et_max, et_type, itr, dl_min_prob, dl_max_prob)
-
-# ++++++++++++++++++ Start the mapping with the algorithms ++++++++++++++++++++ #
-
-results = []
-
-# BFS algorithm #
-results.append(bfs.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, graphic_result))
-
-# LPT algorithm #
-results.append(lpt.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, graphic_result))
+		# Generate it randomly #
+		task_list = gen.graph_rand(num_tasks, dep_pro, num_dep_level)
 
-# SPT algorithm #
-results.append(spt.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, graphic_result))
+	print('\nThe data dependencies:')
+	func.print_dependencies(num_tasks, task_list)
 
-# LNSNL algorithm #
-results.append(lnsnl.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, graphic_result))
+	# Wait for pressing a key to continue #
+	print('\nPress any key to continue...')
+	input()
 
-# NEW algorithm (MNTP, MET) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MNTP', 'MET', graphic_result))
+	# Show the status of the mapping process #
+	print('The mapping is in progress...')
 
-# NEW algorithm (MNTP, MRT) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MNTP', 'MRT', graphic_result))
+	# Reset the file to write the results #
+	file = open("output/__results.dat", "w")
+	file.close()
 
-# NEW algorithm (MNTP, MCD) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MNTP', 'MCD', graphic_result))
+	# Determine execution time of tasks, deadline of the system, and generate the list of tasks #
+	task_list, deadline = gen.specify_et(graph_type, num_tasks, task_list, bench_name, et_min, et_max, et_type, itr, dl_min_prob, dl_max_prob)
 
-# NEW algorithm (NT, MET) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'NT', 'MET', graphic_result))
+	# ++++++++++++++++++ Start the mapping with the algorithms ++++++++++++++++++++ #
 
-# NEW algorithm (NT, MRT) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'NT', 'MRT', graphic_result))
+	if memo_cache == 1:
+		memo.enable()
 
-# NEW algorithm (NT, MCD) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'NT', 'MCD', graphic_result))
-
-# NEW algorithm (MRIT, MET) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MRIT', 'MET', graphic_result))
-
-# NEW algorithm (MRIT, MRT) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MRIT', 'MRT', graphic_result))
-
-# NEW algorithm (MRIT, MCD) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MRIT', 'MCD', graphic_result))
-
-# NEW algorithm (MTET, MET) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MTET', 'MET', graphic_result))
-
-# NEW algorithm (MTET, MRT) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MTET', 'MRT', graphic_result))
-
-# NEW algorithm (MTET, MCD) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MTET', 'MCD', graphic_result))
-
-# NEW algorithm (MTRT, MET) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MTRT', 'MET', graphic_result))
-
-# NEW algorithm (MTRT, MRT) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MTRT', 'MRT', graphic_result))
-
-# NEW algorithm (MTRT, MCD) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'MTRT', 'MCD', graphic_result))
-
-# NEW algorithm (TMCD, MET) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'TMCD', 'MET', graphic_result))
-
-# NEW algorithm (TMCD, MRT) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'TMCD', 'MRT', graphic_result))
-
-# NEW algorithm (TMCD, MCD) #
-results.append(new.execute(num_tasks, num_threads, func.clear(num_tasks, task_list), deadline, 'TMCD', 'MCD', graphic_result))
+	if num_workers == 1:
+		# Run the algorithms one after another #
+		results = runner.run_serial(num_tasks, num_threads, task_list, deadline, graphic_result)
+	else:
+		# Run the algorithms in parallel #
+		results = runner.run_parallel(num_tasks, num_threads, task_list, deadline, graphic_result, num_workers)
 
-# Write the results to the file #
-file = open("output/__results.dat", "a")
+	# Write the results to the file #
+	file = open("output/__results.dat", "a")
 
-for i in range(0, 22):
-	file.write(str(results[i][0]) + "\t")
-	file.write(str(results[i][1]) + "\t")
-	file.write(str(results[i][2]))
-	if i != 21:
-		file.write("\t")
+	for i in range(0, 22):
+		file.write(str(results[i][0]) + "\t")
+		file.write(str(results[i][1]) + "\t")
+		file.write(str(results[i][2]))
+		if i != 21:
+			file.write("\t")
 
-file.close()
+	file.close()
@@ -0,0 +1,233 @@
+ #**************************************************************************
+ # memo.py
+ #
+ # Reuse the schedules of the mapping processes which have already been
+ # simulated. A schedule is stored under a content hash of its inputs
+ # (the data dependencies, the execution times and response times of
+ # the tasks, the number of threads, the method, its parameters, and
+ # the source code of the methods), in an in-memory LRU cache and in
+ # an on-disk cache with a size limit (the least recently used files
+ # are removed first).
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import glob
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import engine
+import compiled
+
+version = 1 # The version of the stored schedules (a new version invalidates the existing files)
+
+active = None # The enabled cache (None: the schedules are always simulated)
+code_key = None # The hash of the source code of the engine and the methods (calculated once)
+
+# Calculate the hash of the source code of the engine and the methods, so the stored schedules are not #
+# reused after a method is changed #
+def source_key():
+	global code_key
+
+	if code_key == None:
+		folder = os.path.dirname(os.path.abspath(__file__))
+		code_key = compiled.source_key([os.path.join(folder, 'engine.py')] + sorted(glob.glob(os.path.join(folder, 'method', '*.py'))))
+
+	return code_key
+
+# Define the schedule cache class #
+# path: The folder of the on-disk cache (None: only the in-memory cache is used) #
+# max_items: The maximum number of schedules in the in-memory cache #
+# max_bytes: The maximum size of the on-disk cache #
+# Several processes can share the on-disk cache (the files are written under a temporary name first) #
+class schedule_cache:
+	def __init__(self, path = os.path.join(compiled.cache_dir, 'schedules'), max_items = 64, max_bytes = 512 << 20):
+		self.path = path
+		self.max_items = max_items
+		self.max_bytes = max_bytes
+		self.items = OrderedDict() # The stored schedules of the in-memory cache (in the order of use)
+		self.lock = threading.Lock() # The lock of the in-memory cache and the counters (several threads can map at once)
+		self.hits = 0 # Number of schedules found in memory
+		self.disk_hits = 0 # Number of schedules found on disk
+		self.misses = 0 # Number of simulated schedules
+
+		# The size of the on-disk cache #
+		self.disk_bytes = 0
+		if path != None:
+			os.makedirs(path, exist_ok = True)
+			for name in os.listdir(path):
+				if name.endswith('.sched'):
+					self.disk_bytes += os.path.getsize(os.path.join(path, name))
+
+	# Calculate the key of a mapping process #
+	# The parameters of the NEW algorithm are resolved, so a change of their default values gives another key #
+	# rank: The rank of the tasks given to RANK or the RANK heuristic (None: calculated from the graph by the method) #
+	def key(self, num_tasks, num_threads, task_list, alg_name, alloc_alg = '', disp_alg = '', param = None, rank = None):
+		if alg_name == 'new':
+			# The method is imported here, as it uses the cache #
+			from method import new
+			param = new.resolve_param(param)
+
+		h = hashlib.sha256(b'%d|%s|%d|%d|' % (version, source_key().encode(), num_tasks, num_threads))
+		h.update(repr((alg_name, alloc_alg, disp_alg, sorted(param.items()) if param != None else None)).encode())
+
+		# A given rank orders the tasks instead of the one of the graph (it is only used by RANK and the RANK heuristic) #
+		if rank != None and (alg_name == 'rank' or disp_alg == 'RANK'):
+			h.update(b'|rank|')
+			h.update(repr(list(rank)).encode())
+
+		# The graph (the successors are built from the predecessors) #
+		for values in [task_list.pred_ptr, task_list.pred_idx, task_list.et, task_list.rt]:
+			h.update(b'|')
+			h.update(values)
+
+		return h.hexdigest()
+
+	# Return the file of a key #
+	def file_path(self, key):
+		return os.path.join(self.path, key + '.sched')
+
+	# Find a stored schedule (None, if it is not found) #
+	def get(self, key):
+		with self.lock:
+			data = self.items.get(key)
+			if data != None:
+				self.items.move_to_end(key)
+				self.hits += 1
+		if data != None:
+			return self.decode(data)
+
+		if self.path != None:
+			try:
+				with open(self.file_path(key), 'rb') as file:
+					data = file.read()
+				# Mark the file as recently used #
+				os.utime(self.file_path(key))
+			except OSError:
+				data = None
+
+			if data != None:
+				with self.lock:
+					self.disk_hits += 1
+				self.remember(key, data)
+				return self.decode(data)
+
+		return None
+
+	# Store a schedule #
+	def put(self, key, result):
+		data = pickle.dumps((result.thread, result.s_time, result.f_time, result.queue, result.t), pickle.HIGHEST_PROTOCOL)
+		self.remember(key, data)
+
+		if self.path != None:
+			path = self.file_path(key)
+			tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+			try:
+				# The size of the replaced file (e.g., a schedule stored by another process at the same time) #
+				old_size = os.path.getsize(path) if os.path.exists(path) else 0
+				with open(tmp_path, 'wb') as file:
+					file.write(data)
+				os.replace(tmp_path, path)
+			except OSError:
+				return
+
+			with self.lock:
+				self.disk_bytes += len(data) - old_size
+				full = self.disk_bytes > self.max_bytes
+			if full:
+				self.evict()
+
+	# Keep a stored schedule in memory (the least recently used one is removed if the cache is full) #
+	def remember(self, key, data):
+		with self.lock:
+			self.items[key] = data
+			self.items.move_to_end(key)
+			while len(self.items) > self.max_items:
+				self.items.popitem(last = False)
+
+	# Remove the least recently used files until the on-disk cache is 90% of its limit #
+	# (the size is calculated again, as other processes may have changed the cache) #
+	def evict(self):
+		files = []
+		for name in os.listdir(self.path):
+			if name.endswith('.sched'):
+				try:
+					stat = os.stat(os.path.join(self.path, name))
+				except OSError:
+					continue
+				files.append((stat.st_mtime, stat.st_size, name))
+		files.sort()
+
+		disk_bytes = sum(size for mtime, size, name in files)
+		for mtime, size, name in files:
+			if disk_bytes <= self.max_bytes * 0.9:
+				break
+			try:
+				os.remove(os.path.join(self.path, name))
+			except OSError:
+				pass
+			disk_bytes -= size
+
+		with self.lock:
+			self.disk_bytes = disk_bytes
+
+	# Build a schedule from its stored form #
+	def decode(self, data):
+		thread, s_time, f_time, queue, t = pickle.loads(data)
+
+		result = engine.schedule(0, 0)
+		result.thread = thread
+		result.s_time = s_time
+		result.f_time = f_time
+		result.queue = queue
+		result.t = t
+
+		return result
+
+	# Return the stored schedule of a mapping process, or simulate it #
+	# create: A function which creates the scheduler of the method #
+	def simulate(self, num_tasks, num_threads, task_list, alg_name, alloc_alg, disp_alg, param, create, rank = None):
+		key = self.key(num_tasks, num_threads, task_list, alg_name, alloc_alg, disp_alg, param, rank)
+
+		result = self.get(key)
+		if result == None:
+			with self.lock:
+				self.misses += 1
+			result = engine.simulate(num_tasks, num_threads, task_list, create())
+			self.put(key, result)
+
+		return result
+
+# Simulate a mapping process using the enabled cache (or without a cache, if it is not enabled) #
+# rank: The rank of the tasks given to the scheduler by create (see schedule_cache.key) #
+def simulate(num_tasks, num_threads, task_list, alg_name, alloc_alg, disp_alg, param, create, rank = None):
+	if active == None:
+		return engine.simulate(num_tasks, num_threads, task_list, create())
+
+	return active.simulate(num_tasks, num_threads, task_list, alg_name, alloc_alg, disp_alg, param, create, rank)
+
+# Enable a cache for all the mapping processes (see schedule_cache) #
+def enable(path = os.path.join(compiled.cache_dir, 'schedules'), max_items = 64, max_bytes = 512 << 20):
+	global active
+
+	active = schedule_cache(path, max_items, max_bytes)
+	return active
+
+# Disable the cache #
+def disable():
+	global active
+
+	active = None
@@ -19,132 +19,56 @@
  # See the License for the specific language governing permissions and
  # limitations under the License.
  #**************************************************************************
+import heapq
 import func
+import memo
+import engine
 
-# Global variables #
-task_stack = [] # The task stack
-last_idle = [] # Last idle time of the threads (-1 for a busy thread)
-thread_queue = [] # The queues of the threads
-comp_tasks_cnt = 0 # The number of completed tasks
+# The priority of a ready task for the LPT heuristic (the task with the longest WCET first) #
+def priority(task):
+	return -task.et
 
-# The mapping process #
-def mapping(num_tasks, num_threads, task_list):
-	global task_stack, last_idle, thread_queue, comp_tasks_cnt
+# Define the scheduler class #
+# The scheduler keeps the state of one mapping process, so several mapping processes can run at once #
+class scheduler:
+	def __init__(self, num_tasks, num_threads, task_list):
+		self.ready = engine.ready_tracker(num_tasks, task_list, priority) # The tracker of the ready tasks
 
-	t = 0 # Response time
+		# The idle threads (min-heap of (last idle time, thread number)) #
+		# All the threads are idle at the beginning #
+		self.idle_threads = []
+		for i in range(num_threads):
+			self.idle_threads.append((0, i))
 
-	# Continue the mapping process while the task stack is not empty and #
-	# the queues of the threads do not include any executing tasks #
-	while comp_tasks_cnt < num_tasks:
-		for thr_num in range(num_threads):
-			# Check the queue of each thread separately #
-			if bool(thread_queue[thr_num]):
-				task = thread_queue[thr_num][len(thread_queue[thr_num]) - 1]
+	# Process a task which has been finished by a thread #
+	def finish(self, thr_num, t_id, t):
+		heapq.heappush(self.idle_threads, (t, thr_num))
 
-				# The execution of the task has been finished #
-				if task.status == 's' and task.f_time <= t:
-					task.status = 'f'
-					last_idle[thr_num] = t
-					comp_tasks_cnt += 1
+		# Update the ready tasks #
+		self.ready.complete(t_id)
 
-			# Check the task stack and dispatch the ready tasks to the threads #
-			# This process is done just by the master thread, if there are any empty threads #
-			if thr_num == 0 and func.check_empty_thr(num_threads, thread_queue) == True:
-				if bool(task_stack):
-					# Select and sort the idle threads #
-					temp_idle_list = last_idle.copy()
-					sort_idle_list = []
+	# Dispatch the ready tasks to the idle threads (the longest idle thread first) #
+	def dispatch(self, t):
+		started = [] # The tasks started at the current time
 
-					for i in range(num_threads):
-						thread_id = -1
-						min_idle_time = -1
+		while bool(self.idle_threads) and bool(self.ready.ready):
+			thread_id = heapq.heappop(self.idle_threads)[1]
 
-						for j in range(num_threads):
-							if temp_idle_list[j] != -1:
-								thread_id = j
-								min_idle_time = temp_idle_list[j]
-								break
+			# Choose the ready task with the highest priority by the LPT heuristic and dispatch it to the thread #
+			started.append((thread_id, self.ready.pop()))
 
-						for k in range(num_threads)[j+1::]:
-							if temp_idle_list[k] != -1:
-								if temp_idle_list[k] < min_idle_time:
-									thread_id = k
-									min_idle_time = temp_idle_list[k]
-
-						if thread_id != -1:
-							sort_idle_list.append(thread_id)
-							temp_idle_list[thread_id] = -1
-
-					# Dispatch and execute the selected tasks by the idle threads #
-					for index in range(len(sort_idle_list)):
-						thread_id = sort_idle_list[index]
-
-						# Select the tasks from the task stack #
-						sel_tasks = []
-						for i in range(len(task_stack)):
-							# Select the tasks that do not have any data dependencies, #
-							# or have data dependencies but the related tasks are finished #
-							if task_stack[i].dep == None or func.check_dep(task_list, task_stack[i].dep) == True:
-								sel_tasks.append(task_stack[i])
-
-						# Choose one of the tasks from the selected tasks by the LPT heuristic #
-						# Select the task with the longest WCET #
-						if bool(sel_tasks):
-							task_WCET = []
-							for i in range(len(sel_tasks)):
-								task_WCET.append(sel_tasks[i].et)
-
-							max_index = 0
-							for i in range(len(task_WCET))[1::]:
-								if task_WCET[i] > task_WCET[max_index]:
-									max_index = i
-
-							# Dispatch the task to the thread #
-							thread_queue[thread_id].append(sel_tasks[max_index])
-							task = thread_queue[thread_id][len(thread_queue[thread_id]) - 1]
-
-							task.status = 's'
-							task.s_time = t
-							task.f_time = t + task.et
-
-							last_idle[thread_id] = -1
-
-							# Remove the task from the task stack #
-							task_stack.remove(sel_tasks[max_index])
-
-		t += 1000000
-
-	return t
+		return started
 
 # The main function #
 def execute(num_tasks, num_threads, task_list, deadline, graphic_result):
-	global task_stack, last_idle, thread_queue, comp_tasks_cnt
-
-	# Create the task stack and append the tasks to this list #
-	task_stack = []
-	for i in range(num_tasks):
-		task_stack.append(task_list[i])
-
-	# Create a list for the last idle time of the threads #
-	last_idle = []
-	for i in range(num_threads):
-		last_idle.append(0)
-
-	# Create a queue for each thread #
-	thread_queue = []
-	for i in range(num_threads):
-		thread_queue.append([])
-
-	# Initialize the number of completed tasks #
-	comp_tasks_cnt = 0
-
 	# Show the mapping algorithm #
 	print('\nLPT \n***********************************')
-	t = mapping(num_tasks, num_threads, task_list)
+	result = memo.simulate(num_tasks, num_threads, task_list, 'lpt', '', '', None, lambda: scheduler(num_tasks, num_threads, task_list))
+	t = result.t
 
 	# Calculate the results #
 	response_time = t # The response time
-	idle_time = sum(func.idle_time(num_threads, thread_queue, t)) # The idle time of the system
+	idle_time = sum(func.idle_time(num_threads, result, t)) # The idle time of the system
 	miss_deadline = func.miss_deadline(deadline, t) # The missed deadline status of the system
 
 	# Show the results #
@@ -153,11 +77,11 @@ def execute(num_tasks, num_threads, task_list, deadline, graphic_result):
 	print('Missed deadline: ' + str(miss_deadline))
 
 	# Export the scheduling of the threads #
-	func.export_scheduling(num_threads, thread_queue, 'lpt', '', '')
+	func.export_scheduling(num_threads, result, 'lpt', '', '')
 
 	# Draw the graphical output #
 	if graphic_result == 1:
-		func.graphic_result(num_threads, thread_queue, t, 'lpt', '', '')
+		func.graphic_result(num_threads, result, t, 'lpt', '', '')
 
 	# Return the results to the main program #
 	return response_time, idle_time, miss_deadline
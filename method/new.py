@@ -17,17 +17,14 @@
  # See the License for the specific language governing permissions and
  # limitations under the License.
  #**************************************************************************
-from operator import itemgetter
+from collections import deque
+import bisect
+import heapq
 import func
+import memo
+import engine
 
-# Global variables #
-task_stack = [] # The task stack
-alloc_queue = [] # The allocation queues of the threads
-exec_queue = [] # The execution queues of the threads
-curr_thr = -1 # The current thread
-last_idle = [] # Last idle time of the threads (-1 for a busy thread)
-comp_tasks_cnt = 0 # The number of completed tasks
-
+# Default parameters of the allocation (TMCD) and dispatching (MCD) heuristics #
 alpha = 0.5
 beta = 0
 gamma = 0.5
@@ -35,270 +32,325 @@ gamma = 0.5
 theta = 0.4
 psi = 0.6
 
-# Select an allocation queue using one of the allocation heuristics #
-def alloc_heuristic(num_threads, alloc_alg, t):
-	global alloc_queue, curr_thr, last_idle, alpha, beta, gamma
-
-	thr_list = [] # The thread numbers
-
-	# The MNTP heuristic #
-	if alloc_alg == 'MNTP':
-		# Determine the number of tasks existing in the queues #
-		for i in range(num_threads):
-			thr_list.append([i, len(alloc_queue[i])])
-
-		# Sort the numbers based on the minimum number of tasks #
-		thr_list = sorted(thr_list, key = itemgetter(1), reverse = False)
-
-		return thr_list[0][0]
-
-	# The NT heuristic #
-	elif alloc_alg == 'NT':
-		# Select the next thread #
-		if curr_thr < num_threads - 1:
-			curr_thr += 1
+# Return the values of the parameters of the heuristics, where the current default values are used for the missing parameters #
+def resolve_param(param = None):
+	if param == None:
+		param = {}
+
+	return {'alpha': param.get('alpha', alpha), 'beta': param.get('beta', beta), 'gamma': param.get('gamma', gamma),
+		'theta': param.get('theta', theta), 'psi': param.get('psi', psi)}
+
+# Define the allocation queue class #
+# The queue keeps running totals of its tasks, which are updated when a task is appended or #
+# dispatched, so the allocation heuristics do not need to traverse the tasks of the queues #
+# The tasks are also indexed for the dispatching heuristic: #
+# MET and MRT: a heap ordered by the execution time (response time) and the order of arrival #
+# MCD: the tasks grouped by their execution time, where the groups are sorted by the execution time #
+# RANK: a heap ordered by the upward rank (the highest first) and the order of arrival #
+class alloc_list:
+	def __init__(self, disp_alg, rank = None):
+		self.disp_alg = disp_alg # The dispatching heuristic
+		self.rank = rank # The upward rank of each task (RANK)
+		self.num_tasks = 0 # The number of tasks in the queue
+		self.total_et = 0 # Total execution time of the tasks
+		self.total_rt = 0 # Total response time of the tasks
+		self.last_idle = 0 # Last idle time of the thread (-1 for a busy thread)
+		self.seq = 0 # The arrival number of the next task
+		self.heap = [] # The heap of the tasks (MET and MRT)
+		self.et_list = [] # The sorted list of the distinct execution times (MCD)
+		self.et_group = {} # The tasks with the same execution time in the order of arrival (MCD)
+		self.ratio = None # The ratio of the response time to the execution time of the tasks (MCD)
+		self.prop = True # The response time of all the tasks is proportional to the execution time (MCD)
+
+	def __len__(self):
+		return self.num_tasks
+
+	# Append a task to the queue #
+	def append(self, task):
+		self.num_tasks += 1
+		self.total_et += task.et
+		self.total_rt += task.rt
+
+		if self.disp_alg == 'MET':
+			heapq.heappush(self.heap, (task.et, self.seq, task))
+		elif self.disp_alg == 'MRT':
+			heapq.heappush(self.heap, (-task.rt, self.seq, task))
+		elif self.disp_alg == 'RANK':
+			heapq.heappush(self.heap, (-self.rank[task.t_id], self.seq, task))
+		elif self.disp_alg == 'MCD':
+			if task.et not in self.et_group:
+				bisect.insort(self.et_list, task.et)
+				self.et_group[task.et] = deque()
+			self.et_group[task.et].append((self.seq, task))
+
+			# Check whether the response time is still proportional to the execution time #
+			# (the response times generated by gen.specify_et are) #
+			if task.et <= 0:
+				self.prop = False
+			elif self.ratio == None:
+				self.ratio = task.rt / task.et
+			elif abs(task.rt / task.et - self.ratio) > 1e-9 * self.ratio:
+				self.prop = False
+
+		self.seq += 1
+
+	# Remove a dispatched task (selected by disp_heuristic) from the queue #
+	def remove(self, task):
+		self.num_tasks -= 1
+
+		# Reset the totals of an empty queue to avoid accumulating rounding errors #
+		if self.num_tasks == 0:
+			self.total_et = 0
+			self.total_rt = 0
 		else:
-			curr_thr = 0
-
-		return curr_thr
-
-	# The MRIT heuristic #
-	elif alloc_alg == 'MRIT':
-		# Calculate the recent idle time of the threads #
-		for i in range(num_threads):
-			if last_idle[i] != -1:
-				thr_list.append([i, t - last_idle[i]])
+			self.total_et -= task.et
+			self.total_rt -= task.rt
+
+		if self.disp_alg == 'MET' or self.disp_alg == 'MRT' or self.disp_alg == 'RANK':
+			heapq.heappop(self.heap)
+		elif self.disp_alg == 'MCD':
+			group = self.et_group[task.et]
+			if group[0][1] == task:
+				group.popleft()
 			else:
-				thr_list.append([i, 0])
-
-		# Sort the numbers based on the most recent idle time #
-		thr_list = sorted(thr_list, key = itemgetter(1), reverse = True)
-
-		return thr_list[0][0]
-
-	# The MTET heuristic #
-	elif alloc_alg == 'MTET':
-		# Calculate the total execution time of the queues #
-		for i in range(num_threads):
-			total_et = 0
-			for j in range(len(alloc_queue[i])):
-				total_et += alloc_queue[i][j].et
-
-			thr_list.append([i, total_et])
-
-		# Sort the numbers based on the minimum total execution time #
-		thr_list = sorted(thr_list, key = itemgetter(1), reverse = False)
-
-		return thr_list[0][0]
-
-	# The MTRT heuristic #
-	elif alloc_alg == 'MTRT':
-		# Calculate the total response time of the queues #
-		for i in range(num_threads):
-			total_rt = 0
-			for j in range(len(alloc_queue[i])):
-				total_rt += alloc_queue[i][j].rt
-
-			thr_list.append([i, total_rt])
-
-		# Sort the numbers based on the maximum total response time #
-		thr_list = sorted(thr_list, key = itemgetter(1), reverse = True)
-
-		return thr_list[0][0]
-
-	# The TMCD heuristic #
-	elif alloc_alg == 'TMCD':
-		# Calculate the recent idle time of the threads #
-		rec_idle_time = []
+				for i in range(len(group)):
+					if group[i][1] == task:
+						del group[i]
+						break
+
+			if not bool(group):
+				del self.et_group[task.et]
+				del self.et_list[bisect.bisect_left(self.et_list, task.et)]
+
+	# Calculate the recent idle time of the thread #
+	def rec_idle_time(self, t):
+		if self.last_idle != -1:
+			return t - self.last_idle
+		else:
+			return 0
+
+# Define the scheduler class #
+# The scheduler keeps the state of one mapping process, so several mapping processes can run at once #
+# param: The parameters of the heuristics (alpha, beta, gamma, theta, psi), where the default values #
+# are used for the missing parameters #
+# rank: The upward rank of each task for the RANK heuristic (see func.upward_rank), calculated once per graph and #
+# shared by the mapping processes (None: calculated here) #
+class scheduler:
+	def __init__(self, num_tasks, num_threads, task_list, alloc_alg, disp_alg, param = None, rank = None):
+		self.num_threads = num_threads # Number of threads
+		self.task_list = task_list # The list of tasks
+		self.alloc_alg = alloc_alg # The allocation heuristic
+		self.disp_alg = disp_alg # The dispatching heuristic
+		self.ready = engine.ready_tracker(num_tasks, task_list) # The tracker of the ready tasks
+		self.curr_thr = -1 # The current thread
+
+		# The upward rank of each task (only for the RANK heuristic; calculated here if it is not shared) #
+		if disp_alg != 'RANK':
+			rank = None
+		elif rank == None:
+			rank = func.upward_rank(num_tasks, task_list)
+
+		# Create an allocation queue for each thread #
+		self.alloc_queue = []
 		for i in range(num_threads):
-			if last_idle[i] != -1:
-				rec_idle_time.append(t - last_idle[i])
+			self.alloc_queue.append(alloc_list(disp_alg, rank))
+
+		# Set the parameters of the heuristics #
+		param = resolve_param(param)
+		self.alpha = param['alpha']
+		self.beta = param['beta']
+		self.gamma = param['gamma']
+		self.theta = param['theta']
+		self.psi = param['psi']
+
+	# Select an allocation queue using one of the allocation heuristics #
+	# The first thread is selected among the threads with the same value #
+	def alloc_heuristic(self, t):
+		alloc_queue = self.alloc_queue # The allocation queues of the threads
+		num_threads = self.num_threads # Number of threads
+		alloc_alg = self.alloc_alg # The allocation heuristic
+		alpha, beta, gamma = self.alpha, self.beta, self.gamma
+
+		# The MNTP heuristic #
+		if alloc_alg == 'MNTP':
+			# Select the queue with the minimum number of tasks #
+			return min(range(num_threads), key = lambda i: len(alloc_queue[i]))
+
+		# The NT heuristic #
+		elif alloc_alg == 'NT':
+			# Select the next thread #
+			if self.curr_thr < num_threads - 1:
+				self.curr_thr += 1
 			else:
-				rec_idle_time.append(0)
-
-		# Calculate total number of tasks, total idle time, and total execution time #
-		total_num_tasks = 0
-		total_it = 0
-		total_et = 0
+				self.curr_thr = 0
+
+			return self.curr_thr
+
+		# The MRIT heuristic #
+		elif alloc_alg == 'MRIT':
+			# Select the thread with the most recent idle time #
+			return max(range(num_threads), key = lambda i: alloc_queue[i].rec_idle_time(t))
+
+		# The MTET heuristic #
+		elif alloc_alg == 'MTET':
+			# Select the queue with the minimum total execution time #
+			return min(range(num_threads), key = lambda i: alloc_queue[i].total_et)
+
+		# The MTRT heuristic #
+		elif alloc_alg == 'MTRT':
+			# Select the queue with the maximum total response time #
+			return max(range(num_threads), key = lambda i: alloc_queue[i].total_rt)
+
+		# The TMCD heuristic #
+		elif alloc_alg == 'TMCD':
+			# Calculate the recent idle time of the threads #
+			rec_idle_time = []
+			for i in range(num_threads):
+				rec_idle_time.append(alloc_queue[i].rec_idle_time(t))
+
+			# Calculate total number of tasks, total idle time, and total execution time #
+			total_num_tasks = 0
+			total_it = 0
+			total_et = 0
 
-		for i in range(num_threads):
-			total_it += rec_idle_time[i]
-			for j in range(len(alloc_queue[i])):
-				total_num_tasks += 1
-				total_et += alloc_queue[i][j].et
-
-		if total_num_tasks == 0:
-			total_num_tasks = 1
-		if total_it == 0:
-			total_it = 1
-		if total_et == 0:
-			total_et = 1
-
-		# Calculate the cost of the queues #
-		for i in range(num_threads):
-			if rec_idle_time[i] != 0:
-				val_it = 1 / (rec_idle_time[i] / total_it)
-			else:
-				val_it = 0
-
-			sum_et = 0
-			for j in range(len(alloc_queue[i])):
-				sum_et += alloc_queue[i][j].et
-
-			thr_list.append([i, alpha * len(alloc_queue[i]) / total_num_tasks + beta * val_it + gamma * sum_et / total_et])
-
-		# Sort the numbers based on the least cost #
-		thr_list = sorted(thr_list, key = itemgetter(1), reverse = False)
-
-		return thr_list[0][0]
-
-# Choose a task from the allocation queue using one of the dispatching heuristics #
-def disp_heuristic(sel_tasks, disp_alg):
-	global theta, psi
-
-	# The MET heuristic #
-	if disp_alg == 'MET':
-		sel_id = 0
-		# Find the task with the minimum execution time #
-		for i in range(len(sel_tasks))[1::]:
-			if sel_tasks[i].et < sel_tasks[sel_id].et:
-				sel_id = i
-
-	# The MRT heuristic #
-	if disp_alg == 'MRT':
-		sel_id = 0
-		# Find the task with the maximum response time #
-		for i in range(len(sel_tasks))[1::]:
-			if sel_tasks[i].rt > sel_tasks[sel_id].rt:
-				sel_id = i
-
-	# The MCD heuristic #
-	if disp_alg == 'MCD':
-		# Calculate total execution time and total response time of the tasks #
-		total_et = 0
-		total_rt = 0
-		for i in range(len(sel_tasks)):
-			total_et += sel_tasks[i].et
-			total_rt += sel_tasks[i].rt
-
-		if total_et == 0:
-			total_et = 1
-		if total_rt == 0:
-			total_rt = 1
-
-		# Calculate the cost of each task #
-		cost = []
-		for i in range(len(sel_tasks)):
-			cost.append(theta * sel_tasks[i].et / total_et + psi * 1 / (sel_tasks[i].rt / total_rt))
-
-		# Select the task with the least cost #
-		sel_id = 0
-		for i in range(len(sel_tasks))[1::]:
-			if cost[i] < cost[sel_id]:
-				sel_id = i
-
-	return sel_id
-
-# The mapping process #
-def mapping(num_tasks, num_threads, task_list, alloc_alg, disp_alg):
-	global task_stack, alloc_queue, exec_queue, curr_thr, last_idle, comp_tasks_cnt
-
-	t = 0 # Response time
-
-	# Continue the mapping process while the allocation queues of the threads are not empty, as well as #
-	# the execution queues of the threads include executing tasks #
-	while comp_tasks_cnt < num_tasks:
-		for thr_num in range(num_threads):
-			# Check the execution queue of the thread #
-			if bool(exec_queue[thr_num]):
-				task = exec_queue[thr_num][len(exec_queue[thr_num]) - 1]
-
-				# Check whether the execution of the task has been finished #
-				if task.status == 's' and task.f_time <= t:
-					task.status = 'f'
-
-					curr_thr = thr_num
-					last_idle[thr_num] = t
-					comp_tasks_cnt += 1
-
-			# Check the task stack and add the ready tasks to the allocation queues #
-			# This process is done just by the master thread #
-			if thr_num == 0:
-				remove_list = []
-				for i in range(len(task_stack)):
-					# Add the ready tasks to the allocation queues if there are not any data dependencies, or #
-					# there are any data dependencies but the related tasks are finished #
-					if task_stack[i].dep == None or func.check_dep(task_list, task_stack[i].dep) == True:
-						# Select an allocation queue from the list of queues #
-						thread_id = alloc_heuristic(num_threads, alloc_alg, t)
-
-						# Append the task to the selected queue #
-						alloc_queue[thread_id].append(task_stack[i])
-
-						remove_list.append(task_stack[i])
-
-				# Remove the tasks, which were processed, from the task stack #
-				for j in range(len(remove_list)):
-					task_stack.remove(remove_list[j])
-
-			# Check whether the thread is idle #
-			if not bool(exec_queue[thr_num]) or exec_queue[thr_num][len(exec_queue[thr_num]) - 1].status == 'f':
-				# Check the allocation queue of the thread and dispatch one of the tasks (if any) to the thread #
-				if bool(alloc_queue[thr_num]):
-					# Choose one of the tasks from the allocation queue #
-					sel_task = alloc_queue[thr_num][disp_heuristic(alloc_queue[thr_num], disp_alg)]
-
-					# Dispatch the task to the thread #
-					exec_queue[thr_num].append(sel_task)
-					task = exec_queue[thr_num][len(exec_queue[thr_num]) - 1]
-
-					task.status = 's'
-					task.s_time = t
-					task.f_time = t + task.et
-
-					last_idle[thr_num] = -1
-
-					# Remove the task from the allocation queue #
-					alloc_queue[thr_num].remove(sel_task)
-
-		t += 1000000
-
-	return t
+			for i in range(num_threads):
+				total_it += rec_idle_time[i]
+				total_num_tasks += len(alloc_queue[i])
+				total_et += alloc_queue[i].total_et
+
+			if total_num_tasks == 0:
+				total_num_tasks = 1
+			if total_it == 0:
+				total_it = 1
+			if total_et == 0:
+				total_et = 1
+
+			# Select the queue with the least cost #
+			min_thr = 0
+			min_cost = None
+
+			for i in range(num_threads):
+				if rec_idle_time[i] != 0:
+					val_it = 1 / (rec_idle_time[i] / total_it)
+				else:
+					val_it = 0
+
+				cost = alpha * len(alloc_queue[i]) / total_num_tasks + beta * val_it + gamma * alloc_queue[i].total_et / total_et
+
+				if min_cost == None or cost < min_cost:
+					min_thr = i
+					min_cost = cost
+
+			return min_thr
+
+	# Choose a task from the allocation queue using one of the dispatching heuristics #
+	# The first task (in the order of arrival) is selected among the tasks with the same value #
+	def disp_heuristic(self, queue):
+		disp_alg = self.disp_alg # The dispatching heuristic
+		theta, psi = self.theta, self.psi
+
+		# The MET heuristic (the task with the minimum execution time), #
+		# the MRT heuristic (the task with the maximum response time), and #
+		# the RANK heuristic (the task with the maximum upward rank) #
+		if disp_alg == 'MET' or disp_alg == 'MRT' or disp_alg == 'RANK':
+			return queue.heap[0][2]
+
+		# The MCD heuristic #
+		if disp_alg == 'MCD':
+			# Fetch total execution time and total response time of the tasks #
+			total_et = queue.total_et
+			total_rt = queue.total_rt
+
+			if total_et == 0:
+				total_et = 1
+			if total_rt == 0:
+				total_rt = 1
+
+			# Calculate the cost of a group of tasks with the same execution time #
+			# The cost and the arrival number of the first task of the group are returned #
+			def cost(index):
+				seq, task = queue.et_group[queue.et_list[index]][0]
+				return theta * task.et / total_et + psi * 1 / (task.rt / total_rt), seq, task
+
+			# The response time is proportional to the execution time, so the cost is a convex function #
+			# of the execution time and the group with the least cost is found by a binary search #
+			if queue.prop == True:
+				low = 0
+				high = len(queue.et_list) - 1
+				while low < high:
+					mid = (low + high) // 2
+					if cost(mid)[0] <= cost(mid + 1)[0]:
+						high = mid
+					else:
+						low = mid + 1
+
+				# Select the task with the least cost among the neighbouring groups (for the same costs) #
+				sel = cost(low)
+				for i in [low - 1, low + 1]:
+					if i >= 0 and i < len(queue.et_list):
+						cand = cost(i)
+						if cand[0] < sel[0] or (cand[0] == sel[0] and cand[1] < sel[1]):
+							sel = cand
+
+				return sel[2]
+
+			# Otherwise, select the task with the least cost among all the tasks #
+			sel = None
+			for et in queue.et_list:
+				for seq, task in queue.et_group[et]:
+					cand = (theta * task.et / total_et + psi * 1 / (task.rt / total_rt), seq, task)
+					if sel == None or cand[0] < sel[0] or (cand[0] == sel[0] and cand[1] < sel[1]):
+						sel = cand
+
+			return sel[2]
+
+	# Process a task which has been finished by a thread #
+	def finish(self, thr_num, t_id, t):
+		self.curr_thr = thr_num
+		self.alloc_queue[thr_num].last_idle = t
+
+		# Update the ready tasks #
+		self.ready.complete(t_id)
+
+	# Add the ready tasks to the allocation queues and dispatch the tasks to the idle threads #
+	def dispatch(self, t):
+		started = [] # The tasks started at the current time
+
+		# Add the ready tasks to the allocation queues (in the order of the task IDs) #
+		while bool(self.ready.ready):
+			# Select an allocation queue from the list of queues #
+			thread_id = self.alloc_heuristic(t)
+
+			# Append the task to the selected queue #
+			self.alloc_queue[thread_id].append(self.task_list[self.ready.pop()])
+
+		for thr_num in range(self.num_threads):
+			queue = self.alloc_queue[thr_num]
+
+			# Check whether the thread is idle, and dispatch one of the tasks (if any) of its allocation queue to the thread #
+			if queue.last_idle != -1 and bool(queue):
+				# Choose one of the tasks from the allocation queue #
+				sel_task = self.disp_heuristic(queue)
+
+				# Dispatch the task to the thread #
+				started.append((thr_num, sel_task.t_id))
+				queue.last_idle = -1
+
+				# Remove the task from the allocation queue #
+				queue.remove(sel_task)
+
+		return started
 
 # The main function #
-def execute(num_tasks, num_threads, task_list, deadline, alloc_alg, disp_alg, graphic_result):
-	global task_stack, alloc_queue, exec_queue, last_idle, comp_tasks_cnt
-
-	# Create the task stack and append the tasks to this list #
-	task_stack = []
-	for i in range(num_tasks):
-		task_stack.append(task_list[i])
-
-	# Create an allocation queue for each thread #
-	alloc_queue = []
-	for i in range(num_threads):
-		alloc_queue.append([])
-
-	# Create an execution queue for each thread #
-	exec_queue = []
-	for i in range(num_threads):
-		exec_queue.append([])
-
-	# Create a list for the last idle time of the threads #
-	last_idle = []
-	for i in range(num_threads):
-		last_idle.append(0)
-
-	# Initialize the number of completed tasks #
-	comp_tasks_cnt = 0
-
+def execute(num_tasks, num_threads, task_list, deadline, alloc_alg, disp_alg, graphic_result, rank = None):
 	# Show the mapping algorithm #
 	print('\nNEW (' + alloc_alg + ', ' + disp_alg + ')' + '\n***********************************')
-	t = mapping(num_tasks, num_threads, task_list, alloc_alg, disp_alg)
+	result = memo.simulate(num_tasks, num_threads, task_list, 'new', alloc_alg, disp_alg, None, lambda: scheduler(num_tasks, num_threads, task_list, alloc_alg, disp_alg, None, rank), rank)
+	t = result.t
 
 	# Calculate the results #
 	response_time = t # The response time
-	idle_time = sum(func.idle_time(num_threads, exec_queue, t)) # The idle time of the system
+	idle_time = sum(func.idle_time(num_threads, result, t)) # The idle time of the system
 	miss_deadline = func.miss_deadline(deadline, t) # The missed deadline status of the system
 
 	# Show the results #
@@ -307,11 +359,11 @@ def execute(num_tasks, num_threads, task_list, deadline, alloc_alg, disp_alg, gr
 	print('Missed deadline: ' + str(miss_deadline))
 
 	# Export the scheduling of the threads #
-	func.export_scheduling(num_threads, exec_queue, 'new', alloc_alg, disp_alg)
+	func.export_scheduling(num_threads, result, 'new', alloc_alg, disp_alg)
 
 	# Draw the graphical output #
 	if graphic_result == 1:
-		func.graphic_result(num_threads, exec_queue, t, 'new', alloc_alg, disp_alg)
+		func.graphic_result(num_threads, result, t, 'new', alloc_alg, disp_alg)
 
 	# Return the results to the main program #
 	return response_time, idle_time, miss_deadline
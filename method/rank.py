@@ -0,0 +1,90 @@
+ #**************************************************************************
+ # rank.py
+ #
+ # Map the tasks of the graph using a list scheduler based on the upward
+ # rank (bottom level) of the tasks, as in the HEFT algorithm: the ready
+ # task with the longest path to an exit task is dispatched first, to the
+ # thread which has been idle for the longest time.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import heapq
+import func
+import memo
+import engine
+
+# Define the scheduler class #
+# The scheduler keeps the state of one mapping process, so several mapping processes can run at once #
+# rank: The upward rank of each task (see func.upward_rank), calculated once per graph and shared by the mapping #
+# processes (None: calculated here) #
+class scheduler:
+	def __init__(self, num_tasks, num_threads, task_list, rank = None):
+		if rank == None:
+			rank = func.upward_rank(num_tasks, task_list)
+
+		# The tracker of the ready tasks (the task with the highest rank first) #
+		self.ready = engine.ready_tracker(num_tasks, task_list, lambda task: -rank[task.t_id])
+
+		# The idle threads (min-heap of (last idle time, thread number)) #
+		# All the threads are idle at the beginning #
+		self.idle_threads = []
+		for i in range(num_threads):
+			self.idle_threads.append((0, i))
+
+	# Process a task which has been finished by a thread #
+	def finish(self, thr_num, t_id, t):
+		heapq.heappush(self.idle_threads, (t, thr_num))
+
+		# Update the ready tasks #
+		self.ready.complete(t_id)
+
+	# Dispatch the ready tasks to the idle threads (the longest idle thread first) #
+	def dispatch(self, t):
+		started = [] # The tasks started at the current time
+
+		while bool(self.idle_threads) and bool(self.ready.ready):
+			thread_id = heapq.heappop(self.idle_threads)[1]
+
+			# Choose the ready task with the highest upward rank and dispatch it to the thread #
+			started.append((thread_id, self.ready.pop()))
+
+		return started
+
+# The main function #
+def execute(num_tasks, num_threads, task_list, deadline, graphic_result, rank = None):
+	# Show the mapping algorithm #
+	print('\nRANK \n***********************************')
+	result = memo.simulate(num_tasks, num_threads, task_list, 'rank', '', '', None, lambda: scheduler(num_tasks, num_threads, task_list, rank), rank)
+	t = result.t
+
+	# Calculate the results #
+	response_time = t # The response time
+	idle_time = sum(func.idle_time(num_threads, result, t)) # The idle time of the system
+	miss_deadline = func.miss_deadline(deadline, t) # The missed deadline status of the system
+
+	# Show the results #
+	print('Response time: ' + str(response_time))
+	print('Idle time: ' + str(idle_time))
+	print('Missed deadline: ' + str(miss_deadline))
+
+	# Export the scheduling of the threads #
+	func.export_scheduling(num_threads, result, 'rank', '', '')
+
+	# Draw the graphical output #
+	if graphic_result == 1:
+		func.graphic_result(num_threads, result, t, 'rank', '', '')
+
+	# Return the results to the main program #
+	return response_time, idle_time, miss_deadline
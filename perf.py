@@ -0,0 +1,223 @@
+ #**************************************************************************
+ # perf.py
+ #
+ # Measure the performance of the simulator itself: the wall time, peak
+ # memory, and cost per task of each method on the benchmarks and on
+ # random graphs of increasing size, and compare two measurements to
+ # find the regressions.
+ #
+ # Usage: python perf.py run [--preset quick|full] [options] -o FILE
+ #        python perf.py compare OLD_FILE NEW_FILE [--threshold 0.1]
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import sys
+import time
+import json
+import random
+import argparse
+import platform
+import tracemalloc
+import gen
+import cli
+import reader
+import runner
+import simulator
+
+# The predefined sets of cases #
+presets = {
+	'quick': {'bench_name': ['axpy', 'heat'], 'num_tasks': [100, 1000, 10000], 'num_threads': [4, 16], 'repeat': 3},
+	'full': {'bench_name': ['axpy', 'heat', 'hog', 'sparseLU', 'wavefront'], 'num_tasks': [100, 1000, 10000, 100000, 1000000],
+		'num_threads': [4, 16, 64, 256], 'repeat': 1}
+}
+
+version = 1 # The version of the file format
+
+# Generate the graphs of the cases #
+# The execution times of a benchmark are measured with a number of threads, so a benchmark graph is built for each #
+# JSON file of the numbers of threads (see reader.bench_json_path) #
+# Return the list of (name, number of tasks, graph, deadline, source of the execution times, numbers of threads) #
+def create_graphs(bench_names, sizes, thread_counts, seed):
+	graphs = []
+
+	for bench_name in bench_names:
+		groups = {} # The numbers of threads of each JSON file
+		for num_threads in thread_counts:
+			groups.setdefault(reader.bench_json_path(bench_name, num_threads), []).append(num_threads)
+
+		for json_path, counts in groups.items():
+			num_tasks, task_list = gen.graph_predef(bench_name, json_path = json_path)
+
+			# The benchmarks without measured execution times (e.g., sparseLU) use random ones, which is recorded #
+			if task_list.sample_ptr != None and task_list.sample_ptr[num_tasks] > 0:
+				graph_type = 'y'
+				et_source = json_path
+			else:
+				graph_type = 'n'
+				et_source = 'random'
+				print('warning: the benchmark ' + bench_name + ' has no measured execution times in ' + json_path + ' (random execution times are used)',
+					file = sys.stderr)
+
+			task_list, deadline = gen.specify_et(graph_type, num_tasks, task_list, bench_name, 5, 10, 'max', 10, 0.5, 1, random.Random(seed))
+			graphs.append((bench_name, num_tasks, task_list, deadline, et_source, counts))
+
+	for num_tasks in sizes:
+		rng = random.Random(seed)
+		task_list = gen.graph_rand(num_tasks, 0.6, 2, rng)
+		task_list, deadline = gen.specify_et('n', num_tasks, task_list, '', 5, 10, 'max', 10, 0.5, 1, rng)
+		graphs.append(('rand_' + str(num_tasks), num_tasks, task_list, deadline, 'random', thread_counts))
+
+	return graphs
+
+# Measure a configuration on a graph #
+# The wall time is the minimum of the repetitions; the peak memory (allocated during the mapping, excluding #
+# the graph) is measured in a separate run, as tracing the allocations slows down the mapping #
+def measure(num_tasks, num_threads, task_list, deadline, config, repeat, memory):
+	wall_time = None
+	for i in range(repeat):
+		start = time.perf_counter()
+		result = simulator.run(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2])
+		elapsed = time.perf_counter() - start
+
+		if wall_time == None or elapsed < wall_time:
+			wall_time = elapsed
+
+	peak_memory = None
+	if memory:
+		tracemalloc.start()
+		simulator.run(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2])
+		peak_memory = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+
+	return result.t, wall_time, peak_memory
+
+# Run the cases and return the measurement #
+def run(bench_names, sizes, thread_counts, config_list, repeat = 1, memory = True, seed = 1, verbose = True):
+	records = []
+
+	for name, num_tasks, task_list, deadline, et_source, counts in create_graphs(bench_names, sizes, thread_counts, seed):
+		num_edges = len(task_list.succ_idx)
+
+		for num_threads in counts:
+			for config in config_list:
+				response_time, wall_time, peak_memory = measure(num_tasks, num_threads, task_list, deadline, config, repeat, memory)
+
+				record = {'graph': name, 'num_tasks': num_tasks, 'num_edges': num_edges, 'num_threads': num_threads,
+					'method': runner.config_name(config), 'et_source': et_source, 'response_time': response_time, 'wall_time': wall_time,
+					'peak_memory': peak_memory, 'per_task_us': wall_time / num_tasks * 1e6}
+				records.append(record)
+
+				if verbose:
+					print('%-16s %8d thr  %-16s %10.4f s %10.3f us/task %12s B' % (name, num_threads, record['method'], wall_time,
+						record['per_task_us'], peak_memory if peak_memory != None else '-'))
+
+	return {'version': version, 'python': platform.python_version(), 'platform': platform.platform(),
+		'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'repeat': repeat, 'seed': seed, 'records': records}
+
+# Compare two measurements #
+# A case is a regression if its wall time (or peak memory) grows by more than the threshold; the cases faster than #
+# min_time (in both measurements) are not compared, as their timing is dominated by noise, and neither are the cases #
+# whose execution times have different sources (e.g., measured and random execution times of a benchmark) #
+# Return the list of (graph, number of threads, method, metric, old value, new value, ratio) of the regressions #
+def compare(old, new, threshold = 0.1, min_time = 0.001, verbose = True):
+	old_records = {}
+	for record in old['records']:
+		old_records[(record['graph'], record['num_threads'], record['method'])] = record
+
+	regressions = []
+	for record in new['records']:
+		key = (record['graph'], record['num_threads'], record['method'])
+		if key not in old_records:
+			continue
+		prev = old_records[key]
+
+		if prev.get('et_source') != record.get('et_source'):
+			if verbose:
+				print('%-16s %8d thr  %-16s not compared (execution times: %s, %s)' % (key + (prev.get('et_source'), record.get('et_source'))))
+			continue
+
+		for metric in ['wall_time', 'peak_memory']:
+			if prev[metric] == None or record[metric] == None or prev[metric] == 0:
+				continue
+			if metric == 'wall_time' and max(prev[metric], record[metric]) < min_time:
+				continue
+
+			ratio = record[metric] / prev[metric]
+			flag = ''
+			if ratio > 1 + threshold:
+				flag = 'REGRESSION'
+				regressions.append(key + (metric, prev[metric], record[metric], ratio))
+			elif ratio < 1 / (1 + threshold):
+				flag = 'improved'
+
+			if verbose:
+				print('%-16s %8d thr  %-16s %-12s %14.6g %14.6g %8.3fx %s' % (key + (metric, prev[metric], record[metric], ratio, flag)))
+
+	return regressions
+
+# Parse the command line and run the benchmark suite or the comparison #
+def main(argv = None):
+	parser = argparse.ArgumentParser(description = 'Measure the performance of the simulator.')
+	commands = parser.add_subparsers(dest = 'command', required = True)
+
+	parser_run = commands.add_parser('run', help = 'run the benchmark suite')
+	parser_run.add_argument('--preset', choices = sorted(presets), default = 'quick', help = 'predefined set of cases (default: quick)')
+	parser_run.add_argument('--bench-name', nargs = '*', help = 'benchmarks (default: from the preset)')
+	parser_run.add_argument('--num-tasks', nargs = '*', type = int, help = 'sizes of the random graphs (default: from the preset)')
+	parser_run.add_argument('--num-threads', nargs = '*', type = int, help = 'numbers of threads (default: from the preset)')
+	parser_run.add_argument('--methods', default = 'all', help = 'comma-separated methods, as in cli.py (default: all)')
+	parser_run.add_argument('--repeat', type = int, help = 'number of repetitions of each case (default: from the preset)')
+	parser_run.add_argument('--no-memory', action = 'store_true', help = 'do not measure the peak memory')
+	parser_run.add_argument('--seed', type = int, default = 1, help = 'seed of the random graphs (default: 1)')
+	parser_run.add_argument('-o', '--output', required = True, help = 'output file (JSON)')
+
+	parser_compare = commands.add_parser('compare', help = 'compare two measurements')
+	parser_compare.add_argument('old', help = 'the earlier measurement (JSON)')
+	parser_compare.add_argument('new', help = 'the later measurement (JSON)')
+	parser_compare.add_argument('--threshold', type = float, default = 0.1, help = 'relative growth reported as a regression (default: 0.1)')
+	parser_compare.add_argument('--min-time', type = float, default = 0.001, help = 'wall time (s) below which the cases are not compared (default: 0.001)')
+
+	args = parser.parse_args(argv)
+
+	if args.command == 'run':
+		preset = presets[args.preset]
+		bench_names = args.bench_name if args.bench_name != None else preset['bench_name']
+		sizes = args.num_tasks if args.num_tasks != None else preset['num_tasks']
+		thread_counts = args.num_threads if args.num_threads != None else preset['num_threads']
+		repeat = args.repeat if args.repeat != None else preset['repeat']
+
+		try:
+			config_list = cli.parse_methods(args.methods)
+		except ValueError as e:
+			parser.error(str(e))
+
+		measurement = run(bench_names, sizes, thread_counts, config_list, repeat, not args.no_memory, args.seed)
+		with open(args.output, 'w') as file:
+			json.dump(measurement, file, indent = 1)
+
+		return 0
+	else:
+		with open(args.old) as file:
+			old = json.load(file)
+		with open(args.new) as file:
+			new = json.load(file)
+
+		regressions = compare(old, new, args.threshold, args.min_time)
+		print(str(len(regressions)) + ' regression(s) found.')
+
+		return 1 if bool(regressions) else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
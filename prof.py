@@ -0,0 +1,172 @@
+ #**************************************************************************
+ # prof.py
+ #
+ # Opt-in profiling of the phases of the mapping process (readiness
+ # tracking, thread selection, task selection, the bookkeeping of the
+ # allocation queues, the calculation of the results, and the export).
+ # While a profiler is enabled, the functions of each phase are replaced
+ # by timing wrappers; otherwise the original functions are used, so the
+ # profiling does not cost anything when it is disabled.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import time
+import engine
+import func
+import gantt
+import simulator
+from method import bfs
+from method import lpt
+from method import spt
+from method import lnsnl
+from method import rank
+from method import new
+
+# The phases and their functions (phase name, owner, function name) #
+# The ready tasks of LPT, SPT, LNSNL, and RANK are selected by ready.pop, and their idle threads are #
+# selected in the dispatch functions (which include the operations on the heap of the idle threads) #
+phases = [
+	('simulate', engine, 'simulate'),
+	('ready.setup', engine.ready_tracker, '__init__'),
+	('ready.complete', engine.ready_tracker, 'complete'),
+	('ready.pop', engine.ready_tracker, 'pop'),
+	('priority', lpt, 'priority'),
+	('priority', spt, 'priority'),
+	('priority', lnsnl, 'priority'),
+	('priority', func, 'upward_rank'),
+	('dispatch', bfs.scheduler, 'dispatch'),
+	('dispatch', lpt.scheduler, 'dispatch'),
+	('dispatch', spt.scheduler, 'dispatch'),
+	('dispatch', lnsnl.scheduler, 'dispatch'),
+	('dispatch', rank.scheduler, 'dispatch'),
+	('dispatch', new.scheduler, 'dispatch'),
+	('finish', bfs.scheduler, 'finish'),
+	('finish', lpt.scheduler, 'finish'),
+	('finish', spt.scheduler, 'finish'),
+	('finish', lnsnl.scheduler, 'finish'),
+	('finish', rank.scheduler, 'finish'),
+	('finish', new.scheduler, 'finish'),
+	('thread.find_idle_thread', bfs, 'find_idle_thread'),
+	('thread.alloc_heuristic', new.scheduler, 'alloc_heuristic'),
+	('task.disp_heuristic', new.scheduler, 'disp_heuristic'),
+	('queue.append', new.alloc_list, 'append'),
+	('queue.remove', new.alloc_list, 'remove'),
+	('queue.rec_idle_time', new.alloc_list, 'rec_idle_time'),
+	('results.idle_time', func, 'idle_time'),
+	('results.miss_deadline', func, 'miss_deadline'),
+	('export.scheduling', func, 'export_scheduling'),
+	('export.graphic', func, 'graphic_result'),
+	('export.gantt', gantt, 'render')
+]
+
+active = None # The enabled profiler (only one profiler can be enabled at a time)
+
+# Define the profiler class #
+# For each phase, the profiler counts the calls and accumulates the total time (including the nested phases) #
+# and the self time (excluding the nested phases) #
+# The functions are replaced in the whole process, so the profiler should not be enabled while other #
+# mapping processes run in other threads #
+class profiler:
+	def __init__(self):
+		self.stats = {} # The [calls, total time, self time] of each phase
+		self.stack = [] # The time of the nested phases of each open call
+		self.originals = [] # The replaced functions (owner, function name, original function)
+
+	# Create the timing wrapper of a function #
+	def wrap(self, name, function):
+		stats = self.stats
+		stack = self.stack
+		perf_counter = time.perf_counter
+
+		if name not in stats:
+			stats[name] = [0, 0.0, 0.0]
+		stat = stats[name]
+
+		def wrapper(*args, **kwargs):
+			stack.append(0.0)
+			start = perf_counter()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				elapsed = perf_counter() - start
+				nested = stack.pop()
+				stat[0] += 1
+				stat[1] += elapsed
+				stat[2] += elapsed - nested
+				if bool(stack):
+					stack[-1] += elapsed
+
+		return wrapper
+
+	# Replace the functions of the phases by the timing wrappers #
+	def enable(self):
+		global active
+
+		if active != None:
+			raise RuntimeError('Another profiler is already enabled')
+		active = self
+
+		for name, owner, attr in phases:
+			function = owner.__dict__[attr]
+			self.originals.append((owner, attr, function))
+			setattr(owner, attr, self.wrap(name, function))
+
+	# Restore the original functions #
+	def disable(self):
+		global active
+
+		for owner, attr, function in reversed(self.originals):
+			setattr(owner, attr, function)
+		self.originals = []
+		active = None
+
+	def __enter__(self):
+		self.enable()
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.disable()
+
+	# Clear the statistics #
+	def reset(self):
+		for stat in self.stats.values():
+			stat[0] = 0
+			stat[1] = 0.0
+			stat[2] = 0.0
+
+	# Return the breakdown of the phases as a table (sorted by the self time) #
+	def report(self, title = ''):
+		total = sum(stat[2] for stat in self.stats.values())
+
+		lines = []
+		if title != '':
+			lines.append(title)
+		lines.append('%-24s %10s %12s %12s %7s %10s' % ('Phase', 'Calls', 'Total (s)', 'Self (s)', 'Self %', 'us/call'))
+
+		for name, stat in sorted(self.stats.items(), key = lambda item: -item[1][2]):
+			if stat[0] == 0:
+				continue
+			lines.append('%-24s %10d %12.6f %12.6f %6.1f%% %10.3f' % (name, stat[0], stat[1], stat[2],
+				100 * stat[2] / total if total > 0 else 0, 1e6 * stat[1] / stat[0]))
+
+		return '\n'.join(lines)
+
+# Map the graph using a method with the profiling enabled (see simulator.run) #
+# Return the schedule and the profiler #
+def run(num_tasks, num_threads, task_list, deadline, alg_name, alloc_alg = '', disp_alg = '', param = None):
+	with profiler() as p:
+		result = simulator.run(num_tasks, num_threads, task_list, deadline, alg_name, alloc_alg, disp_alg, param)
+
+	return result, p
@@ -0,0 +1,383 @@
+ #**************************************************************************
+ # reader.py
+ #
+ # Read the benchmark files in a single streaming pass, so large
+ # instrumentation dumps (also gzip-compressed ones) are processed
+ # without loading the whole file into memory.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import re
+import gzip
+from array import array
+
+chunk_size = 1 << 20 # The number of characters read at once
+
+# The tokens of a json file (string, number, punctuation, or literal) #
+json_token = re.compile(r'\s*(?:("(?:[^"\\]|\\.)*")|(-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)|([{}\[\]:,])|(true|false|null))')
+json_space = re.compile(r'\s*')
+json_number_tail = re.compile(r'[\d.eE+-]*') # The characters which may continue a number
+
+# Open a text file, which may be compressed with gzip #
+def open_text(path):
+	with open(path, 'rb') as file:
+		magic = file.read(2)
+
+	if magic == b'\x1f\x8b':
+		return gzip.open(path, 'rt')
+	else:
+		return open(path, 'r')
+
+# Find a file of the benchmark, which may be compressed with gzip (<name>.gz) #
+def bench_path(bench_name, suffix):
+	path = "benchmark/" + bench_name + suffix
+
+	if not os.path.exists(path) and os.path.exists(path + '.gz'):
+		return path + '.gz'
+	return path
+
+# Find the JSON file of the execution times of the benchmark for a number of threads #
+# The file measured with the number of threads (bench_json (<n> threads).json) is used first, then the renamed #
+# file (bench_json.json), and then the file measured with the closest number of threads #
+# Return the path of the file (the renamed file, if none is found) #
+def bench_json_path(bench_name, num_threads):
+	path = bench_path(bench_name, "_json (" + str(num_threads) + " threads).json")
+	if os.path.exists(path):
+		return path
+
+	path = bench_path(bench_name, "_json.json")
+	if os.path.exists(path):
+		return path
+
+	measured = [] # The measured files (distance of the number of threads, number of threads, name)
+	pattern = re.compile(re.escape(bench_name) + r'_json \((\d+) threads\)\.json(\.gz)?')
+	if os.path.isdir("benchmark"):
+		for name in os.listdir("benchmark"):
+			match = pattern.fullmatch(name)
+			if match:
+				measured.append((abs(int(match.group(1)) - num_threads), int(match.group(1)), name))
+
+	if bool(measured):
+		return "benchmark/" + min(measured)[2]
+	return path
+
+# Read the tokens of a json file one by one #
+# Each token is returned as (kind, text), where kind is 's' (string), 'n' (number), 'p' (punctuation), or 'l' (literal) #
+def json_tokens(file):
+	buf = ''
+	eof = False
+
+	while not eof:
+		chunk = file.read(chunk_size)
+		eof = not bool(chunk)
+		buf += chunk
+
+		pos = 0
+		while True:
+			match = json_token.match(buf, pos)
+			if match == None:
+				break
+
+			# A token at the end of the buffer may continue in the next chunk (e.g., a number followed by #
+			# the start of its exponent) #
+			if not eof and (match.end() == len(buf) or (match.group(2) != None and json_number_tail.fullmatch(buf, match.end()) != None)):
+				break
+
+			pos = match.end()
+			if match.group(1) != None:
+				yield 's', match.group(1)
+			elif match.group(2) != None:
+				yield 'n', match.group(2)
+			elif match.group(3) != None:
+				yield 'p', match.group(3)
+			else:
+				yield 'l', match.group(4)
+
+		buf = buf[pos:]
+
+		if eof and json_space.fullmatch(buf) == None:
+			raise ValueError('Invalid json content: ' + buf[:40])
+
+# Read the execution times of the tasks from the json file of a benchmark #
+# The execution times are found in the nodes -> <task ID> -> results -> execution_total_time entries #
+# (the entries of all the task graphs in the file are merged) #
+# ids: The task ID in the file of each task (default: the same as the task ID), see read_dot #
+# Return the list of the execution times of each task (as an array) #
+def read_et_samples(path, num_tasks, ids = None):
+	samples = [array('q') for i in range(num_tasks)] # The execution times of each task
+
+	# The position of each task ID of the file in the list of tasks #
+	if ids == None:
+		ids = range(num_tasks)
+	local = array('i', [-1]) * (max(ids) + 1 if len(ids) != 0 else 0)
+	for i in range(len(ids)):
+		local[ids[i]] = i
+
+	# The stack of the open objects and arrays; each item is [is object, expecting a key] #
+	stack = []
+	# The path of the keys to the current value (None for the items of an array) #
+	keys = []
+
+	with open_text(path) as file:
+		for kind, text in json_tokens(file):
+			if kind == 'p':
+				if text == '{':
+					stack.append([True, True])
+					keys.append(None)
+				elif text == '[':
+					stack.append([False, False])
+					keys.append(None)
+				elif text == '}' or text == ']':
+					stack.pop()
+					keys.pop()
+				elif text == ',':
+					if stack[-1][0]:
+						stack[-1][1] = True
+				# A colon is followed by the value of the current key #
+				elif text == ':':
+					stack[-1][1] = False
+				continue
+
+			# The key of an object #
+			if bool(stack) and stack[-1][0] and stack[-1][1]:
+				keys[-1] = text[1:-1]
+				continue
+
+			# The execution time of a task (nodes -> <task ID> -> results -> [] -> execution_total_time) #
+			if kind == 'n' and len(keys) >= 5 and keys[-1] == 'execution_total_time' and keys[-2] == None and keys[-3] == 'results' and keys[-5] == 'nodes':
+				t_id = keys[-4]
+				if t_id != None and t_id.isdigit() and int(t_id) < len(local) and local[int(t_id)] != -1:
+					if text.lstrip('-').isdigit():
+						samples[local[int(t_id)]].append(int(text))
+					else:
+						samples[local[int(t_id)]].append(round(float(text)))
+
+	return samples
+
+# The spaces and comments of a DOT file #
+# A line comment always extends to the end of the line (or of the buffer), so the words of a comment split at #
+# the end of a chunk are not taken as tokens #
+dot_space = r'(?:\s|//[^\n]*(?![^\n])|/\*[\s\S]*?\*/|#[^\n]*(?![^\n]))*'
+
+# The tokens of a DOT file (quoted string, edge operator, ID or numeral, punctuation, or the start of an HTML string) #
+dot_token = re.compile(dot_space + r'(?:("(?:[^"\\]|\\.)*")|(->|--)|([A-Za-z_\x80-\uffff][\w\x80-\uffff]*|-?(?:\.\d+|\d+(?:\.\d*)?))|([{}\[\];,=:])|(<))')
+
+# Read the tokens of a DOT file one by one #
+# Each token is returned as (kind, text), where kind is 'id' (ID, numeral, or the content of a quoted string), #
+# 'html' (HTML string), or 'op' (edge operator or punctuation) #
+def dot_tokens(file):
+	buf = ''
+	eof = False
+
+	while not eof:
+		chunk = file.read(chunk_size)
+		eof = not bool(chunk)
+		buf += chunk
+
+		pos = 0
+		while True:
+			match = dot_token.match(buf, pos)
+			if match == None:
+				break
+
+			# A token at the end of the buffer may continue in the next chunk #
+			if match.end() == len(buf) and not eof:
+				break
+
+			if match.group(5) != None:
+				# An HTML string continues until its angle brackets are balanced #
+				depth = 0
+				end = match.start(5)
+				while end < len(buf):
+					if buf[end] == '<':
+						depth += 1
+					elif buf[end] == '>':
+						depth -= 1
+						if depth == 0:
+							break
+					end += 1
+
+				if end == len(buf):
+					if eof:
+						raise ValueError('Unterminated HTML string in the DOT file')
+					break
+
+				pos = end + 1
+				yield 'html', buf[match.start(5):pos]
+				continue
+
+			pos = match.end()
+			if match.group(1) != None:
+				yield 'id', match.group(1)[1:-1].replace('\\"', '"')
+			elif match.group(2) != None:
+				yield 'op', match.group(2)
+			elif match.group(3) != None:
+				yield 'id', match.group(3)
+			else:
+				yield 'op', match.group(4)
+
+		buf = buf[pos:]
+
+		if eof and re.fullmatch(dot_space, buf) == None:
+			raise ValueError('Invalid DOT content: ' + buf[:40])
+
+# Read the task graphs of a DOT file in a single pass #
+# Each cluster subgraph (e.g., cluster_0) including tasks is a separate task graph; the tasks declared out of #
+# the clusters form another task graph (which is the only one if the file does not include any clusters) #
+# The tasks are the nodes with numeric IDs (other nodes, e.g., the legend of the user functions, are skipped), #
+# and a task belongs to the cluster where it is declared first #
+# Return the list of the task graphs, where each one is (name, task IDs in the file, source tasks, destination tasks) #
+# and the data dependencies (source[k] -> destination[k]) use the positions of the tasks in the sorted task IDs #
+def read_dot(path):
+	names = [] # The names of the clusters
+	owner = array('i') # The task graph of each task ID (-1: Declared out of the clusters, -2: Not declared)
+	src = array('i') # The source task of each data dependency
+	dst = array('i') # The destination task of each data dependency
+	stack = [] # The cluster of each open graph or subgraph (-1: Out of the clusters)
+
+	# Declare a node in the current cluster #
+	def declare(name):
+		if not name.isdigit():
+			return -1
+		t_id = int(name)
+
+		if t_id >= len(owner):
+			owner.extend(array('i', [-2]) * (t_id + 1 - len(owner)))
+
+		cluster = stack[-1] if bool(stack) else -1
+		if cluster >= 0 and owner[t_id] < 0:
+			owner[t_id] = cluster
+		elif owner[t_id] == -2:
+			owner[t_id] = -1
+
+		return t_id
+
+	with open_text(path) as file:
+		tokens = dot_tokens(file)
+		pending = [] # The tokens which are read ahead
+
+		def next_token():
+			if bool(pending):
+				return pending.pop()
+			return next(tokens, (None, None))
+
+		def peek():
+			token = next_token()
+			pending.append(token)
+			return token
+
+		# Skip an attribute list ([name = value, ...]) #
+		def skip_attrs():
+			while peek()[1] == '[':
+				next_token()
+				kind, text = next_token()
+				while text != ']':
+					if kind == None:
+						raise ValueError('Unterminated attribute list in the DOT file')
+					kind, text = next_token()
+
+		kind, text = next_token()
+		while kind != None:
+			if kind == 'op':
+				if text == '{':
+					# An anonymous subgraph #
+					stack.append(stack[-1] if bool(stack) else -1)
+				elif text == '}':
+					if not bool(stack):
+						raise ValueError('Unbalanced braces in the DOT file')
+					stack.pop()
+				elif text not in [';', ',']:
+					raise ValueError('Unexpected token in the DOT file: ' + text)
+			elif kind == 'html':
+				raise ValueError('Unexpected HTML string in the DOT file')
+			elif text.lower() == 'strict':
+				pass
+			elif text.lower() in ['digraph', 'graph', 'subgraph'] and peek()[1] != '=':
+				is_subgraph = text.lower() == 'subgraph'
+				name = ''
+				if peek()[0] == 'id':
+					name = next_token()[1]
+
+				if peek()[1] == '{':
+					next_token()
+					if is_subgraph and name.startswith('cluster'):
+						names.append(name)
+						stack.append(len(names) - 1)
+					else:
+						stack.append(stack[-1] if bool(stack) else -1)
+				elif text.lower() == 'graph':
+					# The default attributes of the graph #
+					skip_attrs()
+			elif text.lower() in ['node', 'edge'] and peek()[1] == '[':
+				# The default attributes of the nodes or edges #
+				skip_attrs()
+			elif peek()[1] == '=':
+				# An attribute of the graph (e.g., label=TDG_0) #
+				next_token()
+				next_token()
+			else:
+				# A node or a chain of data dependencies (a -> b -> c) #
+				chain = [text]
+				while True:
+					if peek()[1] == ':':
+						# Skip the port of the node #
+						next_token()
+						next_token()
+						if peek()[1] == ':':
+							next_token()
+							next_token()
+					if peek()[1] not in ['->', '--']:
+						break
+					next_token()
+					kind, text = next_token()
+					if kind != 'id':
+						raise ValueError('Unsupported data dependency in the DOT file: ' + str(text))
+					chain.append(text)
+				skip_attrs()
+
+				t_ids = [declare(name) for name in chain]
+				if len(chain) > 1 and -1 in t_ids:
+					raise ValueError('Non-numeric task ID in a data dependency of the DOT file')
+				for k in range(len(t_ids) - 1):
+					src.append(t_ids[k])
+					dst.append(t_ids[k + 1])
+
+			kind, text = next_token()
+
+	# Collect the tasks of each task graph (the clusters without any tasks are skipped) #
+	graph_ids = [array('i') for k in range(len(names) + 1)] # The task IDs of each cluster (and out of the clusters at the end)
+	local = array('i', [-1]) * len(owner) # The position of each task in its task graph
+	for t_id in range(len(owner)):
+		if owner[t_id] != -2:
+			ids = graph_ids[owner[t_id]]
+			local[t_id] = len(ids)
+			ids.append(t_id)
+
+	graph_src = [array('i') for k in range(len(names) + 1)]
+	graph_dst = [array('i') for k in range(len(names) + 1)]
+	for k in range(len(src)):
+		if owner[src[k]] != owner[dst[k]]:
+			raise ValueError('Data dependency between different task graphs in the DOT file: ' + str(src[k]) + ' -> ' + str(dst[k]))
+		graph_src[owner[src[k]]].append(local[src[k]])
+		graph_dst[owner[src[k]]].append(local[dst[k]])
+
+	names.append('')
+	tdg_list = []
+	for k in range(len(names)):
+		if len(graph_ids[k]) != 0:
+			tdg_list.append((names[k], graph_ids[k], graph_src[k], graph_dst[k]))
+
+	return tdg_list
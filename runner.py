@@ -0,0 +1,207 @@
+ #**************************************************************************
+ # runner.py
+ #
+ # Run the mapping algorithms (BFS, LPT, SPT, LNSNL, and the combinations
+ # of the NEW algorithm) on a graph, either one after another or in
+ # parallel using a pool of worker processes.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import io
+import contextlib
+import multiprocessing
+import func
+import bounds
+import simulator
+from method import bfs
+from method import lpt
+from method import spt
+from method import lnsnl
+from method import rank as method_rank
+from method import new
+
+# The allocation and dispatching heuristics of the NEW algorithm #
+alloc_algs = ['MNTP', 'NT', 'MRIT', 'MTET', 'MTRT', 'TMCD']
+disp_algs = ['MET', 'MRT', 'MCD']
+ext_disp_algs = ['RANK'] # The dispatching heuristics which are not in the results of the main program
+
+# Global variables of the worker processes #
+worker_graph = None # The graph of the worker (num_tasks, task_list, upward rank of the tasks)
+
+# List the configurations of the algorithms in the order of the results #
+# extended: Add the configurations which are not in the results of the main program (the RANK algorithm and #
+# the NEW algorithm with the extended dispatching heuristics) after the other configurations #
+def configs(extended = False):
+	config_list = [('bfs', '', ''), ('lpt', '', ''), ('spt', '', ''), ('lnsnl', '', '')]
+
+	for alloc_alg in alloc_algs:
+		for disp_alg in disp_algs:
+			config_list.append(('new', alloc_alg, disp_alg))
+
+	if extended:
+		config_list.append(('rank', '', ''))
+		for alloc_alg in alloc_algs:
+			for disp_alg in ext_disp_algs:
+				config_list.append(('new', alloc_alg, disp_alg))
+
+	return config_list
+
+# Calculate the upward rank of the tasks once for the configurations which use it (RANK and the RANK heuristic of NEW) #
+# Return the ranks (None, if none of the configurations uses them) #
+def shared_rank(num_tasks, task_list, config_list):
+	for alg_name, alloc_alg, disp_alg in config_list:
+		if alg_name == 'rank' or disp_alg == 'RANK':
+			return func.upward_rank(num_tasks, task_list)
+
+	return None
+
+# Return the name of an algorithm configuration (as in the names of the output files) #
+def config_name(config):
+	alg_name, alloc_alg, disp_alg = config
+
+	if alg_name == 'new':
+		return 'new_' + alloc_alg + '_' + disp_alg
+	return alg_name
+
+# Run an algorithm on the graph #
+# rank: The upward rank of the tasks (see shared_rank; None: calculated by the method if it is needed) #
+def run_config(num_tasks, num_threads, task_list, deadline, config, graphic_result, rank = None):
+	alg_name, alloc_alg, disp_alg = config
+
+	if alg_name == 'bfs':
+		return bfs.execute(num_tasks, num_threads, task_list, deadline, graphic_result)
+	elif alg_name == 'lpt':
+		return lpt.execute(num_tasks, num_threads, task_list, deadline, graphic_result)
+	elif alg_name == 'spt':
+		return spt.execute(num_tasks, num_threads, task_list, deadline, graphic_result)
+	elif alg_name == 'lnsnl':
+		return lnsnl.execute(num_tasks, num_threads, task_list, deadline, graphic_result)
+	elif alg_name == 'rank':
+		return method_rank.execute(num_tasks, num_threads, task_list, deadline, graphic_result, rank)
+	elif alg_name == 'new':
+		return new.execute(num_tasks, num_threads, task_list, deadline, alloc_alg, disp_alg, graphic_result, rank)
+
+# Run all the algorithms one after another #
+def run_serial(num_tasks, num_threads, task_list, deadline, graphic_result):
+	results = []
+	rank = shared_rank(num_tasks, task_list, configs())
+
+	for config in configs():
+		results.append(run_config(num_tasks, num_threads, task_list, deadline, config, graphic_result, rank))
+
+	return results
+
+# Initialize a worker process by receiving the graph once #
+# The graph is sent as its arrays (see gen.graph), which are pickled as raw buffers #
+def init_worker(num_tasks, task_list, rank = None):
+	global worker_graph
+
+	worker_graph = (num_tasks, task_list, rank)
+
+# Run an algorithm in a worker process #
+# The output of the algorithm is captured and returned, so it is shown in the original order #
+def run_worker(job):
+	num_threads, deadline, config, graphic_result = job
+	num_tasks, task_list, rank = worker_graph
+
+	output = io.StringIO()
+	with contextlib.redirect_stdout(output):
+		result = run_config(num_tasks, num_threads, task_list, deadline, config, graphic_result, rank)
+
+	return result, output.getvalue()
+
+# Run all the algorithms in parallel using a pool of worker processes #
+# num_workers: Number of worker processes (0: Number of cores) #
+def run_parallel(num_tasks, num_threads, task_list, deadline, graphic_result, num_workers = 0):
+	jobs = []
+	for config in configs():
+		jobs.append((num_threads, deadline, config, graphic_result))
+
+	if num_workers == 0:
+		num_workers = multiprocessing.cpu_count()
+	num_workers = min(num_workers, len(jobs))
+
+	# Send the graph (and the upward rank of the tasks) once to each worker #
+	with multiprocessing.Pool(num_workers, init_worker, (num_tasks, task_list, shared_rank(num_tasks, task_list, configs()))) as pool:
+		outputs = pool.map(run_worker, jobs, chunksize = 1)
+
+	# Show the outputs and collect the results in the original order #
+	results = []
+	for result, output in outputs:
+		print(output, end = '')
+		results.append(result)
+
+	return results
+
+# Map the graph using a configuration in a worker process and return the schedule #
+def run_schedule_worker(job):
+	num_threads, deadline, config = job
+	num_tasks, task_list, rank = worker_graph
+
+	return simulator.run(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2], None, rank)
+
+# Map the graph using the given configurations without any output (see simulator.run) #
+# Return the schedules in the order of the configurations #
+# num_workers: Number of worker processes (0: Number of cores, 1: No parallel execution) #
+# rank: The upward rank of the tasks (None: calculated once here if a configuration uses it, see shared_rank) #
+def run_schedules(num_tasks, num_threads, task_list, deadline, config_list, num_workers = 1, rank = None):
+	if rank == None:
+		rank = shared_rank(num_tasks, task_list, config_list)
+
+	if num_workers == 0:
+		num_workers = multiprocessing.cpu_count()
+	num_workers = min(num_workers, len(config_list))
+
+	if num_workers <= 1:
+		return [simulator.run(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2], None, rank) for config in config_list]
+
+	jobs = [(num_threads, deadline, config) for config in config_list]
+
+	# Send the graph (and the upward rank of the tasks) once to each worker #
+	with multiprocessing.Pool(num_workers, init_worker, (num_tasks, task_list, rank)) as pool:
+		return pool.map(run_schedule_worker, jobs, chunksize = 1)
+
+# Determine the missed deadline status of a configuration in a worker process #
+def check_deadline_worker(job):
+	num_threads, deadline, config, limits = job
+	num_tasks, task_list, rank = worker_graph
+
+	return simulator.check_deadline(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2], None, limits, rank)
+
+# Determine the missed deadline status of the given configurations, without the whole mapping processes if possible #
+# (see simulator.check_deadline); the upward rank of the tasks and the bounds of the graph are calculated once for #
+# all the configurations #
+# Return the (missed deadline status, decided by) pairs in the order of the configurations #
+# num_workers: Number of worker processes (0: Number of cores, 1: No parallel execution) #
+def check_deadlines(num_tasks, num_threads, task_list, deadline, config_list, num_workers = 1):
+	rank = func.upward_rank(num_tasks, task_list)
+	limits = bounds.bounds(num_tasks, num_threads, task_list, rank)
+
+	# The configurations which are not decided by the bounds are mapped until the deadline #
+	jobs = [(num_threads, deadline, config, limits) for config in config_list if limits.decide(deadline, config[0]) == None]
+
+	if num_workers == 0:
+		num_workers = multiprocessing.cpu_count()
+	num_workers = min(num_workers, len(jobs))
+
+	if num_workers <= 1:
+		return [simulator.check_deadline(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2], None, limits, rank) for config in config_list]
+
+	# Send the graph (and the upward rank of the tasks) once to each worker #
+	with multiprocessing.Pool(num_workers, init_worker, (num_tasks, task_list, rank)) as pool:
+		simulated = iter(pool.map(check_deadline_worker, jobs, chunksize = 1))
+
+	return [next(simulated) if limits.decide(deadline, config[0]) == None else
+		simulator.check_deadline(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2], None, limits, rank) for config in config_list]
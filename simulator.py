@@ -0,0 +1,89 @@
+ #**************************************************************************
+ # simulator.py
+ #
+ # The importable interface of the simulator. A graph can be mapped using
+ # any of the methods without running the interactive script (main.py).
+ # The state of each mapping process is kept in its own scheduler and
+ # schedule objects, and the graph is not modified, so several mapping
+ # processes can run at once (e.g., in the threads of a service).
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import memo
+import func
+import engine
+import bounds
+from method import bfs
+from method import lpt
+from method import spt
+from method import lnsnl
+from method import rank as method_rank
+from method import new
+
+# Create the scheduler of a method #
+# alg_name: bfs, lpt, spt, lnsnl, rank, or new (with the allocation and dispatching heuristics) #
+# param: The parameters of the heuristics of the NEW algorithm (see new.scheduler) #
+# rank: The upward rank of each task for RANK and the RANK heuristic of NEW (see func.upward_rank), so it is #
+# calculated once per graph (None: calculated by the scheduler) #
+def create_scheduler(num_tasks, num_threads, task_list, alg_name, alloc_alg = '', disp_alg = '', param = None, rank = None):
+	if alg_name == 'bfs':
+		return bfs.scheduler(num_tasks, num_threads, task_list)
+	elif alg_name == 'lpt':
+		return lpt.scheduler(num_tasks, num_threads, task_list)
+	elif alg_name == 'spt':
+		return spt.scheduler(num_tasks, num_threads, task_list)
+	elif alg_name == 'lnsnl':
+		return lnsnl.scheduler(num_tasks, num_threads, task_list)
+	elif alg_name == 'rank':
+		return method_rank.scheduler(num_tasks, num_threads, task_list, rank)
+	elif alg_name == 'new':
+		if alloc_alg not in ['MNTP', 'NT', 'MRIT', 'MTET', 'MTRT', 'TMCD'] or disp_alg not in ['MET', 'MRT', 'MCD', 'RANK']:
+			raise ValueError('Unknown heuristics of the NEW algorithm: ' + str(alloc_alg) + ', ' + str(disp_alg))
+
+		return new.scheduler(num_tasks, num_threads, task_list, alloc_alg, disp_alg, param, rank)
+	else:
+		raise ValueError('Unknown method: ' + str(alg_name))
+
+# Map the tasks of the graph using a method and return the schedule #
+# The schedule includes the start time, finish time, and thread of each task, as well as #
+# the response time (t), idle time, and missed deadline status of the system #
+def run(num_tasks, num_threads, task_list, deadline, alg_name, alloc_alg = '', disp_alg = '', param = None, rank = None):
+	result = memo.simulate(num_tasks, num_threads, task_list, alg_name, alloc_alg, disp_alg, param,
+		lambda: create_scheduler(num_tasks, num_threads, task_list, alg_name, alloc_alg, disp_alg, param, rank), rank)
+
+	# Calculate the results #
+	result.idle_time = sum(func.idle_time(num_threads, result, result.t))
+	result.miss_deadline = func.miss_deadline(deadline, result.t)
+
+	return result
+
+# Determine the missed deadline status of the system using a method, without the whole mapping process if possible #
+# The status is decided by the bounds of the response time (see bounds.py) if possible; otherwise, the mapping #
+# process is stopped once the time passes the deadline #
+# limits: The bounds of the graph (bounds.bounds; None: calculated here), so they can be shared by the methods #
+# Return the missed deadline status and how it is decided ('lower bound', 'upper bound', or 'simulation') #
+def check_deadline(num_tasks, num_threads, task_list, deadline, alg_name, alloc_alg = '', disp_alg = '', param = None, limits = None, rank = None):
+	if limits == None:
+		limits = bounds.bounds(num_tasks, num_threads, task_list, rank)
+
+	status = limits.decide(deadline, alg_name)
+	if status == 1:
+		return status, 'lower bound'
+	elif status == 0:
+		return status, 'upper bound'
+
+	result = engine.simulate(num_tasks, num_threads, task_list, create_scheduler(num_tasks, num_threads, task_list, alg_name, alloc_alg, disp_alg, param, rank), until = deadline)
+
+	return func.miss_deadline(deadline, result.t), 'simulation'
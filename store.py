@@ -0,0 +1,225 @@
+ #**************************************************************************
+ # store.py
+ #
+ # Keep the schedules and the results of the runs in a columnar store:
+ # a folder of binary files (one file per column), which are appended
+ # by each run and mapped into memory for reading, so the results of
+ # large sweeps stay compact and can be queried without parsing text.
+ #
+ # The tasks table has a row per task of each run (in the order of the
+ # task IDs), and the runs table has a row per run. The metadata of
+ # each run (the configuration, graph, seed, etc.) is kept as a JSON
+ # line in meta.jsonl, and the columns are described in schema.json.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import json
+import mmap
+from array import array
+
+version = 1 # The version of the store format
+
+# The columns of the tables and their type codes #
+tables = {
+	'tasks': [
+		('run_id', 'q'), # The run of the task
+		('method', 'h'), # The method (index in the methods of the schema)
+		('thread', 'i'), # The thread of the task
+		('start', 'q'), # Start time of the execution of the task
+		('finish', 'q') # Finish time of the execution of the task
+	],
+	'runs': [
+		('method', 'h'), # The method (index in the methods of the schema)
+		('num_tasks', 'q'), # Number of tasks
+		('num_threads', 'i'), # Number of threads
+		('deadline', 'd'), # The deadline of the system
+		('response_time', 'q'), # Response time
+		('idle_time', 'q'), # Idle time of the system
+		('miss_deadline', 'b'), # The missed deadline status of the system
+		('task_offset', 'q'), # The first row of the run in the tasks table
+		('meta_offset', 'q'), # The position of the metadata of the run in meta.jsonl
+		('meta_size', 'q'), # The size of the metadata of the run
+		('run_id', 'q') # The ID of the run (written last, so a run is complete once its ID is stored)
+	]
+}
+
+# Define the store class #
+# Only one process should append to a store at a time; any number of processes can read it #
+# A run that was not completely written (e.g., the process was killed) is ignored when the store is read, #
+# and discarded before the next run is appended #
+class store:
+	def __init__(self, path):
+		self.path = path # The folder of the store
+		os.makedirs(path, exist_ok = True)
+
+		# Read the schema (or create it) #
+		schema_path = os.path.join(path, 'schema.json')
+		if os.path.exists(schema_path):
+			with open(schema_path) as file:
+				self.schema = json.load(file)
+			if self.schema['version'] != version:
+				raise ValueError('Unsupported store version: ' + str(self.schema['version']))
+		else:
+			self.schema = {'version': version, 'tables': {name: [list(column) for column in columns] for name, columns in tables.items()}, 'methods': []}
+			self.write_schema()
+
+		self.count()
+		self.repaired = False # The files of the incomplete runs are truncated before the first append
+
+	# Return the path of a column file #
+	def column_path(self, table, name):
+		return os.path.join(self.path, table + '.' + name + '.bin')
+
+	# Write the schema (under a temporary name first, so a partial schema is never read) #
+	def write_schema(self):
+		schema_path = os.path.join(self.path, 'schema.json')
+		tmp_path = schema_path + '.' + str(os.getpid()) + '.tmp'
+		with open(tmp_path, 'w') as file:
+			json.dump(self.schema, file, indent = 1)
+		os.replace(tmp_path, schema_path)
+
+	# Return the number of rows of a column file #
+	def num_rows(self, table, name, code):
+		path = self.column_path(table, name)
+		if not os.path.exists(path):
+			return 0
+		return os.path.getsize(path) // array(code).itemsize
+
+	# Read a value of a column #
+	def read_value(self, table, name, code, row):
+		values = array(code)
+		with open(self.column_path(table, name), 'rb') as file:
+			file.seek(row * values.itemsize)
+			values.frombytes(file.read(values.itemsize))
+		return values[0]
+
+	# Count the complete runs, as well as the rows of their tasks and the size of their metadata #
+	def count(self):
+		self.num_runs = min(self.num_rows('runs', name, code) for name, code in tables['runs'])
+		self.num_tasks = 0 # The number of rows of the tasks table
+		self.meta_size = 0 # The size of meta.jsonl
+
+		if self.num_runs > 0:
+			row = self.num_runs - 1
+			self.num_tasks = self.read_value('runs', 'task_offset', 'q', row) + self.read_value('runs', 'num_tasks', 'q', row)
+			self.meta_size = self.read_value('runs', 'meta_offset', 'q', row) + self.read_value('runs', 'meta_size', 'q', row)
+
+	# Discard the rows of the incomplete runs #
+	def repair(self):
+		for table, num_rows in [('tasks', self.num_tasks), ('runs', self.num_runs)]:
+			for name, code in tables[table]:
+				self.truncate(self.column_path(table, name), num_rows * array(code).itemsize)
+		self.truncate(os.path.join(self.path, 'meta.jsonl'), self.meta_size)
+		self.repaired = True
+
+	# Truncate a file to a size (the file is created if it does not exist) #
+	def truncate(self, path, size):
+		with open(path, 'ab') as file:
+			if file.tell() != size:
+				file.truncate(size)
+
+	# Return the index of a method (it is added to the schema if it is new) #
+	def method_code(self, method):
+		if method not in self.schema['methods']:
+			self.schema['methods'].append(method)
+			self.write_schema()
+		return self.schema['methods'].index(method)
+
+	# Append the schedule and the results of a run #
+	# method: The name of the method (e.g., runner.config_name(config)) #
+	# meta: The metadata identifying the run (e.g., the graph, seed, and parameters), stored as JSON #
+	# Return the ID of the run #
+	def append(self, method, num_tasks, num_threads, deadline, result, meta = None):
+		if not self.repaired:
+			self.repair()
+
+		run_id = self.num_runs
+		code = self.method_code(method)
+
+		# The tasks table #
+		columns = {
+			'run_id': array('q', [run_id]) * num_tasks,
+			'method': array('h', [code]) * num_tasks,
+			'thread': array('i', result.thread),
+			'start': array('q', result.s_time),
+			'finish': array('q', result.f_time)
+		}
+		for name, code_type in tables['tasks']:
+			with open(self.column_path('tasks', name), 'ab') as file:
+				file.write(columns[name].tobytes())
+
+		# The metadata #
+		line = (json.dumps(dict(meta if meta != None else {}, run_id = run_id, method = method, num_threads = num_threads), sort_keys = True) + '\n').encode()
+		with open(os.path.join(self.path, 'meta.jsonl'), 'ab') as file:
+			file.write(line)
+
+		# The runs table #
+		row = {'method': code, 'num_tasks': num_tasks, 'num_threads': num_threads, 'deadline': deadline, 'response_time': result.t,
+			'idle_time': result.idle_time, 'miss_deadline': int(result.miss_deadline), 'task_offset': self.num_tasks,
+			'meta_offset': self.meta_size, 'meta_size': len(line), 'run_id': run_id}
+		for name, code_type in tables['runs']:
+			with open(self.column_path('runs', name), 'ab') as file:
+				file.write(array(code_type, [row[name]]).tobytes())
+
+		self.num_runs += 1
+		self.num_tasks += num_tasks
+		self.meta_size += len(line)
+
+		return run_id
+
+	# Map a table into memory #
+	# Return the columns (read-only memory views of the files) of the complete runs #
+	def load(self, table):
+		num_rows = self.num_tasks if table == 'tasks' else self.num_runs
+
+		columns = {}
+		for name, code in tables[table]:
+			if num_rows == 0:
+				columns[name] = memoryview(array(code))
+				continue
+
+			with open(self.column_path(table, name), 'rb') as file:
+				mem = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+			columns[name] = memoryview(mem)[:num_rows * array(code).itemsize].cast(code)
+
+		return columns
+
+	# Return the metadata of a run #
+	def meta(self, run_id):
+		runs = self.load('runs')
+		with open(os.path.join(self.path, 'meta.jsonl'), 'rb') as file:
+			file.seek(runs['meta_offset'][run_id])
+			return json.loads(file.read(runs['meta_size'][run_id]))
+
+	# Return the IDs of the runs whose metadata include the given values (e.g., find(method = 'bfs', seed = 1)) #
+	def find(self, **values):
+		run_ids = []
+		with open(os.path.join(self.path, 'meta.jsonl'), 'rb') as file:
+			for k in range(self.num_runs):
+				meta = json.loads(file.readline())
+				if all(name in meta and meta[name] == value for name, value in values.items()):
+					run_ids.append(k)
+
+		return run_ids
+
+	# Return the schedule of a run: the thread, start time, and finish time of each task (memory views) #
+	def schedule(self, run_id):
+		runs = self.load('runs')
+		tasks = self.load('tasks')
+		first = runs['task_offset'][run_id]
+		last = first + runs['num_tasks'][run_id]
+
+		return tasks['thread'][first:last], tasks['start'][first:last], tasks['finish'][first:last]
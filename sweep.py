@@ -0,0 +1,272 @@
+ #**************************************************************************
+ # sweep.py
+ #
+ # Run the mapping algorithms over a grid of simulation parameters (the
+ # graphs, execution times, deadlines, number of threads, and parameters
+ # of the NEW algorithm) using a pool of worker processes, and aggregate
+ # the results of each method over the seeds.
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import random
+import itertools
+import multiprocessing
+import gen
+import reader
+import runner
+import simulator
+
+# The default grid (each list is swept, the other values are fixed) #
+default_grid = {
+	'bench_name': [], # The benchmarks
+	'num_tasks': [50], # Number of tasks [random case]
+	'dep_pro': [0.6], # Probability of selecting the sibling tasks [random case]
+	'num_dep_level': [2], # Maximum number of dependencies (at each level) [random case]
+	'et_type': ['max'], # The type of execution time generation
+	'deadline': [(0.5, 1)], # The (minimum, maximum) probabilities for determining the deadline of the system
+	'seed': list(range(10)), # The seeds of the random number generators
+	'num_threads': [4, 8], # Number of threads
+	'alpha': [0.5], # The parameters of the heuristics of the NEW algorithm (see new.scheduler)
+	'beta': [0],
+	'gamma': [0.5],
+	'theta': [0.4],
+	'psi': [0.6],
+	'et_min': 5, # Minimum execution time
+	'et_max': 10, # Maximum execution time
+	'itr': 10, # Number of iterations for execution time generation
+	'configs': None # The algorithm configurations (None: All, see runner.configs)
+}
+
+# The fields of a result record #
+fields = ['graph', 'et_type', 'dl_min_prob', 'dl_max_prob', 'seed', 'num_threads', 'method', 'param', 'response_time', 'idle_time', 'miss_deadline']
+
+# The parameters of the heuristics of the NEW algorithm #
+param_names = ['alpha', 'beta', 'gamma', 'theta', 'psi']
+
+# Expand a grid (or a list of grids) into the list of jobs #
+# Each job is a simulation instance (graph, execution times, and deadline of a seed), which is mapped #
+# by all the configurations using all the numbers of threads and parameters #
+def expand(grid):
+	if isinstance(grid, dict):
+		grid = [grid]
+
+	jobs = []
+	for item in grid:
+		spec = dict(default_grid)
+		spec.update(item)
+
+		# The graphs: ('y', benchmark) or ('n', number of tasks, dep_pro, num_dep_level) #
+		graphs = [('y', bench_name) for bench_name in spec['bench_name']]
+		for num_tasks, dep_pro, num_dep_level in itertools.product(spec['num_tasks'], spec['dep_pro'], spec['num_dep_level']):
+			graphs.append(('n', num_tasks, dep_pro, num_dep_level))
+
+		params = [dict(zip(param_names, values)) for values in itertools.product(*[spec[name] for name in param_names])]
+		configs = spec['configs'] if spec['configs'] != None else runner.configs()
+
+		for graph, et_type, deadline, seed in itertools.product(graphs, spec['et_type'], spec['deadline'], spec['seed']):
+			jobs.append({'graph': graph, 'et_type': et_type, 'deadline': deadline, 'seed': seed, 'num_threads': list(spec['num_threads']),
+				'params': params, 'configs': configs, 'et_min': spec['et_min'], 'et_max': spec['et_max'], 'itr': spec['itr']})
+
+	return jobs
+
+# Return the name of a graph of a job #
+def graph_name(graph):
+	if graph[0] == 'y':
+		return graph[1]
+	return 'rand_' + '_'.join(str(value) for value in graph[1:])
+
+# Return the label of the parameters of the NEW algorithm #
+def param_label(param):
+	if param == None:
+		return ''
+	return ','.join(name + '=' + str(param[name]) for name in param_names)
+
+# Run a job and return its result records #
+# The random number generators are seeded by the content of the job, so a job produces the same results #
+# regardless of the worker or the order of execution; the graph of a seed is the same for all et_type and #
+# deadline values, so the methods are compared on the same instances #
+# The execution times of a benchmark are measured with a number of threads, so a benchmark graph is built for each #
+# JSON file of the numbers of threads (see reader.bench_json_path) #
+# runs: A list to which the runs are added as (method, number of tasks, number of threads, deadline, schedule, #
+# metadata), to be appended to a results store (see store.py) #
+def run_job(job, runs = None):
+	graph = job['graph']
+	name = graph_name(graph)
+
+	# The numbers of threads of each JSON file (None: a random graph) #
+	groups = {}
+	for num_threads in job['num_threads']:
+		json_path = reader.bench_json_path(graph[1], num_threads) if graph[0] == 'y' else None
+		groups.setdefault(json_path, []).append(num_threads)
+
+	records = []
+	for json_path, thread_counts in groups.items():
+		run_graph(job, json_path, thread_counts, records, runs)
+
+	return records
+
+# Generate the graph of a job and map it using the numbers of threads (see run_job) #
+# json_path: The JSON file of the execution times of a benchmark (None: a random graph) #
+def run_graph(job, json_path, thread_counts, records, runs):
+	graph = job['graph']
+	name = graph_name(graph)
+	dl_min_prob, dl_max_prob = job['deadline']
+
+	# Generate the graph #
+	if graph[0] == 'y':
+		bench_name = graph[1]
+		num_tasks, task_list = gen.graph_predef(bench_name, json_path = json_path)
+
+		# The benchmarks without measured execution times (e.g., sparseLU) cannot be swept #
+		if task_list.sample_ptr == None or task_list.sample_ptr[num_tasks] == 0:
+			raise ValueError('The benchmark ' + bench_name + ' has no measured execution times in ' + json_path)
+	else:
+		bench_name = ''
+		num_tasks = graph[1]
+		task_list = gen.graph_rand(num_tasks, graph[2], graph[3], random.Random('graph|' + name + '|' + str(job['seed'])))
+
+	# Determine execution time of tasks and deadline of the system #
+	rng = random.Random('et|' + name + '|' + job['et_type'] + '|' + str(job['deadline']) + '|' + str(job['seed']))
+	task_list, deadline = gen.specify_et(graph[0], num_tasks, task_list, bench_name, job['et_min'], job['et_max'], job['et_type'], job['itr'], dl_min_prob, dl_max_prob, rng)
+
+	# The upward rank of the tasks is calculated once for the graph (see runner.shared_rank) #
+	rank = runner.shared_rank(num_tasks, task_list, job['configs'])
+
+	for num_threads in thread_counts:
+		for config in job['configs']:
+			# The parameters are only swept for the NEW algorithm #
+			params = job['params'] if config[0] == 'new' else [None]
+
+			for param in params:
+				result = simulator.run(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2], param, rank)
+				records.append((name, job['et_type'], dl_min_prob, dl_max_prob, job['seed'], num_threads, runner.config_name(config),
+					param_label(param), result.t, result.idle_time, result.miss_deadline))
+
+				if runs != None:
+					# The queues of the threads are not needed in the store #
+					result.queue = None
+					meta = {'graph': name, 'et_type': job['et_type'], 'dl_min_prob': dl_min_prob, 'dl_max_prob': dl_max_prob, 'seed': job['seed'],
+						'param': param_label(param)}
+					if json_path != None:
+						meta['json'] = json_path
+					runs.append((runner.config_name(config), num_tasks, num_threads, deadline, result, meta))
+
+# Run a job in a worker process (the results are returned with the position of the job) #
+def run_worker(item):
+	index, job, keep_runs = item
+	runs = [] if keep_runs else None
+	return index, run_job(job, runs), runs
+
+# Run the jobs of a grid and return the result records (in the order of the jobs) #
+# num_workers: Number of worker processes (0: Number of cores, 1: No parallel execution) #
+# results_store: A results store (store.store) to which the schedule and the results of each run are appended #
+# (in the order of the jobs, so the run IDs do not depend on the number of workers) #
+def run(grid, num_workers = 0, results_store = None):
+	jobs = expand(grid)
+	keep_runs = results_store != None
+
+	if num_workers == 0:
+		num_workers = multiprocessing.cpu_count()
+	num_workers = max(1, min(num_workers, len(jobs)))
+
+	outputs = [None] * len(jobs)
+	pending = {} # The runs of the finished jobs which are not appended to the store yet
+	next_index = 0 # The next job to be appended to the store
+
+	items = [(index, jobs[index], keep_runs) for index in range(len(jobs))]
+	if num_workers == 1:
+		finished = map(run_worker, items)
+	else:
+		# Send the jobs in chunks, so many small jobs do not wait for the pool #
+		chunksize = max(1, len(jobs) // (num_workers * 16))
+		pool = multiprocessing.Pool(num_workers)
+		finished = pool.imap_unordered(run_worker, items, chunksize)
+
+	try:
+		for index, records, runs in finished:
+			outputs[index] = records
+
+			if keep_runs:
+				pending[index] = runs
+				while next_index in pending:
+					for run_item in pending.pop(next_index):
+						results_store.append(*run_item)
+					next_index += 1
+	finally:
+		if num_workers > 1:
+			pool.terminate()
+
+	records = []
+	for output in outputs:
+		records.extend(output)
+
+	return records
+
+# Calculate a percentile of a sorted list of values (linear interpolation between the closest ranks) #
+def percentile(values, p):
+	if len(values) == 0:
+		return None
+
+	pos = (len(values) - 1) * p / 100
+	low = int(pos)
+	high = min(low + 1, len(values) - 1)
+
+	return values[low] + (values[high] - values[low]) * (pos - low)
+
+# Aggregate the result records of each method over the seeds #
+# Return the table header and rows: the swept values, the method, the number of simulations, the mean and #
+# percentiles of the response time, the mean idle time, and the rate of the missed deadlines #
+def aggregate(records, percentiles = [50, 90, 99]):
+	groups = {} # The records of each group (all the fields except the seed and the results)
+	for record in records:
+		key = record[:4] + record[5:8]
+		if key not in groups:
+			groups[key] = []
+		groups[key].append(record)
+
+	header = ['graph', 'et_type', 'dl_min_prob', 'dl_max_prob', 'num_threads', 'method', 'param', 'count', 'rt_mean']
+	header += ['rt_p' + str(p) for p in percentiles]
+	header += ['idle_mean', 'miss_rate']
+
+	rows = []
+	for key, group in groups.items():
+		response_time = sorted(record[8] for record in group)
+		idle_time = [record[9] for record in group]
+		miss = [record[10] for record in group]
+
+		row = list(key) + [len(group), sum(response_time) / len(group)]
+		row += [percentile(response_time, p) for p in percentiles]
+		row += [sum(idle_time) / len(group), sum(miss) / len(group)]
+		rows.append(row)
+
+	return header, rows
+
+# Write a table to a tab-separated file #
+def write_table(path, header, rows):
+	with open(path, 'w') as file:
+		file.write('\t'.join(header) + '\n')
+		for row in rows:
+			file.write('\t'.join(str(value) for value in row) + '\n')
+
+# Run the default grid and write the records and the aggregated results to the output folder #
+if __name__ == '__main__':
+	records = run(default_grid)
+
+	write_table(os.path.join('output', 'sweep_records.dat'), fields, records)
+	header, rows = aggregate(records)
+	write_table(os.path.join('output', 'sweep_summary.dat'), header, rows)
+
+	print('The sweep is finished (' + str(len(records)) + ' simulations).')
@@ -0,0 +1,83 @@
+ #**************************************************************************
+ # test_bounds.py
+ #
+ # Check the bounds of the response time on a graph computed by hand, and
+ # the missed deadline status of the configurations decided by the bounds
+ # or by mapping until the deadline.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_bounds
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import unittest
+import bounds
+import runner
+import simulator
+from test_mapping import build_graph
+
+# A diamond (T0 -> T1, T2 -> T3) beside an independent task (T4) #
+# The critical path is T0 -> T2 -> T3 (3 + 4 + 1 = 8) and the total work is 3 + 2 + 4 + 1 + 5 = 15 #
+num_tasks = 5
+deps = [(0, 1), (0, 2), (1, 3), (2, 3)]
+et = [3, 2, 4, 1, 5]
+
+# Define the test class of the bounds #
+class bounds_test(unittest.TestCase):
+	def setUp(self):
+		self.task_list, deadline = build_graph(num_tasks, deps, et)
+
+	# The bounds of the graph computed by hand #
+	def test_bounds(self):
+		# 2 threads: lower = max(8, ceil(15 / 2)) = 8, upper = (15 + 1 * 8) // 2 = 11 #
+		limits = bounds.bounds(num_tasks, 2, self.task_list)
+		self.assertEqual((limits.critical_path, limits.work, limits.lower, limits.upper), (8, 15, 8, 11))
+
+		# 3 threads: lower = max(8, ceil(15 / 3)) = 8, upper = (15 + 2 * 8) // 3 = 10 #
+		limits = bounds.bounds(num_tasks, 3, self.task_list)
+		self.assertEqual((limits.lower, limits.upper), (8, 10))
+		self.assertEqual(limits.gap(10), 0.25)
+
+		# 1 thread: the tasks are executed one by one #
+		limits = bounds.bounds(num_tasks, 1, self.task_list)
+		self.assertEqual((limits.lower, limits.upper), (15, 15))
+
+		# The response times of the methods are within the bounds (LPT finishes at the lower bound) #
+		limits = bounds.bounds(num_tasks, 2, self.task_list)
+		for alg_name in bounds.work_conserving:
+			t = simulator.run(num_tasks, 2, self.task_list, 0, alg_name).t
+			self.assertTrue(limits.lower <= t <= limits.upper, alg_name)
+		self.assertEqual(simulator.run(num_tasks, 2, self.task_list, 0, 'lpt').t, 8)
+
+	# The missed deadline status of the configurations on 2 threads #
+	# (LPT: T0 and T4 at 0, T2 at 3, T1 at 5, and T3 at 7, so t = 8; SPT: T1 at 3, T2 at 5, and T3 at 9, so t = 10) #
+	def test_check_deadlines(self):
+		config_list = [('lpt', '', ''), ('spt', '', ''), ('bfs', '', '')]
+
+		# The deadline is missed by every method, as it is below the lower bound #
+		self.assertEqual(runner.check_deadlines(num_tasks, 2, self.task_list, 7, config_list),
+			[(1, 'lower bound'), (1, 'lower bound'), (1, 'lower bound')])
+
+		# The deadline is met by the work-conserving methods, as it is not below the upper bound (BFS is mapped) #
+		self.assertEqual(runner.check_deadlines(num_tasks, 2, self.task_list, 11, config_list),
+			[(0, 'upper bound'), (0, 'upper bound'), (0, 'simulation')])
+
+		# Between the bounds, the methods are mapped until the deadline: LPT meets it, and SPT and BFS miss it #
+		self.assertEqual(runner.check_deadlines(num_tasks, 2, self.task_list, 9, config_list),
+			[(0, 'simulation'), (1, 'simulation'), (1, 'simulation')])
+		self.assertEqual(runner.check_deadlines(num_tasks, 2, self.task_list, 9, config_list, num_workers = 2),
+			[(0, 'simulation'), (1, 'simulation'), (1, 'simulation')])
+
+if __name__ == '__main__':
+	unittest.main()
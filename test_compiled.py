@@ -0,0 +1,132 @@
+ #**************************************************************************
+ # test_compiled.py
+ #
+ # Check the compiled graphs: a compiled graph matches the graph parsed
+ # from its source files, a changed source is compiled again, the index of
+ # the content hashes follows the sizes and modification times of the
+ # files, and an unwritable folder falls back to the parsed graph.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_compiled
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import gen
+import compiled
+
+# Define the test class of the compiled graphs #
+class compiled_test(unittest.TestCase):
+	# Compile the graphs into a temporary folder, from copies of the source files of axpy #
+	def setUp(self):
+		self.folder = tempfile.TemporaryDirectory()
+		self.saved = compiled.cache_dir, compiled.stat_keys
+		compiled.cache_dir = os.path.join(self.folder.name, 'cache')
+		compiled.stat_keys = None
+
+		self.dot_path = os.path.join(self.folder.name, 'axpy_tdg.dot')
+		self.json_path = os.path.join(self.folder.name, 'axpy_json.json')
+		shutil.copy('benchmark/axpy_tdg.dot', self.dot_path)
+		self.set_json('benchmark/axpy_json (4 threads).json')
+
+	def tearDown(self):
+		compiled.cache_dir, compiled.stat_keys = self.saved
+		self.folder.cleanup()
+
+	# Replace the JSON file (its modification time is set in the past, so it is not changed too recently) #
+	def set_json(self, source, age = 60):
+		shutil.copy(source, self.json_path)
+		past = time.time() - age
+		os.utime(self.json_path, (past, past))
+		os.utime(self.dot_path, (past, past))
+
+	# Check that a graph has the arrays of the graph parsed from the source files #
+	def assert_parsed(self, task_list):
+		parsed = gen.parse_bench(self.dot_path, self.json_path)
+
+		self.assertEqual(task_list.num_tasks, parsed.num_tasks)
+		for name, code in compiled.fields:
+			self.assertEqual(list(getattr(task_list, name)), list(getattr(parsed, name)), name)
+
+	def compile(self):
+		return gen.graph_predef('axpy', dot_path = self.dot_path, json_path = self.json_path)[1]
+
+	# A compiled graph is mapped from its file and matches the parsed graph #
+	def test_round_trip(self):
+		task_list = self.compile()
+		self.assertNotEqual(task_list.source, None)
+		self.assertTrue(os.path.exists(task_list.source))
+		self.assert_parsed(task_list)
+
+		# The second time, the same file is mapped (from a new process, the index is read again) #
+		compiled.stat_keys = None
+		self.assertEqual(self.compile().source, task_list.source)
+
+	# A changed source file is compiled again, and the file of the older source is removed #
+	def test_rebuild(self):
+		old = self.compile()
+
+		self.set_json('benchmark/axpy_json (8 threads).json')
+		new = self.compile()
+
+		self.assertNotEqual(new.source, old.source)
+		self.assertFalse(os.path.exists(old.source))
+		self.assert_parsed(new)
+		self.assertNotEqual(list(new.sample_data), list(old.sample_data))
+
+	# The index maps the stat key of the source files to their content hash #
+	def test_index(self):
+		paths = [self.dot_path, self.json_path]
+		self.compile()
+
+		key, recent = compiled.stat_key(paths)
+		self.assertFalse(recent)
+		self.assertEqual(compiled.read_index(), {key: compiled.content_key(paths)})
+
+		# A file of the same size and a new modification time has a new stat key #
+		self.set_json('benchmark/axpy_json (4 threads).json', 30)
+		new_key, recent = compiled.stat_key(paths)
+		self.assertNotEqual(new_key, key)
+		self.assertEqual(compiled.source_key(paths), compiled.content_key(paths))
+		self.assertEqual(compiled.read_index()[new_key], compiled.content_key(paths))
+
+		# The files changed too recently are hashed from their contents, but not indexed #
+		os.utime(self.json_path)
+		recent_key, recent = compiled.stat_key(paths)
+		self.assertTrue(recent)
+		self.assertEqual(compiled.source_key(paths), compiled.content_key(paths))
+		self.assertNotIn(recent_key, compiled.read_index())
+
+		# The index keeps the latest max_index entries #
+		keys = dict(('key' + str(i), 'value' + str(i)) for i in range(compiled.max_index + 10))
+		compiled.write_index(keys)
+		self.assertEqual(compiled.read_index(), dict(list(keys.items())[-compiled.max_index:]))
+
+	# A folder that cannot be created falls back to the parsed graph without errors #
+	def test_unwritable(self):
+		blocker = os.path.join(self.folder.name, 'file')
+		open(blocker, 'w').close()
+		compiled.cache_dir = os.path.join(blocker, 'cache')
+
+		task_list = self.compile()
+		self.assertEqual(task_list.source, None)
+		self.assert_parsed(task_list)
+		self.assertEqual(compiled.read_index(), {})
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,61 @@
+ #**************************************************************************
+ # test_gantt.py
+ #
+ # Check the Gantt charts of empty and partial results: the tasks that are
+ # not mapped are not drawn, and a result without mapped tasks is drawn as
+ # an empty chart.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_gantt
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import tempfile
+import unittest
+import gantt
+
+# Return the contents of a chart #
+def read_chart(path):
+	with open(path) as file:
+		return file.read()
+
+# Define the test class of the Gantt charts #
+class gantt_test(unittest.TestCase):
+	# A result without mapped tasks is drawn as an empty chart #
+	def test_empty_result(self):
+		with tempfile.TemporaryDirectory() as path:
+			for thread, s_time, f_time in [([], [], []), ([None, None], [None, None], [None, None]), ([0], [0], [0])]:
+				paths = gantt.render(os.path.join(path, 'empty.svg'), 2, thread, s_time, f_time)
+				self.assertEqual(paths, [os.path.join(path, 'empty.svg')])
+				self.assertNotIn('>T0<', read_chart(paths[0]))
+
+	# The time axis of a partial result ends at the latest finish time of the mapped tasks #
+	def test_partial_result(self):
+		self.assertEqual(gantt.elements(2, [0, None, 1], [0, None, None], [50, None, None], 100, 100),
+			[[(0.0, 50.0, 0, 1)], []])
+
+		with tempfile.TemporaryDirectory() as path:
+			svg = read_chart(gantt.render(os.path.join(path, 'partial.svg'), 2, [0, 1, None], [0, 10, None], [10, 40, None])[0])
+			self.assertIn('>T0<', svg)
+			self.assertIn('>T1<', svg)
+			self.assertIn('>40<', svg)
+
+	# A negative length of the time axis is an error #
+	def test_negative_time(self):
+		with self.assertRaisesRegex(ValueError, 'negative'):
+			gantt.render('negative.svg', 1, [0], [0], [1], t = -1)
+
+if __name__ == '__main__':
+	unittest.main()
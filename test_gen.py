@@ -0,0 +1,60 @@
+ #**************************************************************************
+ # test_gen.py
+ #
+ # Check the graph families: the shapes of small graphs, and the invalid
+ # widths and numbers of dependencies are rejected.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_gen
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import random
+import unittest
+import gen
+
+# Define the test class of the graph families #
+class gen_test(unittest.TestCase):
+	# Each task of a layered graph depends on 1 to num_dep tasks of the previous layer #
+	def test_layered(self):
+		num_tasks = 20
+		task_list = gen.graph_layered(num_tasks, 4, 2, random.Random(0))
+
+		for j in range(num_tasks):
+			pred = task_list.pred_idx[task_list.pred_ptr[j]:task_list.pred_ptr[j + 1]]
+			if j < 4:
+				self.assertEqual(len(pred), 0)
+			else:
+				self.assertTrue(1 <= len(pred) <= 2)
+				self.assertTrue(all(j // 4 - i // 4 == 1 for i in pred))
+
+	# The invalid widths and numbers of dependencies are errors #
+	def test_invalid(self):
+		for family in ['layered', 'stencil', 'wavefront']:
+			for width in [0, -1]:
+				with self.assertRaisesRegex(ValueError, 'must be positive'):
+					gen.graph_family(family, 20, width)
+
+		with self.assertRaisesRegex(ValueError, 'must not be negative'):
+			gen.graph_family('fork_join', 20, -1)
+		with self.assertRaisesRegex(ValueError, 'must be positive'):
+			gen.graph_layered(20, 4, 0)
+		with self.assertRaisesRegex(ValueError, 'must not be negative'):
+			gen.graph_stencil(20, 4, -1)
+
+		# A single layer has no dependencies #
+		self.assertEqual(len(gen.graph_layered(4, 4, 0).succ_idx), 0)
+
+if __name__ == '__main__':
+	unittest.main()
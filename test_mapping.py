@@ -0,0 +1,314 @@
+ #**************************************************************************
+ # test_mapping.py
+ #
+ # Check the mapping processes against reference results: the schedules
+ # of the methods on small graphs, which were produced by the stepped
+ # loop of the original methods with a time step of 1, and the results
+ # of the incremental mapping, which are the same as mapping the updated
+ # graph from the beginning, and the exact mapping, whose response times
+ # are the optimal ones found by enumerating the schedules.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_mapping
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import math
+import random
+import unittest
+from array import array
+import gen
+import runner
+import simulator
+import incremental
+import bounds
+import bnb
+
+# The reference schedules of the methods: (number of threads, data dependencies, execution times of the tasks, #
+# {method: (response time, thread of each task, start time of each task)}) #
+# The schedules were produced by the stepped loop of the original methods with a time step of 1, where the ready #
+# tasks are dispatched after all the tasks finished at a step, and the response time is the last finish time (the #
+# loop returns one step later). LNSNL counts the immediate successors of each task (the original loop counted none, #
+# so it dispatched the tasks in the order of their IDs) #
+reference = [
+	# 10 tasks, 3 threads #
+	(3, [(0, 1), (2, 4), (3, 4), (3, 5), (1, 6), (4, 6), (5, 6), (3, 7), (5, 7), (6, 7), (2, 8), (3, 8), (4, 8), (7, 8), (3, 9), (6, 9)], [6, 5, 4, 5, 6, 2, 3, 3, 5, 4], {
+		'bfs':           (23, '0012121210', [0, 7, 0, 0, 5, 5, 12, 15, 18, 15]),
+		'lpt':           (22, '0021211210', [0, 6, 0, 0, 5, 5, 11, 14, 17, 14]),
+		'spt':           (22, '2201100102', [0, 6, 0, 0, 5, 5, 11, 14, 17, 14]),
+		'lnsnl':         (22, '2210100102', [0, 6, 0, 0, 5, 5, 11, 14, 17, 14]),
+		'new_MNTP_MET':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+		'new_MNTP_MRT':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+		'new_MNTP_MCD':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+		'new_NT_MET':    (24, '0112012011', [0, 7, 0, 0, 6, 5, 12, 15, 19, 15]),
+		'new_NT_MRT':    (24, '0112012011', [0, 7, 0, 0, 6, 5, 12, 15, 19, 15]),
+		'new_NT_MCD':    (24, '0112012011', [0, 7, 0, 0, 6, 5, 12, 15, 19, 15]),
+		'new_MRIT_MET':  (31, '0200110121', [9, 15, 0, 4, 11, 9, 20, 23, 26, 26]),
+		'new_MRIT_MRT':  (36, '0100122010', [0, 6, 11, 6, 15, 11, 21, 28, 31, 24]),
+		'new_MRIT_MCD':  (36, '0100122010', [0, 6, 11, 6, 15, 11, 21, 28, 31, 24]),
+		'new_MTET_MET':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+		'new_MTET_MRT':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+		'new_MTET_MCD':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+		'new_MTRT_MET':  (43, '0000000000', [11, 17, 0, 4, 22, 9, 28, 31, 38, 34]),
+		'new_MTRT_MRT':  (43, '0000000000', [0, 11, 16, 6, 20, 26, 28, 35, 38, 31]),
+		'new_MTRT_MCD':  (43, '0000000000', [0, 11, 16, 6, 20, 26, 28, 35, 38, 31]),
+		'new_TMCD_MET':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+		'new_TMCD_MRT':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+		'new_TMCD_MCD':  (23, '0112010001', [0, 7, 0, 0, 6, 5, 12, 15, 18, 15]),
+	}),
+	# 12 tasks, 2 threads #
+	(2, [(1, 2), (0, 3), (1, 5), (5, 6), (0, 7), (1, 8), (3, 8), (7, 8), (0, 10), (10, 11)], [5, 3, 4, 3, 3, 5, 5, 5, 5, 5, 5, 4], {
+		'bfs':           (29, '011010011010', [0, 0, 3, 5, 7, 8, 13, 10, 15, 18, 20, 25]),
+		'lpt':           (26, '010101001110', [0, 10, 14, 18, 23, 13, 18, 5, 21, 0, 5, 10]),
+		'spt':           (30, '100110011010', [3, 0, 3, 8, 0, 7, 12, 11, 16, 17, 21, 26]),
+		'lnsnl':         (26, '010011100110', [0, 0, 13, 5, 13, 3, 16, 8, 17, 21, 8, 22]),
+		'new_MNTP_MET':  (27, '010001011101', [7, 0, 3, 12, 0, 8, 20, 13, 18, 3, 15, 23]),
+		'new_MNTP_MRT':  (27, '010001110101', [0, 14, 22, 13, 10, 17, 22, 5, 17, 0, 5, 10]),
+		'new_MNTP_MCD':  (27, '010001110101', [0, 14, 22, 13, 10, 17, 22, 5, 17, 0, 5, 10]),
+		'new_NT_MET':    (26, '010101001110', [7, 0, 3, 13, 0, 8, 17, 12, 21, 3, 16, 22]),
+		'new_NT_MRT':    (34, '010001011100', [0, 10, 14, 26, 23, 13, 18, 5, 29, 0, 5, 10]),
+		'new_NT_MCD':    (34, '010001011100', [0, 10, 14, 26, 23, 13, 18, 5, 29, 0, 5, 10]),
+		'new_MRIT_MET':  (38, '001001001000', [6, 0, 3, 11, 3, 7, 33, 19, 24, 14, 24, 29]),
+		'new_MRIT_MRT':  (39, '000100010010', [0, 10, 28, 15, 36, 13, 18, 5, 23, 5, 10, 32]),
+		'new_MRIT_MCD':  (39, '000100010010', [0, 10, 28, 15, 36, 13, 18, 5, 23, 5, 10, 32]),
+		'new_MTET_MET':  (27, '011110110001', [0, 0, 9, 6, 3, 10, 18, 13, 20, 5, 15, 23]),
+		'new_MTET_MRT':  (29, '011110110000', [0, 0, 3, 20, 12, 10, 15, 7, 24, 5, 15, 20]),
+		'new_MTET_MCD':  (29, '011110110000', [0, 0, 3, 20, 12, 10, 15, 7, 24, 5, 15, 20]),
+		'new_MTRT_MET':  (52, '000000000000', [10, 0, 6, 15, 3, 23, 42, 28, 47, 18, 33, 38]),
+		'new_MTRT_MRT':  (52, '000000000000', [0, 24, 37, 44, 41, 27, 32, 10, 47, 5, 15, 20]),
+		'new_MTRT_MCD':  (52, '000000000000', [0, 24, 37, 44, 41, 27, 32, 10, 47, 5, 15, 20]),
+		'new_TMCD_MET':  (27, '011110110001', [0, 0, 9, 6, 3, 10, 18, 13, 20, 5, 15, 23]),
+		'new_TMCD_MRT':  (29, '011110110000', [0, 0, 3, 20, 12, 10, 15, 7, 24, 5, 15, 20]),
+		'new_TMCD_MCD':  (29, '011110110000', [0, 0, 3, 20, 12, 10, 15, 7, 24, 5, 15, 20]),
+	}),
+	# 9 tasks, 4 threads #
+	(4, [(0, 1), (2, 3), (0, 4), (2, 4), (3, 4), (0, 6), (0, 7), (4, 7)], [3, 1, 1, 2, 4, 2, 3, 4, 3], {
+		'bfs':           (12, '001132203', [0, 3, 0, 2, 4, 0, 3, 8, 0]),
+		'lpt':           (11, '013322031', [0, 3, 0, 1, 3, 0, 3, 7, 0]),
+		'spt':           (11, '210021033', [0, 3, 0, 1, 3, 0, 3, 7, 0]),
+		'lnsnl':         (11, '001122133', [0, 3, 0, 1, 3, 0, 3, 7, 0]),
+		'new_MNTP_MET':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+		'new_MNTP_MRT':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+		'new_MNTP_MCD':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+		'new_NT_MET':    (12, '001232103', [0, 3, 0, 2, 4, 0, 3, 8, 0]),
+		'new_NT_MRT':    (12, '001232103', [0, 3, 0, 2, 4, 0, 3, 8, 0]),
+		'new_NT_MCD':    (12, '001232103', [0, 3, 0, 2, 4, 0, 3, 8, 0]),
+		'new_MRIT_MET':  (18, '020120230', [3, 6, 0, 1, 10, 1, 7, 14, 6]),
+		'new_MRIT_MRT':  (19, '010230110', [0, 6, 8, 9, 11, 6, 3, 15, 3]),
+		'new_MRIT_MCD':  (19, '010230110', [0, 6, 8, 9, 11, 6, 3, 15, 3]),
+		'new_MTET_MET':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+		'new_MTET_MRT':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+		'new_MTET_MCD':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+		'new_MTRT_MET':  (23, '000000000', [5, 8, 0, 3, 15, 1, 12, 19, 9]),
+		'new_MTRT_MRT':  (23, '000000000', [0, 22, 11, 12, 14, 9, 6, 18, 3]),
+		'new_MTRT_MCD':  (23, '000000000', [0, 22, 11, 12, 14, 9, 6, 18, 3]),
+		'new_TMCD_MET':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+		'new_TMCD_MRT':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+		'new_TMCD_MCD':  (13, '011002203', [0, 3, 0, 3, 5, 0, 3, 9, 0]),
+	}),
+]
+
+# Build a graph from its data dependencies and the execution times of the tasks #
+# The deadline is half of the total work, and the response times of the tasks are proportional to their execution times #
+def build_graph(num_tasks, deps, et):
+	task_list = gen.graph_edges(num_tasks, [dep[0] for dep in deps], [dep[1] for dep in deps])
+	deadline = sum(et) / 2
+
+	for i in range(num_tasks):
+		task_list.et[i] = et[i]
+		task_list.rt[i] = deadline * et[i] / sum(et)
+
+	return task_list, deadline
+
+# Define the test class of the simulation engine #
+class engine_test(unittest.TestCase):
+	# The schedules of the methods are the reference schedules #
+	def test_reference_schedules(self):
+		for num_threads, deps, et, schedules in reference:
+			num_tasks = len(et)
+			task_list, deadline = build_graph(num_tasks, deps, et)
+
+			for config in runner.configs():
+				name = runner.config_name(config)
+				with self.subTest(num_tasks = num_tasks, method = name):
+					result = simulator.run(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2])
+					t, thread, s_time = schedules[name]
+
+					self.assertEqual(result.t, t)
+					self.assertEqual(''.join(str(thr_num) for thr_num in result.thread), thread)
+					self.assertEqual(list(result.s_time), s_time)
+					self.assertEqual([result.s_time[i] + et[i] for i in range(num_tasks)], list(result.f_time))
+
+# Define the test class of the incremental mapping #
+class incremental_test(unittest.TestCase):
+	# Check that an updated schedule is the same as the schedule of the updated graph #
+	def check_update(self, result, num_tasks, num_threads, task_list, deadline, et, rt, config):
+		graph = gen.graph(num_tasks, task_list.pred_ptr, task_list.pred_idx, task_list.succ_ptr, task_list.succ_idx)
+		graph.et = array('q', et)
+		graph.rt = array('d', rt)
+		full = simulator.run(num_tasks, num_threads, graph, deadline, config[0], config[1], config[2])
+
+		self.assertEqual(result.t, full.t)
+		self.assertEqual(list(result.thread), list(full.thread))
+		self.assertEqual(list(result.s_time), list(full.s_time))
+		self.assertEqual(result.queue, full.queue)
+		self.assertEqual(result.idle_time, full.idle_time)
+		self.assertEqual(result.miss_deadline, full.miss_deadline)
+
+	# The updates of a few execution times give the same results as mapping the updated graphs again #
+	def test_updates(self):
+		rng = random.Random(7)
+
+		for num_tasks, num_threads in [(40, 3), (80, 4)]:
+			task_list = gen.graph_rand(num_tasks, 0.5, 2, rng)
+			task_list, deadline = gen.specify_et('n', num_tasks, task_list, '', 1, 20, 'avg', 3, 0.5, 1, rng)
+
+			for config in runner.configs(True):
+				with self.subTest(num_tasks = num_tasks, method = runner.config_name(config)):
+					mapping = incremental.mapping(num_tasks, num_threads, task_list, deadline, config[0], config[1], config[2], num_snapshots = 8)
+					et = list(task_list.et)
+
+					# Change the tasks at the end, at the beginning, and anywhere in the graph #
+					for changed in [[num_tasks - 1], [0], rng.sample(range(num_tasks), 3), rng.sample(range(num_tasks // 2, num_tasks), 2)]:
+						for i in changed:
+							et[i] = rng.randint(1, 20)
+						rt = [deadline * et[i] / sum(et) for i in range(num_tasks)]
+
+						result = mapping.update(et, rt)
+						self.check_update(result, num_tasks, num_threads, task_list, deadline, et, rt, config)
+
+					# Only the deadline is changed #
+					result = mapping.update(et, None, deadline / 2)
+					self.check_update(result, num_tasks, num_threads, task_list, deadline / 2, et, rt, config)
+
+	# The graph is not modified by the updates #
+	def test_graph_unchanged(self):
+		num_threads, deps, et, schedules = reference[0]
+		task_list, deadline = build_graph(len(et), deps, et)
+
+		mapping = incremental.mapping(len(et), num_threads, task_list, deadline, 'lpt')
+		mapping.update([value + 1 for value in et])
+
+		self.assertEqual(list(task_list.et), et)
+
+# Generate a small random graph (the data dependencies and the execution times of the tasks) #
+def random_graph(seed):
+	rng = random.Random(seed)
+	num_tasks = rng.choice([6, 7])
+	num_threads = rng.choice([2, 3])
+	dep_pro = rng.choice([0.15, 0.3])
+
+	deps = [(i, j) for j in range(num_tasks) for i in range(j) if rng.random() < dep_pro]
+	task_list, deadline = build_graph(num_tasks, deps, [rng.randint(1, 9) for i in range(num_tasks)])
+
+	return num_tasks, num_threads, task_list, deadline
+
+# Find the optimal response time by enumerating the schedules #
+# The tasks are started one by one (in a topological order) on a thread at the earliest time; an optimal schedule #
+# is found so by starting its tasks in the order of their start times #
+def brute_force(num_tasks, num_threads, task_list):
+	pred = [list(task_list.pred(i)) for i in range(num_tasks)]
+	finish = [None] * num_tasks # The finish time of each started task
+	free = [0] * num_threads # The time at which each thread is idle
+	best = [math.inf]
+
+	def place(count):
+		if max(free) >= best[0]:
+			return
+		if count == num_tasks:
+			best[0] = max(free)
+			return
+
+		for j in range(num_tasks):
+			if finish[j] == None and all(finish[i] != None for i in pred[j]):
+				ready = max([finish[i] for i in pred[j]], default = 0)
+
+				# The threads which are idle at the same time are interchangeable #
+				seen = set()
+				for k in range(num_threads):
+					if free[k] in seen:
+						continue
+					seen.add(free[k])
+
+					idle = free[k]
+					finish[j] = free[k] = max(idle, ready) + task_list.et[j]
+					place(count + 1)
+					free[k] = idle
+					finish[j] = None
+
+	place(0)
+	return best[0]
+
+# Define the test class of the exact mapping #
+class bnb_test(unittest.TestCase):
+	# Check that a schedule keeps the data dependencies and runs one task at a time on each thread #
+	def check_schedule(self, num_tasks, num_threads, task_list, result):
+		for j in range(num_tasks):
+			self.assertEqual(result.f_time[j], result.s_time[j] + task_list.et[j])
+			for i in task_list.pred(j):
+				self.assertLessEqual(result.f_time[i], result.s_time[j])
+
+		for thr_num in range(num_threads):
+			tasks = sorted((result.s_time[i], result.f_time[i]) for i in range(num_tasks) if result.thread[i] == thr_num)
+			for k in range(1, len(tasks)):
+				self.assertLessEqual(tasks[k - 1][1], tasks[k][0])
+
+		self.assertEqual(result.t, max(result.f_time))
+
+	# The exact mapping finds and proves the optimal response time #
+	def test_optimal(self):
+		improved = 0 # The graphs whose heuristics are not optimal
+
+		for seed in range(60):
+			num_tasks, num_threads, task_list, deadline = random_graph(seed)
+			with self.subTest(seed = seed):
+				optimal = brute_force(num_tasks, num_threads, task_list)
+				exact = bnb.solve(num_tasks, num_threads, task_list, deadline, 30, 1)
+
+				self.assertEqual(exact.result.t, optimal)
+				self.assertEqual(exact.lower, optimal)
+				self.assertTrue(exact.optimal)
+				self.check_schedule(num_tasks, num_threads, task_list, exact.result)
+
+				if min(simulator.run(num_tasks, num_threads, task_list, deadline, alg_name).t for alg_name in bounds.work_conserving) > optimal:
+					improved += 1
+
+		self.assertGreater(improved, 0)
+
+	# The subproblems solved by the worker processes give the same optimal response time #
+	def test_parallel(self):
+		for seed in [147, 301]:
+			num_tasks, num_threads, task_list, deadline = random_graph(seed)
+			with self.subTest(seed = seed):
+				exact = bnb.solve(num_tasks, num_threads, task_list, deadline, 30, 2)
+
+				self.assertEqual(exact.result.t, brute_force(num_tasks, num_threads, task_list))
+				self.assertTrue(exact.optimal)
+				self.check_schedule(num_tasks, num_threads, task_list, exact.result)
+
+	# The best schedule of the heuristics and a valid lower bound are returned when the time budget is over #
+	def test_time_limit(self):
+		task_list = gen.graph_rand(200, 0.5, 3, random.Random(3))
+		task_list, deadline = gen.specify_et('n', 200, task_list, '', 1, 100, 'avg', 3, 0.5, 1, random.Random(3))
+
+		exact = bnb.solve(200, 4, task_list, deadline, 0, 1)
+		heuristic = min(simulator.run(200, 4, task_list, deadline, alg_name).t for alg_name in bounds.work_conserving)
+
+		self.assertLessEqual(exact.result.t, heuristic)
+		self.assertGreaterEqual(exact.lower, bounds.bounds(200, 4, task_list).lower)
+		self.assertLessEqual(exact.lower, exact.result.t)
+		self.check_schedule(200, 4, task_list, exact.result)
+
+if __name__ == '__main__':
+	unittest.main()
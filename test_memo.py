@@ -0,0 +1,117 @@
+ #**************************************************************************
+ # test_memo.py
+ #
+ # Check the schedule cache: a given rank of the tasks is a part of the key,
+ # the in-memory cache keeps the most recently used schedules, and the size
+ # of the on-disk cache follows the stored files within its limit.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_memo
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import random
+import tempfile
+import unittest
+import gen
+import func
+import memo
+import simulator
+
+# Generate a random graph #
+def random_graph(num_tasks, seed):
+	rng = random.Random(seed)
+	task_list = gen.graph_rand(num_tasks, 0.6, 2, rng)
+	task_list, deadline = gen.specify_et('n', num_tasks, task_list, '', 5, 10, 'max', 10, 0.5, 1, rng)
+
+	return task_list, deadline
+
+# Define the test class of the schedule cache #
+class memo_test(unittest.TestCase):
+	def setUp(self):
+		self.folder = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		memo.disable()
+		self.folder.cleanup()
+
+	# Return the sizes of the stored files #
+	def file_sizes(self, cache):
+		return sum(os.path.getsize(os.path.join(cache.path, name)) for name in os.listdir(cache.path) if name.endswith('.sched'))
+
+	# The schedules of different given ranks are stored under different keys #
+	def test_rank_key(self):
+		num_tasks = 30
+		task_list, deadline = random_graph(num_tasks, 0)
+		rank = func.upward_rank(num_tasks, task_list)
+		reverse = [-value for value in rank]
+
+		cache = memo.enable(os.path.join(self.folder.name, 'schedules'))
+		for config in [('rank', '', ''), ('new', 'MTRT', 'RANK')]:
+			self.assertNotEqual(cache.key(num_tasks, 2, task_list, *config, rank = rank), cache.key(num_tasks, 2, task_list, *config, rank = reverse))
+
+			for given in [rank, reverse, rank]:
+				memo.disable()
+				expected = simulator.run(num_tasks, 2, task_list, deadline, *config, rank = given)
+				memo.active = cache
+				result = simulator.run(num_tasks, 2, task_list, deadline, *config, rank = given)
+				self.assertEqual((result.thread, result.s_time, result.f_time, result.t), (expected.thread, expected.s_time, expected.f_time, expected.t))
+
+		# The rank is not used by the other methods #
+		self.assertEqual(cache.key(num_tasks, 2, task_list, 'lpt', rank = rank), cache.key(num_tasks, 2, task_list, 'lpt'))
+
+	# The in-memory cache removes the least recently used schedule #
+	def test_lru(self):
+		cache = memo.schedule_cache(None, max_items = 2)
+		task_list, deadline = random_graph(20, 0)
+		result = simulator.run(20, 2, task_list, deadline, 'lpt')
+
+		cache.put('a', result)
+		cache.put('b', result)
+		self.assertNotEqual(cache.get('a'), None)
+		cache.put('c', result)
+
+		self.assertEqual(list(cache.items), ['a', 'c'])
+		self.assertEqual(cache.get('b'), None)
+		self.assertEqual(cache.get('a').f_time, result.f_time)
+
+	# The size of the on-disk cache follows the stored files, and the least recently used files are removed #
+	def test_disk_budget(self):
+		task_list, deadline = random_graph(50, 0)
+		results = [simulator.run(50, num_threads, task_list, deadline, 'lpt') for num_threads in [2, 3, 4, 5]]
+
+		path = os.path.join(self.folder.name, 'schedules')
+		cache = memo.schedule_cache(path, max_items = 1)
+
+		# An overwritten schedule replaces the size of its file #
+		cache.put('a', results[0])
+		cache.put('a', results[1])
+		self.assertEqual(cache.disk_bytes, self.file_sizes(cache))
+		self.assertEqual(memo.schedule_cache(path).disk_bytes, cache.disk_bytes)
+
+		# The limit allows about two schedules, and a file read from the disk becomes the most recently used one #
+		cache.max_bytes = cache.disk_bytes * 2.5
+		os.utime(cache.file_path('a'), (1, 1))
+		cache.put('b', results[2])
+		os.utime(cache.file_path('b'), (2, 2))
+		self.assertEqual(cache.get('a').f_time, results[1].f_time)
+		cache.put('c', results[3])
+
+		self.assertEqual(sorted(name for name in os.listdir(path) if name.endswith('.sched')), ['a.sched', 'c.sched'])
+		self.assertEqual(cache.disk_bytes, self.file_sizes(cache))
+		self.assertTrue(cache.disk_bytes <= cache.max_bytes * 0.9)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,57 @@
+ #**************************************************************************
+ # test_perf.py
+ #
+ # Check the benchmark suite: the benchmarks are mapped with the execution
+ # times measured with each number of threads, the source of the execution
+ # times is recorded, and the cases of different sources are not compared.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_perf
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import contextlib
+import io
+import unittest
+import perf
+
+# Define the test class of the benchmark suite #
+class perf_test(unittest.TestCase):
+	# A benchmark graph is built for each JSON file of the numbers of threads #
+	def test_measured_benchmark(self):
+		graphs = perf.create_graphs(['axpy'], [], [4, 8], 0)
+
+		self.assertEqual([(graph[0], graph[4], graph[5]) for graph in graphs],
+			[('axpy', 'benchmark/axpy_json (4 threads).json', [4]), ('axpy', 'benchmark/axpy_json (8 threads).json', [8])])
+
+	# A benchmark without measured execution times uses random ones with a warning #
+	def test_unmeasured_benchmark(self):
+		stderr = io.StringIO()
+		with contextlib.redirect_stderr(stderr):
+			graphs = perf.create_graphs(['sparseLU'], [], [4], 0)
+
+		self.assertEqual(graphs[0][4], 'random')
+		self.assertIn('sparseLU has no measured execution times', stderr.getvalue())
+
+	# The cases whose execution times have different sources are not compared #
+	def test_compare_sources(self):
+		old = {'graph': 'axpy', 'num_threads': 4, 'method': 'lpt', 'et_source': 'random', 'wall_time': 1.0, 'peak_memory': 0}
+		new = dict(old, et_source = 'benchmark/axpy_json (4 threads).json', wall_time = 10.0)
+
+		with contextlib.redirect_stdout(io.StringIO()):
+			self.assertEqual(perf.compare({'records': [old]}, {'records': [new]}, 0.1, 0), [])
+			self.assertEqual(len(perf.compare({'records': [old]}, {'records': [dict(old, wall_time = 10.0)]}, 0.1, 0)), 1)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,205 @@
+ #**************************************************************************
+ # test_reader.py
+ #
+ # Check the streaming readers of the benchmark files against the reference
+ # parsers: the execution times against json.load, and the task graphs
+ # against the original parser of the simplified DOT files, for the chunk
+ # sizes of 1 to 64 characters (a token may be split at any position) and
+ # for the input compressed with gzip.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_reader
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import io
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+import reader
+
+# The shipped JSON files of the execution times #
+json_files = ['benchmark/axpy_json (4 threads).json', 'benchmark/axpy_json (8 threads).json',
+	'benchmark/heat_json (4 threads).json', 'benchmark/heat_json (8 threads).json']
+
+# The benchmarks of the shipped DOT files #
+bench_names = ['axpy', 'heat', 'hog', 'sparseLU', 'wavefront']
+
+# The chunk sizes of the readers (every size from 1 to 64 characters, and the default size) #
+chunk_sizes = list(range(1, 65)) + [reader.chunk_size]
+
+# Read the execution times of the tasks with json.load (the reference of read_et_samples) #
+def reference_samples(path, num_tasks):
+	samples = [[] for i in range(num_tasks)]
+
+	with reader.open_text(path) as file:
+		data = json.load(file)
+
+	for tdg_list in data.values():
+		for tdg in tdg_list:
+			for t_id, node in tdg['nodes'].items():
+				if int(t_id) < num_tasks:
+					for result in node['results']:
+						samples[int(t_id)].append(round(result['execution_total_time']))
+
+	return samples
+
+# Read the data dependencies of a simplified DOT file (bench_tdg_modified.dot) line by line, as the original #
+# graph_predef did (the reference of read_dot) #
+# Return the number of tasks and the list of the data dependencies #
+def reference_dot(bench_name):
+	num_tasks = 0
+	deps = []
+
+	with open('benchmark/' + bench_name + '_tdg_modified.dot', 'r') as file:
+		for line in file:
+			line_arr = line.strip().split('->')
+
+			for i in range(len(line_arr)):
+				if int(line_arr[i]) > num_tasks:
+					num_tasks = int(line_arr[i])
+
+			if len(line_arr) == 2:
+				deps.append((int(line_arr[0]), int(line_arr[1])))
+
+	return num_tasks + 1, deps
+
+# Compress a file with gzip into a folder #
+def compress(path, folder):
+	gz_path = os.path.join(folder, os.path.basename(path) + '.gz')
+
+	with open(path, 'rb') as file, gzip.open(gz_path, 'wb') as gz_file:
+		shutil.copyfileobj(file, gz_file)
+
+	return gz_path
+
+# Define the test class of the reader of the JSON files #
+class json_test(unittest.TestCase):
+	def setUp(self):
+		self.saved = reader.chunk_size
+		self.folder = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		reader.chunk_size = self.saved
+		self.folder.cleanup()
+
+	# Check the execution times of a file for the chunk sizes #
+	def assert_samples(self, path, num_tasks, sizes):
+		expected = reference_samples(path, num_tasks)
+
+		for size in sizes:
+			reader.chunk_size = size
+			self.assertEqual([list(samples) for samples in reader.read_et_samples(path, num_tasks)], expected, size)
+
+	# The tokens of every kind are not changed by the chunk boundaries #
+	def test_tokens(self):
+		text = ' {"a\\"b": [-1.5e+3, 0, 12345678901234, true, false, null], "c\\\\": {"d": "e f"}}\n'
+		expected = list(reader.json_tokens(io.StringIO(text)))
+		self.assertEqual([token for kind, token in expected if kind == 's'], ['"a\\"b"', '"c\\\\"', '"d"', '"e f"'])
+
+		for size in chunk_sizes:
+			reader.chunk_size = size
+			self.assertEqual(list(reader.json_tokens(io.StringIO(text))), expected, size)
+
+		with self.assertRaisesRegex(ValueError, 'Invalid json content'):
+			list(reader.json_tokens(io.StringIO('{"a": 1} ?')))
+
+	# The execution times of an excerpt of a shipped file (in its layout), for each chunk size #
+	def test_chunk_sizes(self):
+		with open(json_files[0]) as file:
+			data = json.load(file)
+		for tdg in data['axpy']:
+			tdg['nodes'] = dict(list(tdg['nodes'].items())[:6])
+
+		path = os.path.join(self.folder.name, 'excerpt.json')
+		with open(path, 'w') as file:
+			json.dump(data, file, indent = 4)
+
+		self.assert_samples(path, 6, chunk_sizes)
+
+	# The execution times of the shipped files #
+	def test_shipped_files(self):
+		self.assert_samples(json_files[0], 128, [1, 64, reader.chunk_size])
+		for path in json_files[1:]:
+			self.assert_samples(path, 640, [reader.chunk_size])
+
+	# The files compressed with gzip are read as the plain ones #
+	def test_gzip(self):
+		for path in json_files:
+			gz_path = compress(path, self.folder.name)
+			self.assertEqual(reference_samples(gz_path, 640), reference_samples(path, 640))
+			self.assert_samples(gz_path, 640, [61 if 'axpy' in path else reader.chunk_size])
+
+# Define the test class of the reader of the DOT files #
+class dot_test(unittest.TestCase):
+	def setUp(self):
+		self.saved = reader.chunk_size
+		self.folder = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		reader.chunk_size = self.saved
+		self.folder.cleanup()
+
+	# Check the task graph of a file of a benchmark for the chunk sizes #
+	def assert_graph(self, path, bench_name, sizes):
+		num_tasks, deps = reference_dot(bench_name)
+
+		for size in sizes:
+			reader.chunk_size = size
+			tdg_list = reader.read_dot(path)
+
+			self.assertEqual(len(tdg_list), 1, size)
+			name, ids, src, dst = tdg_list[0]
+			self.assertEqual(list(ids), list(range(num_tasks)), size)
+			self.assertEqual(sorted((ids[src[k]], ids[dst[k]]) for k in range(len(src))), sorted(deps), size)
+
+	# The tokens of every kind are not changed by the chunk boundaries #
+	def test_tokens(self):
+		text = ('/* a comment */ digraph "G 1" {\n  // a line comment\n  # a preprocessor line\n'
+			'  node [shape=box]; 12 [label=<<b>T<i>12</i></b>>, color="a \\"b\\""]\n'
+			'  12:p1:n -> 3 -> -4.5 -- .5\n  subgraph cluster_0 { label=TDG_1 }\n}\n')
+		expected = list(reader.dot_tokens(io.StringIO(text)))
+		self.assertIn(('html', '<<b>T<i>12</i></b>>'), expected)
+		self.assertIn(('id', 'a "b"'), expected)
+		self.assertIn(('id', '-4.5'), expected)
+
+		for size in chunk_sizes:
+			reader.chunk_size = size
+			self.assertEqual(list(reader.dot_tokens(io.StringIO(text))), expected, size)
+
+		with self.assertRaisesRegex(ValueError, 'Unterminated HTML string'):
+			list(reader.dot_tokens(io.StringIO('a [label=<<b>a</b>]')))
+
+	# The task graphs of the original files of the small benchmarks, for each chunk size #
+	def test_chunk_sizes(self):
+		for bench_name in ['axpy', 'wavefront']:
+			self.assert_graph('benchmark/' + bench_name + '_tdg.dot', bench_name, chunk_sizes)
+
+	# The original and simplified files of all the benchmarks give the graphs of the original parser #
+	def test_shipped_files(self):
+		for bench_name in bench_names:
+			self.assert_graph('benchmark/' + bench_name + '_tdg.dot', bench_name, [64, reader.chunk_size])
+			self.assert_graph('benchmark/' + bench_name + '_tdg_modified.dot', bench_name, [reader.chunk_size])
+
+	# The files compressed with gzip are read as the plain ones #
+	def test_gzip(self):
+		for bench_name in bench_names:
+			gz_path = compress('benchmark/' + bench_name + '_tdg.dot', self.folder.name)
+			self.assert_graph(gz_path, bench_name, [61, reader.chunk_size])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,120 @@
+ #**************************************************************************
+ # test_store.py
+ #
+ # Check the results store: the runs are read back from the column files
+ # as they were appended, and a run that was not completely written (a
+ # truncated tail of the files) is ignored and discarded before the next
+ # run is appended.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_store
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import os
+import random
+import tempfile
+import unittest
+from array import array
+import gen
+import store
+import simulator
+
+# Map a random graph with the methods #
+# Return the list of (method, number of tasks, number of threads, deadline, result, metadata) #
+def create_runs(methods, num_tasks = 40, num_threads = 3):
+	rng = random.Random(1)
+	task_list = gen.graph_rand(num_tasks, 0.6, 2, rng)
+	task_list, deadline = gen.specify_et('n', num_tasks, task_list, '', 5, 10, 'max', 10, 0.5, 1, rng)
+
+	return [(method, num_tasks, num_threads, deadline, simulator.run(num_tasks, num_threads, task_list, deadline, method), {'seed': 1, 'k': k})
+		for k, method in enumerate(methods)]
+
+# Define the test class of the results store #
+class store_test(unittest.TestCase):
+	def setUp(self):
+		self.folder = tempfile.TemporaryDirectory()
+		self.path = self.folder.name
+
+	def tearDown(self):
+		self.folder.cleanup()
+
+	# Check that the store includes the runs, in the order of their IDs #
+	def assert_runs(self, results_store, runs):
+		table = results_store.load('runs')
+		self.assertEqual(len(table['run_id']), len(runs))
+
+		for run_id, (method, num_tasks, num_threads, deadline, result, meta) in enumerate(runs):
+			self.assertEqual(table['run_id'][run_id], run_id)
+			self.assertEqual(results_store.schema['methods'][table['method'][run_id]], method)
+			self.assertEqual((table['num_tasks'][run_id], table['num_threads'][run_id], table['deadline'][run_id]), (num_tasks, num_threads, deadline))
+			self.assertEqual((table['response_time'][run_id], table['idle_time'][run_id], table['miss_deadline'][run_id]),
+				(result.t, result.idle_time, int(result.miss_deadline)))
+
+			thread, s_time, f_time = results_store.schedule(run_id)
+			self.assertEqual((list(thread), list(s_time), list(f_time)), (result.thread, result.s_time, result.f_time))
+			self.assertEqual(results_store.meta(run_id), dict(meta, run_id = run_id, method = method, num_threads = num_threads))
+
+	# The runs are read back as they were appended, also by another store of the same folder #
+	def test_round_trip(self):
+		runs = create_runs(['bfs', 'lpt', 'spt'])
+
+		results_store = store.store(self.path)
+		for run in runs:
+			self.assertEqual(results_store.append(*run), runs.index(run))
+		self.assert_runs(results_store, runs)
+
+		results_store = store.store(self.path)
+		self.assert_runs(results_store, runs)
+		self.assertEqual(results_store.find(seed = 1), [0, 1, 2])
+		self.assertEqual(results_store.find(method = 'lpt'), [1])
+		self.assertEqual(results_store.find(seed = 2), [])
+
+		# The tasks table is in the order of the runs #
+		tasks = results_store.load('tasks')
+		self.assertEqual(list(tasks['run_id']), [run_id for run_id in range(len(runs)) for i in range(runs[run_id][1])])
+
+	# The runs of a truncated tail are ignored, and discarded before the next run is appended #
+	def test_truncated_tail(self):
+		runs = create_runs(['bfs', 'lpt', 'spt', 'lnsnl'])
+
+		results_store = store.store(self.path)
+		for run in runs[:3]:
+			results_store.append(*run)
+
+		# The process was killed while writing the last run: its ID is partly written and a column of its tasks #
+		# is shorter (a partial row) #
+		for name, size in [('runs.run_id.bin', 3), ('tasks.finish.bin', 5)]:
+			path = os.path.join(self.path, name)
+			with open(path, 'r+b') as file:
+				file.truncate(os.path.getsize(path) - size)
+
+		results_store = store.store(self.path)
+		self.assertEqual(results_store.num_runs, 2)
+		self.assert_runs(results_store, runs[:2])
+		self.assertEqual(results_store.find(seed = 1), [0, 1])
+
+		# The next run takes the ID of the discarded run, and all the files end at the complete runs #
+		self.assertEqual(results_store.append(*runs[3]), 2)
+		self.assert_runs(store.store(self.path), runs[:2] + runs[3:])
+
+		num_tasks = sum(run[1] for run in runs[:2] + runs[3:])
+		for table, num_rows in [('tasks', num_tasks), ('runs', 3)]:
+			for name, code in store.tables[table]:
+				self.assertEqual(os.path.getsize(results_store.column_path(table, name)), num_rows * array(code).itemsize, name)
+		with open(os.path.join(self.path, 'meta.jsonl')) as file:
+			self.assertEqual(len(file.readlines()), 3)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,69 @@
+ #**************************************************************************
+ # test_sweep.py
+ #
+ # Check the parameter sweep: the benchmarks are mapped with the execution
+ # times measured with each number of threads, the benchmarks without
+ # measured execution times are rejected, and the results do not depend
+ # on the number of worker processes.
+ # Run the tests (in the folder of the simulator) with:
+ # python -m unittest test_sweep
+ #**************************************************************************
+ # Copyright 2023 Instituto Superior de Engenharia do Porto
+ #
+ # Licensed under the Apache License, Version 2.0 (the "License");
+ # you may not use this file except in compliance with the License.
+ # You may obtain a copy of the License at
+ #
+ #              http://www.apache.org/licenses/LICENSE-2.0
+ #
+ # Unless required by applicable law or agreed to in writing, software
+ # distributed under the License is distributed on an "AS IS" BASIS,
+ # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ # See the License for the specific language governing permissions and
+ # limitations under the License.
+ #**************************************************************************
+import tempfile
+import unittest
+import gen
+import store
+import sweep
+import simulator
+
+# Define the test class of the parameter sweep #
+class sweep_test(unittest.TestCase):
+	# A shipped benchmark is mapped with the execution times measured with each number of threads #
+	def test_benchmark(self):
+		grid = {'bench_name': ['axpy'], 'num_tasks': [], 'seed': [0], 'num_threads': [4, 8], 'configs': [('lpt', '', ''), ('spt', '', '')]}
+
+		with tempfile.TemporaryDirectory() as path:
+			results_store = store.store(path)
+			records = sweep.run(grid, 1, results_store)
+
+			self.assertEqual([(record[0], record[5], record[6]) for record in records],
+				[('axpy', 4, 'lpt'), ('axpy', 4, 'spt'), ('axpy', 8, 'lpt'), ('axpy', 8, 'spt')])
+
+			for run_id, record in enumerate(records):
+				num_threads = record[5]
+				json_path = 'benchmark/axpy_json (' + str(num_threads) + ' threads).json'
+				self.assertEqual(results_store.meta(run_id)['json'], json_path)
+
+				# The response time of the method on the graph of the JSON file (it does not depend on the deadline) #
+				num_tasks, task_list = gen.graph_predef('axpy', json_path = json_path)
+				task_list, deadline = gen.specify_et('y', num_tasks, task_list, 'axpy', 5, 10, 'max', 10, 0.5, 1)
+				self.assertEqual(record[8], simulator.run(num_tasks, num_threads, task_list, deadline, record[6]).t)
+
+	# A benchmark without measured execution times is an error #
+	def test_unmeasured_benchmark(self):
+		grid = {'bench_name': ['sparseLU'], 'num_tasks': [], 'seed': [0], 'num_threads': [4], 'configs': [('lpt', '', '')]}
+
+		with self.assertRaisesRegex(ValueError, 'sparseLU has no measured execution times'):
+			sweep.run(grid, 1)
+
+	# The results of the random graphs do not depend on the number of worker processes #
+	def test_workers(self):
+		grid = {'num_tasks': [30], 'seed': [0, 1, 2], 'num_threads': [2, 4], 'configs': [('bfs', '', ''), ('new', 'MTRT', 'MCD')]}
+
+		self.assertEqual(sweep.run(grid, 1), sweep.run(grid, 2))
+
+if __name__ == '__main__':
+	unittest.main()